@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de l'extraction des dates et des critères de délai.
+
+Compare, sur un corpus synthétique de courriers CSPE, l'ancien chemin
+(dateutil.parser.parse(..., fuzzy=True) sur chaque correspondance, mise en
+forme en 'JJ/MM/AAAA' puis strptime dans chacun des trois critères datés)
+et le moteur de dates typées (processing.dates) utilisé par
+CSPEExpertAnalyzer.
+
+Exemples d'utilisation:
+    python benchmarks/bench_date_extraction.py
+    python benchmarks/bench_date_extraction.py --documents 5000 --output bench_dates.json
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+from pathlib import Path
+from datetime import datetime, date
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from dateutil.parser import parse as parse_date
+
+from processing.dates import DATE_PATTERN, date_from_parts, extract_dates
+from models.expert_analyzer import CSPEExpertAnalyzer
+
+PHRASES = (
+    "Réclamation du {d:%d/%m/%Y} relative aux factures de l'exercice {d.year}.",
+    "Décision implicite de rejet née le {d:%Y-%m-%d}.",
+    "Facture n° F-{n} du {d:%d-%m-%y} pour un montant de {n},50 €.",
+    "Courrier de relance reçu le {d.day}/{d.month}/{d.year}.",
+)
+
+
+def build_corpus(documents, dates_per_document, seed=42):
+    """Corpus synthétique : courriers comportant des dates entre 2009 et 2020"""
+    rng = random.Random(seed)
+    first, last = date(2009, 1, 1).toordinal(), date(2020, 12, 31).toordinal()
+    corpus = []
+    for _ in range(documents):
+        lines = [rng.choice(PHRASES).format(d=date.fromordinal(rng.randint(first, last)), n=rng.randint(100, 9999))
+                 for _ in range(dates_per_document)]
+        corpus.append("\n".join(lines))
+    return corpus
+
+
+def legacy_dates(text):
+    """Ancien chemin : dateutil flou puis chaînes 'JJ/MM/AAAA'"""
+    dates = []
+    for match in DATE_PATTERN.finditer(text):
+        try:
+            dates.append(parse_date(match.group(), dayfirst=True, yearfirst=False, fuzzy=True).strftime('%d/%m/%Y'))
+        except (ValueError, OverflowError):
+            continue
+    return sorted(set(dates))
+
+
+def legacy_criteria(dates):
+    """Ancien chemin : chaque critère relit toutes les chaînes avec strptime"""
+    latest = max(datetime.strptime(d, '%d/%m/%Y').date() for d in dates)
+    years = [datetime.strptime(d, '%d/%m/%Y').year for d in dates]
+    oldest = min(datetime.strptime(d, '%d/%m/%Y').date() for d in dates)
+    return latest, min(years), oldest
+
+
+def run_legacy(corpus):
+    for text in corpus:
+        dates = legacy_dates(text)
+        if dates:
+            legacy_criteria(dates)
+
+
+def run_typed(corpus, analyzer):
+    for text in corpus:
+        data = analyzer._extract_entities(text)
+        analyzer._check_delai_reclamation(data)
+        analyzer._check_periode_couverte(data)
+        analyzer._check_prescription_quadriennale(data)
+
+
+def run_typed_dates_only(corpus, analyzer):
+    """Moteur typé sans l'extraction des montants et SIRET (même périmètre que l'ancien chemin)"""
+    for text in corpus:
+        dates = extract_dates(text)
+        if dates:
+            data = {'dates': dates}
+            analyzer._check_delai_reclamation(data)
+            analyzer._check_periode_couverte(data)
+            analyzer._check_prescription_quadriennale(data)
+
+
+def measure(fn, *args, repeat=3):
+    """Meilleur temps sur `repeat` exécutions"""
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def parse_args():
+    """Parse les arguments de ligne de commande."""
+    parser = argparse.ArgumentParser(description="Benchmark de l'extraction des dates")
+    parser.add_argument('--documents', type=int, default=2000, help="Nombre de courriers du corpus")
+    parser.add_argument('--dates', type=int, default=20, help="Dates par courrier")
+    parser.add_argument('--repeat', type=int, default=3, help="Répétitions (meilleur temps retenu)")
+    parser.add_argument('--output', type=str, default=None, help="Fichier JSON de résultats")
+    return parser.parse_args()
+
+
+def main():
+    """Fonction principale."""
+    args = parse_args()
+    corpus = build_corpus(args.documents, args.dates)
+    analyzer = CSPEExpertAnalyzer()
+    date_from_parts.cache_clear()
+
+    timings = {
+        'dateutil_chaines': measure(run_legacy, corpus, repeat=args.repeat),
+        'dates_typees': measure(run_typed_dates_only, corpus, analyzer, repeat=args.repeat),
+        'dates_typees_avec_montants': measure(run_typed, corpus, analyzer, repeat=args.repeat),
+    }
+    info = date_from_parts.cache_info()
+    results = {
+        'date': datetime.now().isoformat(),
+        'parametres': vars(args),
+        'scenarios': {
+            label: {
+                'secondes': round(seconds, 4),
+                'documents_par_seconde': round(args.documents / seconds, 1),
+                'acceleration': round(timings['dateutil_chaines'] / seconds, 1)
+            }
+            for label, seconds in timings.items()
+        },
+        'table_dates': {'entrees': info.currsize, 'hits': info.hits, 'misses': info.misses}
+    }
+
+    print(f"\nCorpus : {args.documents} courriers, {args.dates} dates par courrier")
+    for label, metrics in results['scenarios'].items():
+        print(f"  {label:28s} {metrics['secondes']:>8.3f}s  "
+              f"{metrics['documents_par_seconde']:>10.1f} doc/s  x{metrics['acceleration']}")
+    print(f"  table (j, m, a) -> date : {info.currsize} entrées, {info.hits} hits, {info.misses} misses")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\nRésultats écrits dans {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark lecture/écriture concurrente sur la base SQLite de l'assistant CSPE.
+
+Simule la situation de production : un processus écrivain (import par lot)
+insère des dossiers pendant que plusieurs processus lecteurs (pages
+Streamlit) calculent des statistiques sur le même fichier. Le scénario est
+exécuté avec et sans profil de stockage (WAL, synchronous=NORMAL, cache,
+mmap) pour comparer débit, latences et erreurs de verrouillage.
+
+Exemples d'utilisation:
+    python benchmarks/bench_db_concurrency.py
+    python benchmarks/bench_db_concurrency.py --duration 20 --readers 4 --output bench_db.json
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+import tempfile
+import multiprocessing as mp
+from pathlib import Path
+from datetime import datetime
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database_memory import DatabaseManager
+
+
+def _percentile(values, pct):
+    """Percentile simple (plus proche rang) d'une liste de durées"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def _writer(db_url, tuning, duration, start_event, queue):
+    """Insère des dossiers en continu et mesure la latence de chaque insertion"""
+    db = DatabaseManager(db_url, tuning=tuning)
+    latencies, errors, n = [], 0, 0
+    start_event.wait()
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        dossier_id = db.add_dossier({
+            'numero_dossier': f"BENCH-{os.getpid()}-{n}",
+            'demandeur': 'Benchmark',
+            'activite': 'Industrie',
+            'montant_reclame': 1000.0 + n,
+            'statut': ('RECEVABLE', 'IRRECEVABLE', 'INSTRUCTION')[n % 3],
+            'commentaires': 'x' * 512
+        })
+        latencies.append(time.perf_counter() - t0)
+        if dossier_id is None:
+            errors += 1
+        n += 1
+    queue.put(('writer', latencies, errors))
+
+
+def _reader(db_url, tuning, duration, start_event, queue):
+    """Calcule des statistiques en boucle et mesure la latence de chaque lecture"""
+    db = DatabaseManager(db_url, tuning=tuning)
+    latencies, errors = [], 0
+    start_event.wait()
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        stats = db.get_statistics()
+        latencies.append(time.perf_counter() - t0)
+        if not stats.get('total'):
+            errors += 1
+    queue.put(('reader', latencies, errors))
+
+
+def run_scenario(tuning, duration, readers, seed_rows):
+    """Exécute un scénario 1 écrivain / N lecteurs sur une base temporaire"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_url = f"sqlite:///{Path(tmp_dir) / 'bench.db'}"
+        db = DatabaseManager(db_url, tuning=tuning)
+        db.init_db()
+        for i in range(seed_rows):
+            db.add_dossier({'numero_dossier': f"SEED-{i}", 'statut': 'RECEVABLE', 'montant_reclame': float(i)})
+        db.engine.dispose()
+
+        ctx = mp.get_context('spawn')
+        queue = ctx.Queue()
+        start_event = ctx.Event()
+        procs = [ctx.Process(target=_writer, args=(db_url, tuning, duration, start_event, queue))]
+        procs += [ctx.Process(target=_reader, args=(db_url, tuning, duration, start_event, queue))
+                  for _ in range(readers)]
+        for p in procs:
+            p.start()
+        time.sleep(1.0)  # laisser les processus initialiser leur moteur
+        start_event.set()
+
+        collected = {'writer': ([], 0), 'reader': ([], 0)}
+        for _ in procs:
+            role, latencies, errors = queue.get()
+            all_latencies, all_errors = collected[role]
+            collected[role] = (all_latencies + latencies, all_errors + errors)
+        for p in procs:
+            p.join()
+
+    result = {}
+    for role, (latencies, errors) in collected.items():
+        result[role] = {
+            'operations': len(latencies),
+            'ops_par_seconde': round(len(latencies) / duration, 1),
+            'p50_ms': round(_percentile(latencies, 50) * 1000, 2),
+            'p95_ms': round(_percentile(latencies, 95) * 1000, 2),
+            'p99_ms': round(_percentile(latencies, 99) * 1000, 2),
+            'erreurs': errors
+        }
+    return result
+
+
+def parse_args():
+    """Parse les arguments de ligne de commande."""
+    parser = argparse.ArgumentParser(description="Benchmark lecture/écriture concurrente SQLite")
+    parser.add_argument('--duration', type=float, default=10.0, help="Durée de chaque scénario en secondes")
+    parser.add_argument('--readers', type=int, default=3, help="Nombre de processus lecteurs")
+    parser.add_argument('--seed-rows', type=int, default=2000, help="Dossiers insérés avant la mesure")
+    parser.add_argument('--output', type=str, default=None, help="Fichier JSON de résultats")
+    return parser.parse_args()
+
+
+def main():
+    """Fonction principale."""
+    args = parse_args()
+    results = {
+        'date': datetime.now().isoformat(),
+        'parametres': vars(args),
+        'scenarios': {}
+    }
+    for label, tuning in (('defaut', False), ('profil_wal', True)):
+        print(f"\nScénario '{label}' ({args.readers} lecteurs, {args.duration:.0f}s)...")
+        results['scenarios'][label] = run_scenario(tuning, args.duration, args.readers, args.seed_rows)
+        for role, metrics in results['scenarios'][label].items():
+            print(f"  {role:7s} {metrics['ops_par_seconde']:>8.1f} op/s  "
+                  f"p50={metrics['p50_ms']:.2f}ms  p95={metrics['p95_ms']:.2f}ms  "
+                  f"erreurs={metrics['erreurs']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\nRésultats écrits dans {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
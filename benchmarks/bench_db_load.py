@@ -0,0 +1,532 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test de charge de DatabaseManager à l'échelle de millions de dossiers.
+
+Génère des dossiers, critères, documents (textes extraits dédupliqués et
+index plein texte compris) réalistes en lots, directement par SQLAlchemy
+Core : passer par add_dossier prendrait des heures à cette échelle. La base
+peut être un fichier SQLite (par défaut) ou une base PostgreSQL locale
+dédiée (--db-url). Puis :
+
+- chaque méthode publique de DatabaseManager est chronométrée : lectures
+  ponctuelles répétées (--repeat), opérations lourdes (statistiques
+  reconstruites, rapport global, export analytique, sauvegarde...) une
+  fois (--heavy-repeat) ; percentiles p50/p95/p99 par méthode ;
+- scénario concurrent : écrivains (même insertion que
+  bench_db_concurrency.py) et lecteurs mêlant statistiques, listes
+  paginées et lectures ponctuelles, dans des processus séparés ;
+- les requêtes SQL les plus lentes observées sont rejouées sous EXPLAIN
+  QUERY PLAN (SQLite) ou EXPLAIN (ANALYZE, BUFFERS) (PostgreSQL).
+
+Une base PostgreSQL contenant déjà des dossiers n'est modifiée qu'avec
+--reset (tables supprimées puis recréées) ; --reuse mesure la base telle
+quelle, sans génération.
+
+Exemples d'utilisation:
+    python benchmarks/bench_db_load.py --dossiers 1000000 --output bench_db_load.json
+    python benchmarks/bench_db_load.py --dossiers 10000000 --workdir /data/charge --skip generate_global_report
+    python benchmarks/bench_db_load.py --db-url postgresql://cspe@localhost/cspe_charge --reset --dossiers 1000000
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import itertools
+import tempfile
+import multiprocessing as mp
+from pathlib import Path
+from datetime import datetime, date, timedelta
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR))
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+from sqlalchemy import event, func, text
+
+from database_memory import (
+    Base, DatabaseManager, DossierCSPE, CritereAnalyse, Document, TexteExtrait,
+    FPDF_AVAILABLE, PYARROW_AVAILABLE, SEARCH_TABLE,
+    _compress_text, _encode_cursor, _search_rowid
+)
+from bench_db_concurrency import _percentile, _writer
+from bench_extraction import _vary, current_commit, load_letters
+
+ACTIVITES = ('Particuliers', 'Entreprises', 'Collectivités', 'Associations', 'Industrie')
+STATUTS = ('RECEVABLE', 'IRRECEVABLE', 'INSTRUCTION')
+POIDS_STATUTS = (0.35, 0.55, 0.10)
+MOTIFS = (
+    "Délai de réclamation dépassé",
+    "Période hors du champ 2009-2015",
+    "Créance prescrite (prescription quadriennale)",
+    "CSPE répercutée sur le client final",
+)
+CRITERES = ('delai_reclamation', 'periode_couverte', 'prescription_quadriennale', 'repercussion_client_final')
+TYPES_DOCUMENT = ('reclamation', 'facture', 'attestation', 'courrier')
+OBSERVATIONS = (
+    "Réclamation préalable adressée à la CRE dans les délais.",
+    "Factures EDF produites pour l'ensemble de la période.",
+    "Attestation de l'expert-comptable sur l'absence de répercussion.",
+    "Le requérant sollicite le remboursement de la contribution au service public de l'électricité.",
+    "Pièces complémentaires demandées au requérant.",
+    "Fusion-absorption : qualité pour agir à vérifier.",
+)
+TERMES_RECHERCHE = ('cspe', 'facture', 'réclamation', 'remboursement', 'prescription',
+                    '"contribution au service public"', 'électricité')
+TEXTES_DEFAUT = ("Réclamation CSPE du 15/03/2014 portant sur les factures 2010 à 2013, montant 12 450,00 €.",)
+
+
+class QueryRecorder:
+    """Chronomètre chaque requête SQL exécutée par le moteur pendant une opération mesurée"""
+
+    def __init__(self, engine):
+        self.operation = None
+        self.queries = {}
+        event.listen(engine, 'before_cursor_execute', self._before)
+        event.listen(engine, 'after_cursor_execute', self._after)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('bench_t0', []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info['bench_t0'].pop()
+        if self.operation is None or executemany:
+            return
+        entry = self.queries.setdefault(statement, {
+            'operation': self.operation, 'executions': 0, 'total_s': 0.0, 'max_s': 0.0, 'parametres': parameters
+        })
+        entry['executions'] += 1
+        entry['total_s'] += duration
+        if duration > entry['max_s']:
+            entry['max_s'] = duration
+            entry['parametres'] = parameters
+
+    def slowest(self, n):
+        """Les n requêtes SELECT les plus lentes (durée maximale observée)"""
+        selects = [(statement, entry) for statement, entry in self.queries.items()
+                   if statement.lstrip().upper().startswith(('SELECT', 'WITH'))]
+        return sorted(selects, key=lambda item: item[1]['max_s'], reverse=True)[:n]
+
+
+def explain(engine, statement, parameters):
+    """Plan d'exécution d'une requête, rejouée avec les paramètres de son exécution la plus lente"""
+    if engine.dialect.name == 'postgresql':
+        prefix = "EXPLAIN (ANALYZE, BUFFERS) "
+    else:
+        prefix = "EXPLAIN QUERY PLAN "
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(prefix + statement, parameters or None).fetchall()
+    return [str(row[-1]) for row in rows]
+
+
+def text_pool(count, seed):
+    """Textes extraits distincts (courriers de test_cases/ redatés), avec empreinte et forme compressée"""
+    rng = random.Random(seed)
+    letters = load_letters(BENCH_DIR.parent / 'test_cases') or [('defaut', t) for t in TEXTES_DEFAUT]
+    pool = {}
+    for _ in range(count):
+        contenu = _vary(rng.choice(letters)[1], rng)
+        hash_texte = hashlib.sha256(contenu.encode('utf-8')).hexdigest()
+        if hash_texte in pool:
+            continue  # courrier sans date ni montant à faire varier
+        data, compression = _compress_text(contenu)
+        pool[hash_texte] = {
+            'hash_texte': hash_texte,
+            'compression': compression,
+            'taille_originale': len(contenu.encode('utf-8')),
+            'contenu': data,
+            'texte': contenu
+        }
+    return list(pool.values())
+
+
+def dossier_row(rng, numero):
+    """Dossier réaliste : statut pondéré, montant log-normal, analyse sur les trois dernières années"""
+    statut = rng.choices(STATUTS, POIDS_STATUTS)[0]
+    debut = rng.randint(2009, 2015)
+    return {
+        'numero_dossier': numero,
+        'demandeur': f"Requérant {rng.randint(1, 200000)}",
+        'activite': rng.choice(ACTIVITES),
+        'date_reclamation': date(2010, 1, 1) + timedelta(days=rng.randint(0, 3650)),
+        'periode_debut': debut,
+        'periode_fin': min(2015, debut + rng.randint(0, 4)),
+        'montant_reclame': round(rng.lognormvariate(8.0, 1.2), 2),
+        'statut': statut,
+        'motif_irrecevabilite': rng.choice(MOTIFS) if statut == 'IRRECEVABLE' else None,
+        'confiance_analyse': round(rng.uniform(0.5, 0.99), 2),
+        'date_analyse': datetime.now() - timedelta(seconds=rng.randint(0, 3 * 365 * 86400)),
+        'analyste': f"Analyste {rng.randint(1, 40)}",
+        'documents_joints': json.dumps([f"piece_{k}.pdf" for k in range(rng.randint(1, 4))]),
+        'commentaires': ' '.join(rng.sample(OBSERVATIONS, rng.randint(1, 3)))
+    }
+
+
+def generate(db, dossiers, criteres_par_dossier, documents_par_dossier, pool, batch_size, index_search, seed):
+    """
+    Insère `dossiers` dossiers et leurs critères, documents et lignes
+    d'index en lots, par SQLAlchemy Core.
+
+    Returns:
+        Nombre de lignes insérées par table
+    """
+    rng = random.Random(seed)
+    engine = db.engine
+    with engine.connect() as conn:
+        first_dossier = (conn.execute(func.max(DossierCSPE.id).select()).scalar() or 0) + 1
+        next_document = (conn.execute(func.max(Document.id).select()).scalar() or 0) + 1
+        known = set(conn.execute(TexteExtrait.__table__.select().with_only_columns(TexteExtrait.hash_texte)).scalars())
+    counts = dict.fromkeys(('dossiers_cspe', 'criteres_analyse', 'documents', 'textes_extraits', SEARCH_TABLE), 0)
+
+    textes = [{k: v for k, v in entry.items() if k != 'texte'} for entry in pool if entry['hash_texte'] not in known]
+    if textes:
+        with engine.begin() as conn:
+            conn.execute(TexteExtrait.__table__.insert(), textes)
+        counts['textes_extraits'] = len(textes)
+
+    search_insert = text(f"INSERT INTO {SEARCH_TABLE} (rowid, dossier_id, contenu) VALUES (:rowid, :dossier_id, :contenu)")
+    last_dossier = first_dossier + dossiers - 1
+    for start in range(first_dossier, last_dossier + 1, batch_size):
+        dossier_rows, critere_rows, document_rows, search_rows = [], [], [], []
+        for dossier_id in range(start, min(start + batch_size, last_dossier + 1)):
+            row = dossier_row(rng, f"LT-{dossier_id:09d}")
+            row['id'] = dossier_id
+            dossier_rows.append(row)
+            search_rows.append({'rowid': _search_rowid('dossier', dossier_id), 'dossier_id': dossier_id,
+                                'contenu': '\n'.join(p for p in (row['commentaires'], row['motif_irrecevabilite']) if p)})
+            for critere in itertools.islice(itertools.cycle(CRITERES), criteres_par_dossier):
+                critere_rows.append({'dossier_id': dossier_id, 'critere': critere, 'statut': rng.random() < 0.7,
+                                     'detail': 'Critère vérifié automatiquement', 'date_verification': row['date_analyse']})
+            for _ in range(rng.randint(0, 2 * documents_par_dossier)):
+                texte = rng.choice(pool)
+                document_rows.append({
+                    'id': next_document, 'dossier_id': dossier_id, 'nom_fichier': f"doc_{next_document}.pdf",
+                    'type_document': rng.choice(TYPES_DOCUMENT), 'chemin_fichier': f"uploads/{dossier_id}/doc_{next_document}.pdf",
+                    'taille_fichier': texte['taille_originale'] * 8, 'date_upload': row['date_analyse'],
+                    'hash_texte': texte['hash_texte']
+                })
+                search_rows.append({'rowid': _search_rowid('document', next_document), 'dossier_id': dossier_id,
+                                    'contenu': texte['texte']})
+                next_document += 1
+
+        with engine.begin() as conn:
+            conn.execute(DossierCSPE.__table__.insert(), dossier_rows)
+            if critere_rows:
+                conn.execute(CritereAnalyse.__table__.insert(), critere_rows)
+            if document_rows:
+                conn.execute(Document.__table__.insert(), document_rows)
+            if index_search and db._search_backend:
+                conn.execute(search_insert, search_rows)
+                counts[SEARCH_TABLE] += len(search_rows)
+        counts['dossiers_cspe'] += len(dossier_rows)
+        counts['criteres_analyse'] += len(critere_rows)
+        counts['documents'] += len(document_rows)
+        print(f"\r  {counts['dossiers_cspe']:>12,} / {dossiers:,} dossiers", end='', flush=True)
+    print()
+
+    if engine.dialect.name == 'postgresql':
+        # Identifiants explicites : réaligner les séquences, puis statistiques du
+        # planificateur comme l'autovacuum le ferait en production
+        with engine.begin() as conn:
+            for table in ('dossiers_cspe', 'documents'):
+                conn.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                                  f"(SELECT max(id) FROM {table}))"))
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            conn.execute(text("ANALYZE"))
+    return counts
+
+
+def reset_database(db):
+    """Supprime toutes les tables de l'assistant (index plein texte compris)"""
+    with db.engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {SEARCH_TABLE}"))
+    Base.metadata.drop_all(db.engine)
+
+
+def operations(db, ctx):
+    """
+    Méthodes mesurées : {nom: (catégorie, préparation, appel)}.
+
+    La préparation (non chronométrée) fournit les arguments de l'appel :
+    identifiant tiré au hasard, dossier ajouté pour être supprimé...
+    """
+    rng = ctx['rng']
+    numeros = itertools.count()
+
+    def random_id():
+        return (rng.randint(1, ctx['max_dossier']),)
+
+    def new_dossier():
+        return (dossier_row(rng, f"LT-AJOUT-{os.getpid()}-{next(numeros)}"),)
+
+    def updated_dossier():
+        return ({'id': random_id()[0], 'statut': rng.choice(STATUTS), 'commentaires': rng.choice(OBSERVATIONS)},)
+
+    def new_document():
+        texte = rng.choice(ctx['pool'])
+        return ({'dossier_id': random_id()[0], 'nom_fichier': 'ajout.pdf', 'type_document': 'courrier',
+                 'texte_extrait': texte['texte']},)
+
+    ops = {
+        'get_statistics': ('point', None, db.get_statistics),
+        'get_statistics_periode': ('point', lambda: ({'start': f"{ctx['annee']}-01-01", 'end': f"{ctx['annee']}-06-30"},),
+                                   db.get_statistics),
+        'get_activity_stats': ('point', None, db.get_activity_stats),
+        'get_amount_stats': ('point', None, db.get_amount_stats),
+        'get_monthly_stats': ('point', lambda: (ctx['annee'],), db.get_monthly_stats),
+        'list_dossiers': ('point', None, lambda: db.list_dossiers(limit=50)),
+        'list_dossiers_filtre': ('point', lambda: ({'statut': rng.choice(STATUTS), 'activite': rng.choice(ACTIVITES)},),
+                                 lambda filters: db.list_dossiers(filters=filters, limit=50)),
+        'list_dossiers_page_profonde': ('point', lambda: (rng.choice(ctx['curseurs']),),
+                                        lambda cursor: db.list_dossiers(limit=50, cursor=cursor)),
+        'get_dossier': ('point', random_id, db.get_dossier),
+        'get_dossier_by_numero': ('point', lambda: (f"LT-{random_id()[0]:09d}",), db.get_dossier_by_numero),
+        'get_document_text': ('point', lambda: (rng.randint(1, ctx['max_document']),), db.get_document_text),
+        'search': ('point', lambda: (rng.choice(TERMES_RECHERCHE),), db.search),
+        'search_page_10': ('point', lambda: (rng.choice(TERMES_RECHERCHE),), lambda query: db.search(query, page=10)),
+        'add_dossier': ('point', new_dossier, db.add_dossier),
+        'add_critere': ('point', lambda: ({'dossier_id': random_id()[0], 'critere': rng.choice(CRITERES), 'statut': True,
+                                           'detail': 'Ajout test de charge'},), db.add_critere),
+        'add_document': ('point', new_document, db.add_document),
+        'update_dossier': ('point', updated_dossier, db.update_dossier),
+        'delete_dossier': ('point', lambda: (db.add_dossier(new_dossier()[0]),), db.delete_dossier),
+        'generate_csv_report': ('point', random_id, db.generate_csv_report),
+        'get_system_info': ('lourd', None, db.get_system_info),
+        'get_all_dossiers': ('lourd', None, lambda: db.get_all_dossiers({'statut': 'INSTRUCTION'})),
+        'rebuild_statistics': ('lourd', None, db.rebuild_statistics),
+        'rebuild_search_index': ('lourd', None, db.rebuild_search_index),
+        'migrate_document_texts': ('lourd', None, db.migrate_document_texts),
+        'purge_orphan_texts': ('lourd', None, db.purge_orphan_texts),
+        'generate_global_report': ('lourd', None, lambda: db.generate_global_report('csv')),
+        'backup_database': ('lourd', None, lambda: ctx['sauvegardes'].append(db.backup_database('sauvegardes', keep=2))
+                            or ctx['sauvegardes'][-1]),
+        'verify_backup': ('lourd', lambda: (ctx['sauvegardes'][-1] if ctx['sauvegardes'] else None,), db.verify_backup),
+    }
+    if FPDF_AVAILABLE:
+        ops['generate_pdf_report'] = ('point', random_id, db.generate_pdf_report)
+    if PYARROW_AVAILABLE:
+        ops['export_analytics'] = ('lourd', None, lambda: db.export_analytics('export_analytique', incremental=False))
+    return ops
+
+
+def latency_summary(latencies, errors):
+    """Percentiles de latence en millisecondes"""
+    return {
+        'operations': len(latencies),
+        'moyenne_ms': round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+        'p50_ms': round(_percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(_percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(_percentile(latencies, 99) * 1000, 3),
+        'max_ms': round(max(latencies, default=0.0) * 1000, 3),
+        'erreurs': errors
+    }
+
+
+def measure_operations(ops, recorder, repeat, heavy_repeat):
+    """Chronomètre chaque opération ; un résultat None ou une exception compte comme erreur"""
+    results = {}
+    for name, (category, prepare, call) in ops.items():
+        latencies, errors = [], 0
+        for _ in range(repeat if category == 'point' else heavy_repeat):
+            args = prepare() if prepare else ()
+            recorder.operation = name
+            t0 = time.perf_counter()
+            try:
+                result = call(*args)
+            except Exception as e:
+                print(f"  {name}: {e}")
+                result = None
+            latencies.append(time.perf_counter() - t0)
+            recorder.operation = None
+            errors += result is None
+        results[name] = dict(categorie=category, **latency_summary(latencies, errors))
+        metrics = results[name]
+        print(f"  {name:30s} {metrics['operations']:>5d}  p50={metrics['p50_ms']:>10.2f}ms  "
+              f"p95={metrics['p95_ms']:>10.2f}ms  p99={metrics['p99_ms']:>10.2f}ms  erreurs={errors}")
+    return results
+
+
+def _mixed_reader(db_url, tuning, duration, max_dossier, start_event, queue):
+    """Lecteur type page Streamlit : statistiques, première page de l'historique, dossier ponctuel"""
+    db = DatabaseManager(db_url, tuning=tuning)
+    rng = random.Random(os.getpid())
+    reads = (db.get_statistics, lambda: db.list_dossiers(limit=50), lambda: db.get_dossier(rng.randint(1, max_dossier)))
+    latencies, errors = [], 0
+    start_event.wait()
+    deadline = time.perf_counter() + duration
+    for read in itertools.cycle(reads):
+        if time.perf_counter() >= deadline:
+            break
+        t0 = time.perf_counter()
+        result = read()
+        latencies.append(time.perf_counter() - t0)
+        errors += not result
+    queue.put(('reader', latencies, errors))
+
+
+def run_concurrency(db_url, tuning, duration, readers, writers, max_dossier):
+    """Écrivains et lecteurs simultanés sur la base chargée"""
+    ctx = mp.get_context('spawn')
+    queue = ctx.Queue()
+    start_event = ctx.Event()
+    procs = [ctx.Process(target=_writer, args=(db_url, tuning, duration, start_event, queue)) for _ in range(writers)]
+    procs += [ctx.Process(target=_mixed_reader, args=(db_url, tuning, duration, max_dossier, start_event, queue))
+              for _ in range(readers)]
+    for p in procs:
+        p.start()
+    time.sleep(1.0)  # laisser les processus initialiser leur moteur
+    start_event.set()
+
+    collected = {'writer': ([], 0), 'reader': ([], 0)}
+    for _ in procs:
+        role, latencies, errors = queue.get()
+        all_latencies, all_errors = collected[role]
+        collected[role] = (all_latencies + latencies, all_errors + errors)
+    for p in procs:
+        p.join()
+
+    result = {}
+    for role, (latencies, errors) in collected.items():
+        result[role] = dict(ops_par_seconde=round(len(latencies) / duration, 1), **latency_summary(latencies, errors))
+        print(f"  {role:7s} {result[role]['ops_par_seconde']:>8.1f} op/s  p50={result[role]['p50_ms']:.2f}ms  "
+              f"p95={result[role]['p95_ms']:.2f}ms  p99={result[role]['p99_ms']:.2f}ms  erreurs={errors}")
+    return result
+
+
+def parse_args():
+    """Parse les arguments de ligne de commande."""
+    parser = argparse.ArgumentParser(description="Test de charge de DatabaseManager")
+    parser.add_argument('--dossiers', type=int, default=1_000_000, help="Dossiers à générer")
+    parser.add_argument('--criteres-par-dossier', type=int, default=4, help="Critères par dossier")
+    parser.add_argument('--documents-par-dossier', type=int, default=2, help="Documents par dossier (moyenne)")
+    parser.add_argument('--textes-distincts', type=int, default=2000, help="Textes extraits distincts (dédupliqués)")
+    parser.add_argument('--sans-index', action='store_true', help="Ne pas remplir l'index plein texte")
+    parser.add_argument('--batch-size', type=int, default=20000, help="Dossiers insérés par transaction")
+    parser.add_argument('--db-url', type=str, default=None, help="Base cible (défaut : SQLite dans --workdir)")
+    parser.add_argument('--workdir', type=str, default=None, help="Répertoire de travail conservé (défaut : temporaire)")
+    parser.add_argument('--reuse', action='store_true', help="Mesurer la base existante sans générer de données")
+    parser.add_argument('--reset', action='store_true', help="Supprimer les tables existantes avant génération")
+    parser.add_argument('--sans-profil', action='store_true', help="Sans profil de stockage (PRAGMA, pool)")
+    parser.add_argument('--repeat', type=int, default=100, help="Répétitions des opérations ponctuelles")
+    parser.add_argument('--heavy-repeat', type=int, default=1, help="Répétitions des opérations lourdes")
+    parser.add_argument('--skip', type=str, default='', help="Opérations à ignorer, séparées par des virgules")
+    parser.add_argument('--duration', type=float, default=10.0, help="Durée du scénario concurrent (0 = ignoré)")
+    parser.add_argument('--readers', type=int, default=4, help="Processus lecteurs")
+    parser.add_argument('--writers', type=int, default=1, help="Processus écrivains")
+    parser.add_argument('--explain', type=int, default=5, help="Plans d'exécution des N requêtes les plus lentes")
+    parser.add_argument('--seed', type=int, default=42, help="Graine de génération")
+    parser.add_argument('--output', type=str, default=None, help="Fichier JSON de résultats")
+    return parser.parse_args()
+
+
+def main():
+    """Fonction principale."""
+    args = parse_args()
+    output = os.path.abspath(args.output) if args.output else None
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        workdir = Path(args.workdir or tmp_dir).resolve()
+        workdir.mkdir(parents=True, exist_ok=True)
+        db_url = args.db_url or f"sqlite:///{workdir / 'charge.db'}"
+        # Les rapports et sauvegardes sont écrits dans le répertoire courant
+        os.chdir(workdir)
+        return run(args, db_url, output)
+
+
+def run(args, db_url, output):
+    """Génère, mesure et écrit le rapport"""
+    tuning = not args.sans_profil
+    db = DatabaseManager(db_url, tuning=tuning)
+    with db.engine.connect() as conn:
+        existing = db.engine.dialect.has_table(conn, DossierCSPE.__tablename__) and \
+            conn.execute(func.count(DossierCSPE.id).select()).scalar()
+    if existing and not (args.reuse or args.reset):
+        print(f"Erreur: la base contient déjà {existing:,} dossiers (--reuse pour la mesurer, --reset pour la vider)")
+        return 2
+    if existing and args.reset:
+        reset_database(db)
+    db.init_db()
+
+    report = {
+        'date': datetime.now().isoformat(),
+        'commit': current_commit(),
+        'backend': db.engine.dialect.name,
+        'parametres': vars(args),
+        'generation': None
+    }
+    pool = text_pool(args.textes_distincts, args.seed)
+    if not args.reuse:
+        print(f"\nGénération de {args.dossiers:,} dossiers ({db.engine.dialect.name})...")
+        t0 = time.perf_counter()
+        counts = generate(db, args.dossiers, args.criteres_par_dossier, args.documents_par_dossier, pool,
+                          args.batch_size, not args.sans_index, args.seed)
+        seconds = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        db.rebuild_statistics()  # ce que ferait init_db sur une base sans agrégats
+        report['generation'] = {
+            'lignes': counts,
+            'secondes': round(seconds, 1),
+            'dossiers_par_seconde': round(counts['dossiers_cspe'] / seconds, 1),
+            'agregats_secondes': round(time.perf_counter() - t0, 1)
+        }
+        print(f"  {seconds:.1f}s ({report['generation']['dossiers_par_seconde']:,.0f} dossiers/s), "
+              f"agrégats {report['generation']['agregats_secondes']}s")
+
+    rng = random.Random(args.seed)
+    session = db.Session()
+    try:
+        max_dossier = session.query(func.max(DossierCSPE.id)).scalar() or 1
+        max_document = session.query(func.max(Document.id)).scalar() or 1
+        sample = [rng.randint(1, max_dossier) for _ in range(50)]
+        curseurs = [_encode_cursor(d, i) for i, d in session.query(DossierCSPE.id, DossierCSPE.date_analyse)
+                    .filter(DossierCSPE.id.in_(sample), DossierCSPE.date_analyse.isnot(None))]
+    finally:
+        session.close()
+    ctx = {'rng': rng, 'pool': pool, 'max_dossier': max_dossier, 'max_document': max_document,
+           'curseurs': curseurs or [None], 'annee': datetime.now().year - 1, 'sauvegardes': []}
+
+    skip = {name.strip() for name in args.skip.split(',') if name.strip()}
+    ops = {name: op for name, op in operations(db, ctx).items() if name not in skip}
+    recorder = QueryRecorder(db.engine)
+    print(f"\nOpérations ({max_dossier:,} dossiers, {args.repeat} répétitions ponctuelles)...")
+    report['operations'] = measure_operations(ops, recorder, args.repeat, args.heavy_repeat)
+
+    if args.duration > 0 and (args.readers or args.writers):
+        print(f"\nScénario concurrent ({args.writers} écrivain(s), {args.readers} lecteur(s), {args.duration:.0f}s)...")
+        db.engine.dispose()
+        report['concurrence'] = run_concurrency(db_url, tuning, args.duration, args.readers, args.writers, max_dossier)
+
+    report['plans'] = []
+    if args.explain:
+        print(f"\nPlans des {args.explain} requêtes les plus lentes :")
+    for statement, entry in recorder.slowest(args.explain):
+        try:
+            plan = explain(db.engine, statement, entry['parametres'])
+        except Exception as e:
+            plan = [f"EXPLAIN impossible : {e}"]
+        report['plans'].append({
+            'operation': entry['operation'],
+            'max_ms': round(entry['max_s'] * 1000, 3),
+            'executions': entry['executions'],
+            'total_ms': round(entry['total_s'] * 1000, 3),
+            'requete': ' '.join(statement.split()),
+            'parametres': repr(entry['parametres']),
+            'plan': plan
+        })
+        print(f"\n  [{entry['operation']}] {entry['max_s'] * 1000:.2f}ms max, {entry['executions']} exécution(s)")
+        print(f"  {' '.join(statement.split())[:160]}")
+        for line in plan:
+            print(f"    {line}")
+
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+        print(f"\nRésultats écrits dans {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
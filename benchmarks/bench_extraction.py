@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Suite de benchmarks de l'extraction d'entités et des critères CSPE.
+
+Mesure, sur des entrées allant des courriers de test_cases/ (~1 Ko chacun)
+jusqu'à des liasses synthétiques de 10 Mo générées à partir de ces modèles :
+
+- micro : SmartEntityExtractor.extract_dates / extract_amounts et chaque
+  méthode DocumentProcessor.check_* ;
+- macro : CSPEDocumentProcessor.extract_document_info et
+  CSPEExpertAnalyzer.analyze_file (lecture du fichier comprise).
+
+Les liasses ne répètent pas le même texte : dates et montants de chaque
+courrier sont tirés à nouveau (graine fixe), pour que les caches ne
+faussent pas la mesure. Les résultats sont écrits en JSON (avec le commit
+mesuré) ; --compare relit un résultat précédent et signale les
+régressions au-delà d'un seuil, avec un code de sortie non nul.
+
+Exemples d'utilisation:
+    python benchmarks/bench_extraction.py --output bench_extraction.json
+    python benchmarks/bench_extraction.py --sizes 100k,1m --filter check_ --compare bench_extraction.json
+"""
+
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from pathlib import Path
+from datetime import datetime, timedelta
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'src'))
+sys.path.insert(0, str(ROOT))
+
+from document_processor import DocumentProcessor, SmartEntityExtractor
+from processing.document_processor import CSPEDocumentProcessor
+from models.expert_analyzer import CSPEExpertAnalyzer
+
+DATE_RE = re.compile(r'\b(\d{1,2})/(\d{1,2})/(\d{4})\b')
+AMOUNT_RE = re.compile(r'\b\d{1,3}(?: \d{3})*,\d{2}\b')
+SIZE_SUFFIXES = {'k': 1_000, 'm': 1_000_000}
+
+
+def load_letters(directory):
+    """Courriers de test_cases/ : liste de (nom, texte)"""
+    return [(f"{path.parent.name}/{path.name}", path.read_text(encoding='utf-8'))
+            for path in sorted(Path(directory).glob('*/*.txt'))]
+
+
+def parse_size(label):
+    """'100k' -> 100000, '10m' -> 10000000"""
+    label = label.strip().lower()
+    if label[-1:] in SIZE_SUFFIXES:
+        return int(float(label[:-1]) * SIZE_SUFFIXES[label[-1]])
+    return int(label)
+
+
+def _vary(text, rng):
+    """Nouvelle variante d'un courrier : dates décalées, montants tirés à nouveau"""
+    shift = timedelta(days=rng.randint(-365, 365))
+
+    def shift_date(match):
+        try:
+            value = datetime(int(match.group(3)), int(match.group(2)), int(match.group(1))) + shift
+        except ValueError:
+            return match.group()
+        return value.strftime('%d/%m/%Y')
+
+    def new_amount(match):
+        return f"{rng.randint(10, 999_999):,}".replace(',', ' ') + f",{rng.randint(0, 99):02d}"
+
+    return AMOUNT_RE.sub(new_amount, DATE_RE.sub(shift_date, text))
+
+
+def build_bundle(letters, size, seed=42):
+    """Liasse synthétique d'environ `size` octets UTF-8 construite à partir des courriers"""
+    rng = random.Random(seed)
+    parts, total = [], 0
+    while total < size:
+        _, text = rng.choice(letters)
+        part = _vary(text, rng) + "\n\n"
+        parts.append(part)
+        total += len(part.encode('utf-8'))
+    return "".join(parts)
+
+
+def build_inputs(letters, sizes, workdir):
+    """Entrées nommées : {nom: (textes, chemins)} écrites aussi sur disque pour analyze_file"""
+    inputs = {'lettres': [text for _, text in letters]}
+    for label in sizes:
+        inputs[label] = [build_bundle(letters, parse_size(label))]
+    files = {}
+    for name, texts in inputs.items():
+        paths = []
+        for i, text in enumerate(texts):
+            path = Path(workdir) / f"{name}_{i:03d}.txt"
+            path.write_text(text, encoding='utf-8')
+            paths.append(str(path))
+        files[name] = paths
+    return {name: (texts, files[name]) for name, texts in inputs.items()}
+
+
+def benchmarks():
+    """Fonctions mesurées : {nom: (catégorie, fonction(texte, chemin))}"""
+    extractor = SmartEntityExtractor()
+    processor = DocumentProcessor()
+    cspe_processor = CSPEDocumentProcessor()
+    analyzer = CSPEExpertAnalyzer()
+    return {
+        'SmartEntityExtractor.extract_dates': ('micro', lambda text, path: extractor.extract_dates(text)),
+        'SmartEntityExtractor.extract_amounts': ('micro', lambda text, path: extractor.extract_amounts(text)),
+        'DocumentProcessor.check_period': ('micro', lambda text, path: processor.check_period(text)),
+        'DocumentProcessor.check_delay': ('micro', lambda text, path: processor.check_delay(text)),
+        'DocumentProcessor.check_prescription_quadriennale':
+            ('micro', lambda text, path: processor.check_prescription_quadriennale(text)),
+        'DocumentProcessor.check_repercussion_client_final':
+            ('micro', lambda text, path: processor.check_repercussion_client_final(text)),
+        'CSPEDocumentProcessor.extract_document_info':
+            ('macro', lambda text, path: cspe_processor.extract_document_info(text)),
+        'CSPEExpertAnalyzer.analyze_file': ('macro', lambda text, path: analyzer.analyze_file(path)),
+    }
+
+
+def measure(fn, texts, paths, min_time, max_repeat):
+    """
+    Exécute fn sur toutes les entrées, répété jusqu'à `min_time` secondes
+    cumulées (au moins une fois, au plus `max_repeat` fois).
+
+    Returns:
+        Durées de chaque répétition, en secondes
+    """
+    timings, elapsed = [], 0.0
+    while not timings or (elapsed < min_time and len(timings) < max_repeat):
+        t0 = time.perf_counter()
+        for text, path in zip(texts, paths):
+            fn(text, path)
+        duration = time.perf_counter() - t0
+        timings.append(duration)
+        elapsed += duration
+    return timings
+
+
+def run_suite(inputs, selected, min_time, max_repeat):
+    """Mesure chaque fonction sélectionnée sur chaque entrée"""
+    results = {}
+    for name, (category, fn) in selected.items():
+        results[name] = {'categorie': category, 'entrees': {}}
+        for input_name, (texts, paths) in inputs.items():
+            size = sum(len(text.encode('utf-8')) for text in texts)
+            timings = measure(fn, texts, paths, min_time, max_repeat)
+            best = min(timings)
+            results[name]['entrees'][input_name] = {
+                'octets': size,
+                'documents': len(texts),
+                'repetitions': len(timings),
+                'meilleur_s': round(best, 6),
+                'median_s': round(statistics.median(timings), 6),
+                'mo_par_seconde': round(size / 1e6 / best, 3) if best else None
+            }
+            print(f"  {name:52s} {input_name:>8s} {best * 1000:>10.2f} ms  "
+                  f"{results[name]['entrees'][input_name]['mo_par_seconde']:>8} Mo/s  ({len(timings)} rép.)")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare les meilleurs temps avec un résultat précédent.
+
+    Returns:
+        Liste des régressions (fonction, entrée, ratio) au-delà du seuil
+    """
+    regressions = []
+    print(f"\nComparaison avec {baseline.get('commit') or 'la référence'} (seuil +{threshold:.0%})")
+    for name, result in results.items():
+        previous = baseline.get('resultats', {}).get(name, {}).get('entrees', {})
+        for input_name, metrics in result['entrees'].items():
+            reference = previous.get(input_name)
+            if not reference or not reference.get('meilleur_s'):
+                continue
+            ratio = metrics['meilleur_s'] / reference['meilleur_s']
+            marker = ''
+            if ratio > 1 + threshold:
+                regressions.append((name, input_name, round(ratio, 3)))
+                marker = '  <- régression'
+            print(f"  {name:52s} {input_name:>8s}  x{ratio:.2f}{marker}")
+    return regressions
+
+
+def current_commit():
+    """Commit mesuré (None hors dépôt git)"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=str(ROOT),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args():
+    """Parse les arguments de ligne de commande."""
+    parser = argparse.ArgumentParser(description="Benchmarks de l'extraction et des critères CSPE")
+    parser.add_argument('--cases', type=str, default=str(ROOT / 'test_cases'), help="Répertoire des courriers modèles")
+    parser.add_argument('--sizes', type=str, default='100k,1m,10m', help="Tailles des liasses synthétiques")
+    parser.add_argument('--filter', type=str, default=None, help="Ne mesure que les fonctions dont le nom contient ce texte")
+    parser.add_argument('--min-time', type=float, default=1.0, help="Durée cumulée minimale par mesure (secondes)")
+    parser.add_argument('--max-repeat', type=int, default=1000, help="Nombre maximal de répétitions par mesure")
+    parser.add_argument('--output', type=str, default=None, help="Fichier JSON de résultats")
+    parser.add_argument('--compare', type=str, default=None, help="Résultat JSON précédent à comparer")
+    parser.add_argument('--threshold', type=float, default=0.10, help="Ralentissement toléré avant régression (0.10 = +10%%)")
+    return parser.parse_args()
+
+
+def main():
+    """Fonction principale."""
+    args = parse_args()
+    letters = load_letters(args.cases)
+    if not letters:
+        print(f"Erreur: aucun courrier trouvé dans {args.cases}")
+        return 2
+    sizes = [label for label in args.sizes.split(',') if label.strip()]
+    selected = {name: bench for name, bench in benchmarks().items()
+                if not args.filter or args.filter in name}
+
+    with tempfile.TemporaryDirectory() as workdir:
+        inputs = build_inputs(letters, sizes, workdir)
+        print(f"\n{len(letters)} courriers modèles, liasses : {', '.join(sizes) or 'aucune'}")
+        results = run_suite(inputs, selected, args.min_time, args.max_repeat)
+
+    report = {
+        'date': datetime.now().isoformat(),
+        'commit': current_commit(),
+        'python': platform.python_version(),
+        'plateforme': platform.platform(),
+        'parametres': vars(args),
+        'resultats': results
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nRésultats écrits dans {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} régression(s) détectée(s)")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
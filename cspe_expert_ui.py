@@ -5,11 +5,12 @@ import json
 import re
 import requests
 import tempfile
-import pandas as pd
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 from document_processor import DocumentProcessor
+from src.processing.text_extraction import ExtractionError
+from src.ui.streamlit_cache import MAX_ENTRIES, upload_text
 from database_memory import DatabaseManager, DossierCSPE, CritereAnalyse
 
 # Configuration de la page
@@ -129,7 +130,37 @@ def load_css():
     """, unsafe_allow_html=True)
 
 # Fonctions utilitaires existantes
-# ... (les fonctions existantes comme load_cspe_expert_prompt, load_env_safe, extract_metadata_suggestions, etc.)
+# ... (les fonctions existantes comme load_cspe_expert_prompt, load_env_safe, etc.)
+
+ACTIVITES_CONNUES = ['Industrie', 'Commerce', 'Agriculture', 'Hôtellerie', 'Santé', 'Transport', 'Collectivité']
+
+@st.cache_resource
+def get_processor() -> DocumentProcessor:
+    """Processeur de documents partagé entre sessions et réexécutions"""
+    return DocumentProcessor()
+
+@st.cache_resource
+def get_database(db_url: str) -> DatabaseManager:
+    """Base partagée entre sessions et réexécutions : un seul moteur (et pool), initialisé une fois"""
+    db = DatabaseManager(db_url)
+    db.init_db()
+    return db
+
+@st.cache_data(max_entries=MAX_ENTRIES, show_spinner=False)
+def extract_metadata_suggestions(text: str) -> Dict[str, Any]:
+    """Suggestions de métadonnées (numéro, demandeur, activité, période) tirées des pièces"""
+    numero = re.search(r'(?:dossier|requête|réclamation)\s*(?:n[°o]\.?)?\s*:?\s*([A-Z0-9][A-Z0-9/_-]{3,})', text, re.IGNORECASE)
+    demandeur = re.search(r'(?:demandeur|requérant|raison sociale)\s*:\s*([^\n]{2,80})', text, re.IGNORECASE)
+    text_lower = text.lower()
+    activite = next((a for a in ACTIVITES_CONNUES if a.lower() in text_lower), "")
+    annees = sorted({int(a) for a in re.findall(r'\b(2009|201[0-5])\b', text)})
+    return {
+        'numero_dossier': numero.group(1) if numero else "",
+        'demandeur': demandeur.group(1).strip() if demandeur else "",
+        'activite': activite,
+        'periode_debut': annees[0] if annees else 2009,
+        'periode_fin': annees[-1] if annees else 2015
+    }
 
 def display_expert_header():
     """Affiche l'en-tête de l'application avec le style moderne"""
@@ -265,10 +296,15 @@ def display_analysis_page(processor):
             for file in uploaded_files:
                 st.write(f"• **{file.name}** ({file.size / 1024:.1f} KB)")
         
-        # Extraction des métadonnées suggérées
+        # Extraction des métadonnées suggérées (mise en cache : les interactions
+        # avec le formulaire ne relancent pas l'extraction)
         combined_text = ""
         for file in uploaded_files:
-            text = processor.extract_text_from_file(file)
+            try:
+                text = upload_text(file)
+            except ExtractionError as e:
+                st.warning(f"Texte non extrait de {file.name} : {e}")
+                text = ""
             combined_text += f"\n=== DOCUMENT: {file.name} ===\n{text}\n"
         
         suggestions = extract_metadata_suggestions(combined_text)
@@ -337,13 +373,67 @@ def display_analysis_page(processor):
                     st.session_state['analysis_started'] = True
                     st.rerun()
 
+def display_history_page(db):
+    """Affiche l'historique des analyses, page par page"""
+    st.title("📊 Historique des Analyses")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        statut = st.selectbox("Statut", ["Tous", "RECEVABLE", "IRRECEVABLE", "INSTRUCTION"])
+    with col2:
+        activite = st.text_input("Activité", placeholder="Toutes")
+    with col3:
+        periode = st.date_input("Période d'analyse", value=())
+    
+    filters = {}
+    if statut != "Tous":
+        filters['statut'] = statut
+    if activite:
+        filters['activite'] = activite
+    if len(periode) == 2:
+        filters['date_debut'] = datetime.combine(periode[0], datetime.min.time())
+        filters['date_fin'] = datetime.combine(periode[1], datetime.max.time())
+    
+    # Pile des curseurs : revenir en arrière sans relire les pages précédentes
+    filters_key = repr(sorted(filters.items()))
+    if st.session_state.get('history_filters') != filters_key:
+        st.session_state['history_filters'] = filters_key
+        st.session_state['history_cursors'] = [None]
+    cursors = st.session_state['history_cursors']
+    
+    page = db.list_dossiers(
+        filters=filters,
+        columns=['numero_dossier', 'demandeur', 'activite', 'statut', 'montant_reclame', 'confiance_analyse'],
+        limit=25,
+        cursor=cursors[-1]
+    )
+    
+    if not page['dossiers']:
+        st.info("Aucun dossier ne correspond aux critères")
+        return
+    
+    import pandas as pd
+    st.dataframe(pd.DataFrame(page['dossiers']), use_container_width=True, hide_index=True)
+    
+    col_prev, col_page, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        if st.button("⬅️ Page précédente", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+    with col_page:
+        st.caption(f"Page {len(cursors)}")
+    with col_next:
+        if st.button("Page suivante ➡️", disabled=page['next_cursor'] is None):
+            cursors.append(page['next_cursor'])
+            st.rerun()
+
 def main():
     # Charger le CSS personnalisé
     load_css()
     
     # Initialiser le processeur de documents
     try:
-        processor = DocumentProcessor()
+        processor = get_processor()
     except Exception as e:
         st.error(f"Erreur d'initialisation du processeur de documents: {e}")
         return
@@ -360,8 +450,7 @@ def main():
     elif page == "📝 Analyse Experte":
         display_analysis_page(processor)
     elif page == "📊 Historique":
-        st.title("📊 Historique des Analyses")
-        st.info("Fonctionnalité à venir - En cours de développement")
+        display_history_page(get_database(os.getenv("DATABASE_URL", "sqlite:///cspe_local.db")))
     elif page == "⚙️ Paramètres":
         st.title("⚙️ Paramètres")
         st.info("Configuration des paramètres - En cours de développement")
@@ -4,7 +4,8 @@ import json
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 from datetime import datetime
-import tempfile
+
+from src.ui.streamlit_jobs import show_job, submit_uploads
 
 # Configuration de la page
 st.set_page_config(
@@ -139,6 +140,10 @@ class CSPEAnalyzer:
             }
         }
 
+    def analyze_bytes(self, data, filename=None):
+        # Même simulation pour un fichier analysé en mémoire
+        return self.analyze_file(filename)
+
 def display_decision_badge(decision):
     """Affiche un badge de décision stylisé"""
     decision = decision.upper()
@@ -200,34 +205,15 @@ def display_analysis(report):
             with st.expander("📊 Données extraites", expanded=False):
                 st.json(report['extracted_data'], expanded=False)
 
-def process_uploaded_file(uploaded_file, analyzer):
-    """Traite un fichier téléversé et retourne le résultat de l'analyse"""
-    try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=Path(uploaded_file.name).suffix) as tmp_file:
-            tmp_file.write(uploaded_file.getvalue())
-            tmp_path = tmp_file.name
-        
-        try:
-            with st.spinner(f"Analyse de {uploaded_file.name}..."):
-                result = analyzer.analyze_file(tmp_path)
-                return result
-        finally:
-            try:
-                os.unlink(tmp_path)
-            except Exception as e:
-                st.warning(f"Attention : impossible de supprimer le fichier temporaire : {e}")
-    except Exception as e:
-        st.error(f"Erreur lors du traitement du fichier {uploaded_file.name} : {str(e)}")
-    return None
+@st.cache_resource
+def get_analyzer():
+    """Analyseur partagé entre sessions et réexécutions"""
+    return CSPEAnalyzer()
 
 def main():
     # Chargement du CSS
     load_css()
     
-    # Initialisation de l'analyseur
-    if 'analyzer' not in st.session_state:
-        st.session_state.analyzer = CSPEAnalyzer()
-    
     # Barre latérale
     with st.sidebar:
         st.image("https://www.conseil-etat.fr/var/ce/storage/static-assets/logo-marianne/logo-marianne.svg", 
@@ -306,51 +292,11 @@ def main():
             st.warning("Veuillez d'abord sélectionner au moins un fichier à analyser.")
             return
             
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        # Traitement de chaque fichier
-        results = []
-        for i, uploaded_file in enumerate(uploaded_files):
-            progress = int((i / len(uploaded_files)) * 100)
-            progress_bar.progress(progress)
-            status_text.text(f"Traitement en cours : {i+1}/{len(uploaded_files)} - {uploaded_file.name}")
-            
-            with st.expander(f"📄 {uploaded_file.name}", expanded=True):
-                result = process_uploaded_file(uploaded_file, st.session_state.analyzer)
-                
-                if result:
-                    results.append((uploaded_file.name, result))
-                    display_analysis(result)
-                    
-                    # Bouton de téléchargement
-                    json_report = json.dumps(result, indent=2, ensure_ascii=False)
-                    st.download_button(
-                        label=f"💾 Télécharger le rapport d'analyse",
-                        data=json_report,
-                        file_name=f"rapport_cspe_{Path(uploaded_file.name).stem}.json",
-                        mime="application/json",
-                        key=f"dl_{uploaded_file.name}"
-                    )
-                
-                st.divider()
-        
-        # Réinitialisation de la barre de progression
-        progress_bar.empty()
-        status_text.empty()
-        
-        if results:
-            st.success(f"✅ Analyse terminée pour {len(results)} fichier(s) !")
-            
-            # Téléchargement de tous les rapports
-            if len(results) > 1:
-                all_reports = {name: result for name, result in results}
-                st.download_button(
-                    label="📥 Télécharger tous les rapports (JSON)",
-                    data=json.dumps(all_reports, indent=2, ensure_ascii=False),
-                    file_name=f"rapports_cspe_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-                    mime="application/json"
-                )
+        # Analyse en arrière-plan : la page reste réactive et le travail
+        # est retrouvé après un rafraîchissement (identifiant dans l'URL)
+        submit_uploads(uploaded_files, get_analyzer())
+    
+    show_job(get_analyzer(), display_analysis)
 
 if __name__ == "__main__":
     main()
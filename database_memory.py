@@ -1,18 +1,31 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, Date, DateTime, Boolean, ForeignKey, ARRAY, func, Text
+from sqlalchemy import create_engine, event, inspect, text, tuple_, and_, or_, case, Index, Column, Integer, String, Float, Date, DateTime, Boolean, ForeignKey, ARRAY, func, Text, LargeBinary, cast, extract
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
-from datetime import datetime
-import pandas as pd
+from sqlalchemy.orm import sessionmaker, relationship, deferred, foreign
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, timedelta
 import os
+import re
 import json
+import hashlib
+import zlib
+import uuid
+import importlib.util
 
-# Essayer d'importer FPDF, avec fallback si non disponible
+# pandas, FPDF et PyArrow ne servent qu'aux rapports et à l'export analytique :
+# ils sont importés à la première utilisation, pas au chargement du module
+FPDF_AVAILABLE = importlib.util.find_spec('fpdf') is not None
+if not FPDF_AVAILABLE:
+    print("Warning: FPDF non disponible - fonctionnalité PDF désactivée")
+
+# PyArrow pour l'export analytique (Parquet)
+PYARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+# Compression zstd pour le stockage des textes extraits (zlib en repli)
 try:
-    from fpdf import FPDF
-    FPDF_AVAILABLE = True
+    import zstandard
+    ZSTD_AVAILABLE = True
 except ImportError:
-    FPDF_AVAILABLE = False
-    print("Warning: FPDF non disponible - fonctionnalité PDF désactivée")
+    ZSTD_AVAILABLE = False
 
 Base = declarative_base()
 
@@ -35,6 +48,14 @@ class DossierCSPE(Base):
     documents_joints = Column(Text)  # JSON string au lieu de ARRAY pour compatibilité
     commentaires = Column(Text)
 
+    # Index composites pour la pagination par curseur (date_analyse, id) et les filtres de l'historique
+    __table_args__ = (
+        Index('idx_dossiers_date_id', 'date_analyse', 'id'),
+        Index('idx_dossiers_statut_date_id', 'statut', 'date_analyse', 'id'),
+        Index('idx_dossiers_activite_date_id', 'activite', 'date_analyse', 'id'),
+        Index('idx_dossiers_statut_activite_date_id', 'statut', 'activite', 'date_analyse', 'id'),
+    )
+
 class CritereAnalyse(Base):
     __tablename__ = 'criteres_analyse'
     
@@ -57,30 +78,489 @@ class Document(Base):
     chemin_fichier = Column(String(500))
     taille_fichier = Column(Integer)
     date_upload = Column(DateTime, default=datetime.utcnow)
-    texte_extrait = Column(Text)
-    hash_fichier = Column(String(64))
+    texte_extrait = deferred(Column(Text))  # Ancien stockage en ligne, remplacé par textes_extraits
+    hash_fichier = Column(String(64), index=True)
+    hash_texte = Column(String(64), index=True)  # Clé du texte dans textes_extraits (SHA-256 du texte)
     
     dossier = relationship("DossierCSPE", back_populates="documents")
 
+    @property
+    def texte(self):
+        """Texte extrait, chargé depuis le stockage hors ligne au premier accès"""
+        if self.texte_stocke is not None:
+            return self.texte_stocke.texte
+        return self.texte_extrait
+
+class TexteExtrait(Base):
+    """Texte extrait compressé, adressé par contenu et partagé entre documents identiques"""
+    __tablename__ = 'textes_extraits'
+    
+    hash_texte = Column(String(64), primary_key=True)
+    compression = Column(String(10))  # zstd ou zlib
+    taille_originale = Column(Integer)
+    contenu = Column(LargeBinary)
+    date_creation = Column(DateTime, default=datetime.utcnow)
+
+    @property
+    def texte(self):
+        """Texte décompressé"""
+        return _decompress_text(self.contenu, self.compression)
+
+class StatistiqueJournaliere(Base):
+    """Agrégat des dossiers par jour d'analyse × statut × activité × tranche de montant"""
+    __tablename__ = 'statistiques_journalieres'
+    
+    jour = Column(Date, primary_key=True)
+    statut = Column(String(20), primary_key=True)
+    activite = Column(String(255), primary_key=True)
+    tranche_montant = Column(String(20), primary_key=True)
+    nombre = Column(Integer, default=0)
+    montant_total = Column(Float, default=0.0)
+
 # Établir les relations
 DossierCSPE.criteres = relationship("CritereAnalyse", order_by=CritereAnalyse.id, back_populates="dossier", cascade="all, delete-orphan")
 DossierCSPE.documents = relationship("Document", order_by=Document.id, back_populates="dossier", cascade="all, delete-orphan")
+Document.texte_stocke = relationship(
+    "TexteExtrait",
+    primaryjoin=foreign(Document.hash_texte) == TexteExtrait.hash_texte,
+    viewonly=True,
+    lazy="select"
+)
+
+def _compress_text(text):
+    """Compresse un texte (zstd si disponible, sinon zlib)"""
+    data = text.encode('utf-8')
+    if ZSTD_AVAILABLE:
+        return zstandard.ZstdCompressor(level=6).compress(data), 'zstd'
+    return zlib.compress(data, 6), 'zlib'
+
+def _decompress_text(data, compression):
+    """Décompresse un texte stocké dans textes_extraits"""
+    if data is None:
+        return None
+    if compression == 'zstd':
+        if not ZSTD_AVAILABLE:
+            raise ImportError("zstandard est requis pour lire ce texte compressé en zstd")
+        return zstandard.ZstdDecompressor().decompress(data).decode('utf-8')
+    return zlib.decompress(data).decode('utf-8')
+
+# Export analytique (Parquet partitionné par année de date_analyse)
+ANALYTICS_TABLES = ('dossiers_cspe', 'criteres_analyse', 'documents')
+ANALYTICS_STATE_FILE = '_export_state.json'
+
+def _analytics_schemas():
+    """Schémas Arrow typés des jeux de données analytiques"""
+    import pyarrow as pa
+    return {
+        'dossiers_cspe': pa.schema([
+            ('id', pa.int64()),
+            ('numero_dossier', pa.string()),
+            ('demandeur', pa.string()),
+            ('activite', pa.dictionary(pa.int32(), pa.string())),
+            ('date_reclamation', pa.date32()),
+            ('periode_debut', pa.int16()),
+            ('periode_fin', pa.int16()),
+            ('montant_reclame', pa.float64()),
+            ('statut', pa.dictionary(pa.int8(), pa.string())),
+            ('motif_irrecevabilite', pa.string()),
+            ('confiance_analyse', pa.float64()),
+            ('date_analyse', pa.timestamp('us')),
+            ('analyste', pa.dictionary(pa.int32(), pa.string())),
+            ('documents_joints', pa.list_(pa.string())),
+            ('commentaires', pa.string()),
+            ('annee', pa.int32()),
+        ]),
+        'criteres_analyse': pa.schema([
+            ('id', pa.int64()),
+            ('dossier_id', pa.int64()),
+            ('critere', pa.dictionary(pa.int32(), pa.string())),
+            ('statut', pa.bool_()),
+            ('detail', pa.string()),
+            ('date_verification', pa.timestamp('us')),
+            ('annee', pa.int32()),
+        ]),
+        'documents': pa.schema([
+            ('id', pa.int64()),
+            ('dossier_id', pa.int64()),
+            ('nom_fichier', pa.string()),
+            ('type_document', pa.dictionary(pa.int32(), pa.string())),
+            ('chemin_fichier', pa.string()),
+            ('taille_fichier', pa.int64()),
+            ('date_upload', pa.timestamp('us')),
+            ('hash_fichier', pa.string()),
+            ('annee', pa.int32()),
+        ]),
+    }
+
+def _decode_documents_joints(value):
+    """Convertit la colonne JSON documents_joints en liste de chaînes"""
+    if not value:
+        return None
+    try:
+        decoded = json.loads(value)
+    except (TypeError, ValueError):
+        return [value]
+    return [str(item) for item in decoded] if isinstance(decoded, list) else [str(decoded)]
+
+def _rows_to_record_batch(rows, names, schema):
+    """Construit un RecordBatch Arrow colonne par colonne à partir de lignes SQL"""
+    import pyarrow as pa
+    columns = []
+    for index, name in enumerate(names):
+        values = [row[index] for row in rows]
+        if name == 'documents_joints':
+            values = [_decode_documents_joints(v) for v in values]
+        field_type = schema.field(name).type
+        if pa.types.is_dictionary(field_type):
+            columns.append(pa.array(values, type=field_type.value_type).dictionary_encode().cast(field_type))
+        else:
+            columns.append(pa.array(values, type=field_type))
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+def load_analytics(output_dir, table, columns=None, filter=None):
+    """
+    Charge un jeu de données analytique exporté par export_analytics.
+
+    Seules les colonnes demandées sont lues, et les filtres sur `annee`
+    élaguent les partitions sans ouvrir les autres fichiers.
+
+    Args:
+        output_dir: Répertoire racine de l'export
+        table: 'dossiers_cspe', 'criteres_analyse' ou 'documents'
+        columns: Liste de colonnes à lire (toutes par défaut)
+        filter: Expression pyarrow.dataset optionnelle (ex: pa_ds.field('annee') == 2024)
+
+    Returns:
+        pyarrow.Table (utiliser .to_pandas() côté BI)
+    """
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow est requis pour lire l'export analytique")
+    import pyarrow as pa
+    import pyarrow.dataset as pa_ds
+    if table not in ANALYTICS_TABLES:
+        raise ValueError(f"Table analytique inconnue: {table}")
+    dataset = pa_ds.dataset(
+        os.path.join(output_dir, table),
+        format='parquet',
+        partitioning=pa_ds.partitioning(pa.schema([('annee', pa.int32())]), flavor='hive')
+    )
+    return dataset.to_table(columns=columns, filter=filter)
+
+# Profils de stockage : réglages appliqués selon le backend (surchargeables par variables d'environnement)
+def _env_int(name, default):
+    """Lit un entier depuis l'environnement avec valeur par défaut"""
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+def get_storage_profile(db_url):
+    """
+    Retourne le profil de stockage adapté au backend de db_url.
+
+    Le profil contient les options passées à create_engine ('engine_options')
+    et, pour SQLite, les PRAGMA exécutés à chaque nouvelle connexion
+    ('pragmas'). Le mode WAL permet aux lecteurs (Streamlit) de ne pas être
+    bloqués par l'écrivain (import par lot) sur le même fichier.
+
+    Variables d'environnement reconnues :
+        DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE (PostgreSQL)
+        SQLITE_CACHE_SIZE_KB, SQLITE_MMAP_SIZE_MB, SQLITE_BUSY_TIMEOUT_MS (SQLite)
+    """
+    url = db_url.lower()
+
+    if url.startswith('sqlite'):
+        in_memory = url in ('sqlite://', 'sqlite:///:memory:') or 'mode=memory' in url
+        busy_timeout_ms = _env_int('SQLITE_BUSY_TIMEOUT_MS', 10000)
+        pragmas = {
+            'synchronous': 'NORMAL',
+            'cache_size': -_env_int('SQLITE_CACHE_SIZE_KB', 64000),  # négatif = KiB
+            'mmap_size': _env_int('SQLITE_MMAP_SIZE_MB', 256) * 1024 * 1024,
+            'busy_timeout': busy_timeout_ms,
+            'temp_store': 'MEMORY',
+        }
+        if not in_memory:
+            pragmas = {'journal_mode': 'WAL', **pragmas}
+        return {
+            'backend': 'sqlite',
+            'engine_options': {
+                'connect_args': {'check_same_thread': False, 'timeout': busy_timeout_ms / 1000},
+            },
+            'pragmas': pragmas,
+        }
+
+    if url.startswith('postgresql'):
+        return {
+            'backend': 'postgresql',
+            'engine_options': {
+                'pool_size': _env_int('DB_POOL_SIZE', 5),
+                'max_overflow': _env_int('DB_MAX_OVERFLOW', 10),
+                'pool_timeout': _env_int('DB_POOL_TIMEOUT', 30),
+                'pool_recycle': _env_int('DB_POOL_RECYCLE', 1800),
+                'pool_pre_ping': True,
+                'connect_args': {'application_name': 'cspe_assistant'},
+            },
+            'pragmas': {},
+        }
+
+    return {'backend': url.split(':', 1)[0], 'engine_options': {}, 'pragmas': {}}
+
+def _register_sqlite_pragmas(engine, pragmas):
+    """Exécute les PRAGMA du profil à chaque nouvelle connexion SQLite"""
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+# Recherche plein texte : FTS5 sous SQLite, tsvector + GIN (français) sous PostgreSQL.
+# Une ligne d'index par source ; rowid = id * 2 pour un dossier, id * 2 + 1 pour un document.
+SEARCH_TABLE = 'recherche_plein_texte'
+
+SEARCH_DDL = {
+    'sqlite': [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+        "contenu, dossier_id UNINDEXED, tokenize = 'unicode61 remove_diacritics 2')"
+    ],
+    'postgresql': [
+        f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+        "rowid BIGINT PRIMARY KEY, dossier_id INTEGER NOT NULL, contenu TEXT, "
+        "document TSVECTOR GENERATED ALWAYS AS (to_tsvector('french', coalesce(contenu, ''))) STORED)",
+        f"CREATE INDEX IF NOT EXISTS idx_{SEARCH_TABLE}_document ON {SEARCH_TABLE} USING GIN (document)",
+        f"CREATE INDEX IF NOT EXISTS idx_{SEARCH_TABLE}_dossier ON {SEARCH_TABLE} (dossier_id)",
+    ],
+}
+
+# WITH ... AS MATERIALIZED, utilisé par search sous SQLite
+SQLITE_SEARCH_MIN_VERSION = (3, 35, 0)
+
+def _search_rowid(source, source_id):
+    """Identifiant de ligne d'index pour un dossier ou un document"""
+    return source_id * 2 + (1 if source == 'document' else 0)
+
+def _fts5_query(query):
+    """Convertit une saisie utilisateur en requête FTS5 (termes et \"phrases\" en ET implicite)"""
+    terms = re.findall(r'"[^"]+"|[^\s"]+', query)
+    quoted = ['"' + term.strip('"').replace('"', '""') + '"' for term in terms]
+    return ' '.join(term for term in quoted if term != '""')
+
+def _like_pattern(term):
+    """Motif LIKE contenant term, caractères spéciaux échappés par \\"""
+    return '%' + re.sub(r'([\\%_])', r'\\\1', term) + '%'
+
+def _encode_cursor(date_analyse, dossier_id):
+    """Curseur opaque de pagination (date_analyse, id)"""
+    return f"{date_analyse.isoformat()}|{dossier_id}"
+
+def _decode_cursor(cursor):
+    """Décode un curseur produit par _encode_cursor"""
+    try:
+        date_part, id_part = cursor.rsplit('|', 1)
+        return datetime.fromisoformat(date_part), int(id_part)
+    except (AttributeError, ValueError):
+        raise ValueError(f"Curseur de pagination invalide: {cursor!r}")
+
+# Sauvegardes : manifeste JSON par sauvegarde, blocs compressés partagés en mode incrémental
+BACKUP_MANIFEST_SUFFIX = '.manifest.json'
+BACKUP_BLOCKS_DIR = 'blocs'
+BACKUP_BLOCK_SIZE = 1024 * 1024
+
+def _file_sha256(path):
+    """Empreinte SHA-256 d'un fichier, lu par blocs"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(BACKUP_BLOCK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _backup_manifest_path(backup_path):
+    """Chemin du manifeste associé à une sauvegarde (fichier ou manifeste)"""
+    if backup_path.endswith(BACKUP_MANIFEST_SUFFIX):
+        return backup_path
+    return backup_path + BACKUP_MANIFEST_SUFFIX
+
+def _sqlite_online_backup(source_file, target_file, pages_per_step, pause):
+    """
+    Copie cohérente d'une base SQLite en cours d'utilisation.
+
+    La transaction de lecture ouverte sur la source fige l'instantané : en
+    mode WAL les écrivains continuent sans bloquer ni faire redémarrer la copie.
+    """
+    import sqlite3
+    import time
+    source = sqlite3.connect(f"file:{source_file}?mode=ro", uri=True, isolation_level=None)
+    target = sqlite3.connect(target_file)
+    try:
+        source.execute('BEGIN')
+        source.execute('SELECT count(*) FROM sqlite_master').fetchone()
+        source.backup(target, pages=pages_per_step,
+                      progress=lambda status, remaining, total: time.sleep(pause) if remaining else None)
+        source.execute('COMMIT')
+    finally:
+        target.close()
+        source.close()
+
+def _sqlite_row_counts(db_file):
+    """Nombre de lignes des tables principales d'un fichier SQLite"""
+    import sqlite3
+    conn = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True)
+    try:
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        return {
+            table: conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+            for table in ANALYTICS_TABLES if table in existing
+        }
+    finally:
+        conn.close()
+
+def _store_backup_blocks(snapshot, blocks_dir):
+    """
+    Découpe un instantané en blocs compressés adressés par leur SHA-256.
+
+    Returns:
+        (liste ordonnée des empreintes, nombre de nouveaux blocs écrits)
+    """
+    os.makedirs(blocks_dir, exist_ok=True)
+    hashes, written = [], 0
+    with open(snapshot, 'rb') as f:
+        for chunk in iter(lambda: f.read(BACKUP_BLOCK_SIZE), b''):
+            block_hash = hashlib.sha256(chunk).hexdigest()
+            block_path = os.path.join(blocks_dir, block_hash)
+            if not os.path.exists(block_path):
+                with open(block_path + '.tmp', 'wb') as out:
+                    out.write(zlib.compress(chunk, 6))
+                os.replace(block_path + '.tmp', block_path)
+                written += 1
+            hashes.append(block_hash)
+    return hashes, written
+
+# Agrégats statistiques : tranches identiques à get_amount_stats
+AMOUNT_BUCKETS = ('0-1000€', '1000-5000€', '5000-10000€', '>10000€')
+ROLLUP_UNKNOWN = ''  # valeur des dimensions absentes (clé primaire non nulle)
+ROLLUP_COLUMNS = ('jour', 'statut', 'activite', 'tranche_montant')  # clé primaire des agrégats
+
+def _amount_bucket(montant):
+    """Tranche de montant d'un dossier"""
+    if montant is None:
+        return ROLLUP_UNKNOWN
+    if montant <= 1000:
+        return AMOUNT_BUCKETS[0]
+    if montant <= 5000:
+        return AMOUNT_BUCKETS[1]
+    if montant <= 10000:
+        return AMOUNT_BUCKETS[2]
+    return AMOUNT_BUCKETS[3]
+
+def _rollup_key(dossier):
+    """Clé d'agrégat (jour, statut, activité, tranche) d'un dossier, None sans date"""
+    if dossier.date_analyse is None:
+        return None
+    return (dossier.date_analyse.date(), dossier.statut or ROLLUP_UNKNOWN,
+            dossier.activite or ROLLUP_UNKNOWN, _amount_bucket(dossier.montant_reclame))
+
+def _dialect_insert(session):
+    """insert() du dialecte (clause ON CONFLICT) sous SQLite et PostgreSQL, None pour les autres backends"""
+    dialect = session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return None
+    return insert
+
+def _apply_rollup(session, key, nombre, montant):
+    """
+    Ajoute nombre dossiers et montant à l'agrégat key (valeurs négatives pour retirer).
+
+    L'incrément est fait par la base (INSERT ... ON CONFLICT DO UPDATE sous
+    SQLite et PostgreSQL) et non par lecture puis écriture en Python : deux
+    écrivains concurrents ne perdent ni incrément ni dossier sur une clé
+    créée en même temps.
+    """
+    if key is None:
+        return
+    table = StatistiqueJournaliere.__table__
+    jour, statut, activite, tranche = key
+    values = {'jour': jour, 'statut': statut, 'activite': activite, 'tranche_montant': tranche,
+              'nombre': nombre, 'montant_total': montant or 0.0}
+    insert = _dialect_insert(session)
+    if insert is not None:
+        statement = insert(table).values(**values)
+        session.execute(statement.on_conflict_do_update(
+            index_elements=list(ROLLUP_COLUMNS),
+            set_={'nombre': table.c.nombre + statement.excluded.nombre,
+                  'montant_total': table.c.montant_total + statement.excluded.montant_total}
+        ))
+    else:
+        updated = session.execute(table.update().where(*(table.c[k] == values[k] for k in ROLLUP_COLUMNS)).values(
+            nombre=table.c.nombre + nombre, montant_total=table.c.montant_total + values['montant_total']
+        ))
+        if updated.rowcount == 0:
+            session.execute(table.insert().values(**values))
+    # Agrégat vidé par une suppression ou un changement de clé
+    session.execute(table.delete().where(*(table.c[k] == values[k] for k in ROLLUP_COLUMNS), table.c.nombre <= 0))
 
 class DatabaseManager:
-    def __init__(self, db_url="sqlite:///cspe_assistant.db"):
-        """Initialise le gestionnaire de base de données"""
+    def __init__(self, db_url="sqlite:///cspe_assistant.db", tuning=True):
+        """
+        Initialise le gestionnaire de base de données
+
+        Args:
+            db_url: URL SQLAlchemy de la base
+            tuning: Applique le profil de stockage du backend (pool, PRAGMA SQLite)
+        """
         self.db_url = db_url
-        self.engine = create_engine(db_url, echo=False)
+        self.storage_profile = get_storage_profile(db_url) if tuning else {'backend': None, 'engine_options': {}, 'pragmas': {}}
+        self.engine = create_engine(db_url, echo=False, **self.storage_profile['engine_options'])
+        if self.storage_profile['pragmas']:
+            _register_sqlite_pragmas(self.engine, self.storage_profile['pragmas'])
         self.Session = sessionmaker(bind=self.engine)
+        self._search_name = None
+        self._search_checked = False
         
     def init_db(self):
         """Initialise la base de données en créant toutes les tables"""
         try:
             Base.metadata.create_all(self.engine)
+            self._migrate_text_key()
+            # create_all ne crée pas les index ajoutés depuis sur des tables existantes
+            for table in Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    index.create(self.engine, checkfirst=True)
+            self._create_search_index()
+            # Base existante sans agrégats : les construire une fois
+            session = self.Session()
+            try:
+                needs_rollup = (session.query(StatistiqueJournaliere.jour).first() is None
+                                and session.query(DossierCSPE.id).first() is not None)
+            finally:
+                session.close()
+            if needs_rollup:
+                self.rebuild_statistics()
             print("✅ Base de données initialisée avec succès")
         except Exception as e:
             print(f"❌ Erreur initialisation base: {str(e)}")
     
+    def _migrate_text_key(self):
+        """Ajoute documents.hash_texte aux bases existantes (create_all n'ajoute pas de colonne)"""
+        inspector = inspect(self.engine)
+        document_columns = {column['name'] for column in inspector.get_columns('documents')}
+        text_columns = {column['name'] for column in inspector.get_columns('textes_extraits')}
+        with self.engine.begin() as conn:
+            if 'hash_texte' not in document_columns:
+                conn.execute(text("ALTER TABLE documents ADD COLUMN hash_texte VARCHAR(64)"))
+            if 'hash_fichier' in text_columns:
+                # Textes indexés par documents.hash_fichier : la clé passe dans hash_texte
+                conn.execute(text("ALTER TABLE textes_extraits RENAME COLUMN hash_fichier TO hash_texte"))
+                conn.execute(text(
+                    "UPDATE documents SET hash_texte = hash_fichier "
+                    "WHERE hash_texte IS NULL AND hash_fichier IN (SELECT hash_texte FROM textes_extraits)"
+                ))
+    
     def add_dossier(self, dossier_data):
         """Ajoute un nouveau dossier CSPE"""
         session = self.Session()
@@ -91,6 +571,9 @@ class DatabaseManager:
             
             dossier = DossierCSPE(**dossier_data)
             session.add(dossier)
+            session.flush()
+            self._index_text(session, 'dossier', dossier.id, dossier.id, self._dossier_search_text(dossier))
+            _apply_rollup(session, _rollup_key(dossier), 1, dossier.montant_reclame)
             session.commit()
             return dossier.id
         except Exception as e:
@@ -116,11 +599,18 @@ class DatabaseManager:
             session.close()
     
     def add_document(self, document_data):
-        """Ajoute un document à un dossier"""
+        """Ajoute un document à un dossier (le texte extrait est stocké hors ligne)"""
         session = self.Session()
         try:
+            document_data = dict(document_data)
+            texte = document_data.pop('texte_extrait', None)
+            if texte is not None:
+                document_data['hash_texte'] = self._store_text(session, texte)
             document = Document(**document_data)
             session.add(document)
+            session.flush()
+            if texte:
+                self._index_text(session, 'document', document.id, document.dossier_id, texte)
             session.commit()
             return document.id
         except Exception as e:
@@ -130,6 +620,103 @@ class DatabaseManager:
         finally:
             session.close()
     
+    def _store_text(self, session, texte):
+        """
+        Enregistre un texte extrait dans textes_extraits s'il n'existe pas déjà.
+
+        La clé est le SHA-256 du texte : deux documents identiques partagent
+        donc le même enregistrement. L'insertion est faite avec ON CONFLICT
+        DO NOTHING sous SQLite et PostgreSQL : deux écrivains qui stockent le
+        même texte en même temps ne se heurtent pas à la clé primaire.
+
+        Returns:
+            Clé du texte stocké (à enregistrer dans documents.hash_texte)
+        """
+        key = hashlib.sha256(texte.encode('utf-8')).hexdigest()
+        if session.query(TexteExtrait.hash_texte).filter(TexteExtrait.hash_texte == key).first() is not None:
+            return key
+        contenu, compression = _compress_text(texte)
+        values = {'hash_texte': key, 'compression': compression, 'taille_originale': len(texte),
+                  'contenu': contenu, 'date_creation': datetime.utcnow()}
+        insert = _dialect_insert(session)
+        if insert is not None:
+            session.execute(insert(TexteExtrait.__table__).values(**values).on_conflict_do_nothing(
+                index_elements=['hash_texte']
+            ))
+        else:
+            # Autres backends : l'écrivain concurrent a gagné, son texte est identique
+            try:
+                with session.begin_nested():
+                    session.execute(TexteExtrait.__table__.insert().values(**values))
+            except IntegrityError:
+                pass
+        return key
+
+    def get_document_text(self, document_id):
+        """Récupère le texte extrait d'un document (chargé uniquement à la demande)"""
+        session = self.Session()
+        try:
+            row = session.query(TexteExtrait.contenu, TexteExtrait.compression).join(
+                Document, Document.hash_texte == TexteExtrait.hash_texte
+            ).filter(Document.id == document_id).first()
+            if row is not None:
+                return _decompress_text(row.contenu, row.compression)
+            # Documents antérieurs au stockage hors ligne
+            return session.query(Document.texte_extrait).filter(Document.id == document_id).scalar()
+        except Exception as e:
+            print(f"Erreur récupération texte document: {str(e)}")
+            return None
+        finally:
+            session.close()
+
+    def migrate_document_texts(self, batch_size=500):
+        """
+        Déplace les textes encore stockés dans documents.texte_extrait vers textes_extraits.
+
+        Returns:
+            Nombre de documents migrés, ou None en cas d'erreur
+        """
+        session = self.Session()
+        migrated = 0
+        try:
+            while True:
+                rows = session.query(Document.id, Document.texte_extrait).filter(
+                    Document.texte_extrait.isnot(None)
+                ).limit(batch_size).all()
+                if not rows:
+                    break
+                for document_id, texte in rows:
+                    key = self._store_text(session, texte)
+                    session.query(Document).filter(Document.id == document_id).update(
+                        {'hash_texte': key, 'texte_extrait': None}, synchronize_session=False
+                    )
+                session.commit()
+                migrated += len(rows)
+            return migrated
+        except Exception as e:
+            session.rollback()
+            print(f"Erreur migration textes: {str(e)}")
+            return None
+        finally:
+            session.close()
+
+    def purge_orphan_texts(self):
+        """Supprime les textes stockés qui ne sont plus référencés par aucun document"""
+        session = self.Session()
+        try:
+            referenced = session.query(Document.hash_texte).filter(Document.hash_texte.isnot(None))
+            deleted = session.query(TexteExtrait).filter(
+                TexteExtrait.hash_texte.notin_(referenced)
+            ).delete(synchronize_session=False)
+            session.commit()
+            return deleted
+        except Exception as e:
+            session.rollback()
+            print(f"Erreur purge textes: {str(e)}")
+            return 0
+        finally:
+            session.close()
+
     def get_dossier(self, dossier_id):
         """Récupère un dossier par son ID"""
         session = self.Session()
@@ -168,15 +755,94 @@ class DatabaseManager:
         finally:
             session.close()
     
+    def list_dossiers(self, filters=None, columns=None, limit=50, cursor=None):
+        """
+        Liste paginée des dossiers, du plus récent au plus ancien.
+
+        Pagination par curseur sur (date_analyse, id) : chaque page reprend
+        juste après la dernière ligne de la précédente via les index
+        composites, si bien qu'une page profonde coûte autant que la première
+        (contrairement à OFFSET). Les dossiers sans date_analyse sont exclus.
+
+        Args:
+            filters: Égalités sur les colonnes (valeur simple ou liste pour IN),
+                     plus 'date_debut' / 'date_fin' (datetime ou 'YYYY-MM-DD')
+                     sur date_analyse ; une date_fin 'YYYY-MM-DD' inclut
+                     toute la journée
+            columns: Colonnes à retourner (id et date_analyse toujours inclus)
+            limit: Nombre de dossiers par page
+            cursor: Valeur 'next_cursor' de la page précédente
+
+        Returns:
+            Dictionnaire {'dossiers': [dict, ...], 'next_cursor': str ou None}
+        """
+        session = self.Session()
+        try:
+            table_columns = DossierCSPE.__table__.columns
+            names = ['id', 'date_analyse'] + [c for c in (columns or table_columns.keys())
+                                               if c not in ('id', 'date_analyse')]
+            unknown = [name for name in names if name not in table_columns]
+            if unknown:
+                raise ValueError(f"Colonnes inconnues: {', '.join(unknown)}")
+
+            query = session.query(*[table_columns[name] for name in names]).filter(
+                DossierCSPE.date_analyse.isnot(None)
+            )
+            for key, value in (filters or {}).items():
+                if key == 'date_debut':
+                    if isinstance(value, str):
+                        value = datetime.strptime(value, '%Y-%m-%d')
+                    query = query.filter(DossierCSPE.date_analyse >= value)
+                elif key == 'date_fin':
+                    if isinstance(value, str):
+                        # Jour entier : borne exclusive au lendemain minuit
+                        value = datetime.strptime(value, '%Y-%m-%d') + timedelta(days=1)
+                        query = query.filter(DossierCSPE.date_analyse < value)
+                    else:
+                        query = query.filter(DossierCSPE.date_analyse <= value)
+                elif key in table_columns:
+                    if isinstance(value, (list, tuple, set)):
+                        query = query.filter(table_columns[key].in_(list(value)))
+                    else:
+                        query = query.filter(table_columns[key] == value)
+
+            if cursor:
+                last_date, last_id = _decode_cursor(cursor)
+                query = query.filter(tuple_(DossierCSPE.date_analyse, DossierCSPE.id) < (last_date, last_id))
+
+            rows = query.order_by(DossierCSPE.date_analyse.desc(), DossierCSPE.id.desc()).limit(limit + 1).all()
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            return {
+                'dossiers': [dict(zip(names, row)) for row in rows],
+                'next_cursor': _encode_cursor(rows[-1].date_analyse, rows[-1].id) if has_more else None
+            }
+        except ValueError:
+            raise
+        except Exception as e:
+            print(f"Erreur liste dossiers: {str(e)}")
+            return {'dossiers': [], 'next_cursor': None}
+        finally:
+            session.close()
+
     def update_dossier(self, dossier_data):
         """Met à jour un dossier existant"""
         session = self.Session()
         try:
             dossier = session.query(DossierCSPE).filter_by(id=dossier_data['id']).first()
             if dossier:
+                old_key, old_montant = _rollup_key(dossier), dossier.montant_reclame
                 for key, value in dossier_data.items():
                     if hasattr(dossier, key) and key != 'id':
                         setattr(dossier, key, value)
+                new_key = _rollup_key(dossier)
+                if new_key == old_key:
+                    _apply_rollup(session, new_key, 0, (dossier.montant_reclame or 0.0) - (old_montant or 0.0))
+                else:
+                    _apply_rollup(session, old_key, -1, -(old_montant or 0.0))
+                    _apply_rollup(session, new_key, 1, dossier.montant_reclame)
+                if 'commentaires' in dossier_data or 'motif_irrecevabilite' in dossier_data:
+                    self._index_text(session, 'dossier', dossier.id, dossier.id, self._dossier_search_text(dossier))
                 session.commit()
                 return True
             return False
@@ -193,6 +859,10 @@ class DatabaseManager:
         try:
             dossier = session.query(DossierCSPE).filter_by(id=dossier_id).first()
             if dossier:
+                self._unindex(session, 'dossier', dossier.id)
+                for (document_id,) in session.query(Document.id).filter(Document.dossier_id == dossier.id):
+                    self._unindex(session, 'document', document_id)
+                _apply_rollup(session, _rollup_key(dossier), -1, -(dossier.montant_reclame or 0.0))
                 session.delete(dossier)
                 session.commit()
                 return True
@@ -204,21 +874,301 @@ class DatabaseManager:
         finally:
             session.close()
     
+    @property
+    def _search_backend(self):
+        """Backend de recherche plein texte disponible ('sqlite', 'postgresql' ou None), vérifié une fois"""
+        if not self._search_checked:
+            self._search_name = self._detect_search_backend()
+            self._search_checked = True
+        return self._search_name
+
+    def _detect_search_backend(self):
+        """Vérifie que le backend peut porter l'index plein texte (FTS5 et SQLite >= 3.35 sous SQLite)"""
+        name = self.engine.dialect.name
+        if name not in SEARCH_DDL:
+            return None
+        if name == 'sqlite':
+            try:
+                with self.engine.connect() as conn:
+                    version = conn.exec_driver_sql("SELECT sqlite_version()").scalar()
+                    # Module FTS5 compilé ou chargé : seule une création de table le prouve
+                    conn.exec_driver_sql("CREATE VIRTUAL TABLE temp.test_fts5 USING fts5(contenu)")
+                    conn.exec_driver_sql("DROP TABLE temp.test_fts5")
+            except Exception as e:
+                print(f"Warning: FTS5 non disponible ({str(e)}) - recherche par LIKE sur les dossiers")
+                return None
+            if tuple(int(part) for part in version.split('.')[:3]) < SQLITE_SEARCH_MIN_VERSION:
+                minimum = '.'.join(map(str, SQLITE_SEARCH_MIN_VERSION))
+                print(f"Warning: SQLite {version} antérieur à {minimum} - recherche par LIKE sur les dossiers")
+                return None
+        return name
+
+    def _create_search_index(self):
+        """Crée l'index plein texte propre au backend (désactivé si la création échoue)"""
+        if self._search_backend is None:
+            return
+        try:
+            with self.engine.begin() as conn:
+                for statement in SEARCH_DDL[self._search_backend]:
+                    conn.execute(text(statement))
+        except Exception as e:
+            print(f"Warning: index plein texte non créé ({str(e)}) - recherche par LIKE sur les dossiers")
+            self._search_name = None
+
+    @staticmethod
+    def _dossier_search_text(dossier):
+        """Texte indexé pour un dossier : observations et motif d'irrecevabilité"""
+        return '\n'.join(part for part in (dossier.commentaires, dossier.motif_irrecevabilite) if part)
+
+    def _index_text(self, session, source, source_id, dossier_id, contenu):
+        """Ajoute ou remplace une ligne de l'index plein texte dans la transaction en cours"""
+        if self._search_backend is None:
+            return
+        self._unindex(session, source, source_id)
+        if contenu:
+            session.execute(
+                text(f"INSERT INTO {SEARCH_TABLE} (rowid, dossier_id, contenu) VALUES (:rowid, :dossier_id, :contenu)"),
+                {'rowid': _search_rowid(source, source_id), 'dossier_id': dossier_id, 'contenu': contenu}
+            )
+
+    def _unindex(self, session, source, source_id):
+        """Retire une ligne de l'index plein texte"""
+        if self._search_backend is None:
+            return
+        session.execute(
+            text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = :rowid"),
+            {'rowid': _search_rowid(source, source_id)}
+        )
+
+    def rebuild_search_index(self):
+        """
+        Reconstruit entièrement l'index plein texte (bases existantes, après migration).
+
+        Returns:
+            Nombre de lignes indexées, ou None en cas d'erreur
+        """
+        if self._search_backend is None:
+            print("Recherche plein texte non supportée pour ce backend")
+            return None
+        self._create_search_index()
+        session = self.Session()
+        try:
+            session.execute(text(f"DELETE FROM {SEARCH_TABLE}"))
+            count = 0
+            for dossier in session.query(DossierCSPE).yield_per(1000):
+                contenu = self._dossier_search_text(dossier)
+                if contenu:
+                    self._index_text(session, 'dossier', dossier.id, dossier.id, contenu)
+                    count += 1
+            documents = session.query(Document.id, Document.dossier_id, Document.texte_extrait,
+                                      TexteExtrait.contenu, TexteExtrait.compression).outerjoin(
+                TexteExtrait, Document.hash_texte == TexteExtrait.hash_texte
+            )
+            for document_id, dossier_id, texte_inline, contenu, compression in documents.yield_per(200):
+                texte = _decompress_text(contenu, compression) if contenu is not None else texte_inline
+                if texte:
+                    self._index_text(session, 'document', document_id, dossier_id, texte)
+                    count += 1
+            session.commit()
+            return count
+        except Exception as e:
+            session.rollback()
+            print(f"Erreur reconstruction index: {str(e)}")
+            return None
+        finally:
+            session.close()
+
+    def search(self, query, page=1, per_page=20):
+        """
+        Recherche plein texte dans les textes extraits, observations et motifs.
+
+        Les résultats sont agrégés par dossier (meilleur extrait retenu) et
+        classés par pertinence : bm25 sous SQLite, ts_rank_cd avec
+        racinisation française sous PostgreSQL. Sous SQLite la recherche
+        ignore casse et accents mais sans racinisation. Sans index plein
+        texte (autre backend, SQLite sans FTS5 ou antérieur à 3.35), la
+        recherche se replie sur LIKE dans les observations et motifs des
+        dossiers, sans les textes extraits.
+
+        Args:
+            query: Termes recherchés, "expressions exactes" entre guillemets
+            page: Numéro de page (à partir de 1)
+            per_page: Nombre de dossiers par page
+
+        Returns:
+            Dictionnaire {'total', 'page', 'per_page', 'resultats': [...]}
+        """
+        empty = {'total': 0, 'page': page, 'per_page': per_page, 'resultats': []}
+        backend = self._search_backend
+        if not query or not query.strip():
+            return empty
+
+        page = max(1, int(page))
+        if backend is None:
+            return self._search_like(query, page, per_page)
+        params = {'limit': per_page, 'offset': (page - 1) * per_page}
+        if backend == 'sqlite':
+            params['q'] = _fts5_query(query)
+            if not params['q']:
+                return empty
+            # MATERIALIZED (SQLite >= 3.35) : bm25() doit être évalué dans la requête MATCH ;
+            # SQLite renvoie les colonnes nues de la ligne ayant le MIN(score)
+            hits = f"""
+                WITH hits AS MATERIALIZED (
+                    SELECT dossier_id, bm25({SEARCH_TABLE}) AS score,
+                           snippet({SEARCH_TABLE}, 0, '[', ']', '…', 16) AS extrait
+                    FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :q
+                ),
+                best AS (SELECT dossier_id, MIN(score) AS score, extrait FROM hits GROUP BY dossier_id)
+            """
+            order = "best.score ASC"
+            extrait = "best.extrait"
+        else:
+            params['q'] = query
+            hits = f"""
+                WITH best AS (
+                    SELECT DISTINCT ON (r.dossier_id) r.dossier_id,
+                           ts_rank_cd(r.document, q) AS score, r.contenu, q
+                    FROM {SEARCH_TABLE} r, websearch_to_tsquery('french', :q) q
+                    WHERE r.document @@ q
+                    ORDER BY r.dossier_id, ts_rank_cd(r.document, q) DESC
+                )
+            """
+            order = "best.score DESC"
+            extrait = "ts_headline('french', best.contenu, best.q, 'StartSel=[, StopSel=], MaxWords=30, MinWords=10')"
+
+        session = self.Session()
+        try:
+            total = session.execute(text(hits + "SELECT COUNT(*) FROM best"), params).scalar()
+            rows = session.execute(text(hits + f"""
+                SELECT d.id, d.numero_dossier, d.demandeur, d.statut, d.date_analyse,
+                       best.score, {extrait} AS extrait
+                FROM best JOIN dossiers_cspe d ON d.id = best.dossier_id
+                ORDER BY {order}, d.id
+                LIMIT :limit OFFSET :offset
+            """).columns(date_analyse=DateTime), params).all()
+            return {
+                'total': total,
+                'page': page,
+                'per_page': per_page,
+                'resultats': [
+                    {
+                        'dossier_id': row.id,
+                        'numero_dossier': row.numero_dossier,
+                        'demandeur': row.demandeur,
+                        'statut': row.statut,
+                        'date_analyse': row.date_analyse,
+                        'score': abs(float(row.score)),
+                        'extrait': row.extrait
+                    }
+                    for row in rows
+                ]
+            }
+        except Exception as e:
+            print(f"Erreur recherche plein texte: {str(e)}")
+            return empty
+        finally:
+            session.close()
+
+    def _search_like(self, query, page, per_page):
+        """Recherche de repli sans index plein texte : tous les termes dans les observations ou le motif"""
+        empty = {'total': 0, 'page': page, 'per_page': per_page, 'resultats': []}
+        terms = [term.strip('"') for term in re.findall(r'"[^"]+"|[^\s"]+', query)]
+        terms = [term for term in terms if term]
+        if not terms:
+            return empty
+        contenu = func.coalesce(DossierCSPE.commentaires, '') + '\n' + func.coalesce(DossierCSPE.motif_irrecevabilite, '')
+        session = self.Session()
+        try:
+            matches = session.query(
+                DossierCSPE.id, DossierCSPE.numero_dossier, DossierCSPE.demandeur, DossierCSPE.statut,
+                DossierCSPE.date_analyse, contenu.label('contenu')
+            ).filter(*(contenu.ilike(_like_pattern(term), escape='\\') for term in terms))
+            total = matches.count()
+            rows = matches.order_by(DossierCSPE.date_analyse.desc(), DossierCSPE.id).limit(per_page).offset(
+                (page - 1) * per_page
+            ).all()
+            return {
+                'total': total,
+                'page': page,
+                'per_page': per_page,
+                'resultats': [
+                    {
+                        'dossier_id': row.id,
+                        'numero_dossier': row.numero_dossier,
+                        'demandeur': row.demandeur,
+                        'statut': row.statut,
+                        'date_analyse': row.date_analyse,
+                        'score': 0.0,
+                        'extrait': row.contenu.strip()[:200]
+                    }
+                    for row in rows
+                ]
+            }
+        except Exception as e:
+            print(f"Erreur recherche: {str(e)}")
+            return empty
+        finally:
+            session.close()
+
+    def rebuild_statistics(self):
+        """Reconstruit la table statistiques_journalieres depuis dossiers_cspe"""
+        session = self.Session()
+        try:
+            montant = DossierCSPE.montant_reclame
+            tranche = case(
+                (montant.is_(None), ROLLUP_UNKNOWN),
+                (montant <= 1000, AMOUNT_BUCKETS[0]),
+                (montant <= 5000, AMOUNT_BUCKETS[1]),
+                (montant <= 10000, AMOUNT_BUCKETS[2]),
+                else_=AMOUNT_BUCKETS[3]
+            )
+            # SQLite renvoie le jour sous forme de texte 'AAAA-MM-JJ'
+            if self.engine.dialect.name == 'sqlite':
+                jour = func.date(DossierCSPE.date_analyse)
+            else:
+                jour = cast(DossierCSPE.date_analyse, Date)
+            statut = func.coalesce(DossierCSPE.statut, ROLLUP_UNKNOWN)
+            activite = func.coalesce(DossierCSPE.activite, ROLLUP_UNKNOWN)
+            rows = session.query(
+                jour, statut, activite, tranche, func.count(DossierCSPE.id), func.coalesce(func.sum(montant), 0.0)
+            ).filter(DossierCSPE.date_analyse.isnot(None)).group_by(jour, statut, activite, tranche).all()
+            
+            session.query(StatistiqueJournaliere).delete()
+            session.bulk_insert_mappings(StatistiqueJournaliere, [
+                {
+                    'jour': datetime.strptime(j, '%Y-%m-%d').date() if isinstance(j, str) else j,
+                    'statut': s, 'activite': a, 'tranche_montant': t, 'nombre': n, 'montant_total': float(m)
+                }
+                for j, s, a, t, n, m in rows
+            ])
+            session.commit()
+            return len(rows)
+        except Exception as e:
+            session.rollback()
+            print(f"Erreur reconstruction statistiques: {str(e)}")
+            return 0
+        finally:
+            session.close()
+    
     def get_statistics(self, period=None):
-        """Calcule les statistiques des dossiers"""
+        """Calcule les statistiques des dossiers (lues dans statistiques_journalieres)"""
         session = self.Session()
         try:
-            query = session.query(DossierCSPE)
+            query = session.query(
+                StatistiqueJournaliere.statut, func.sum(StatistiqueJournaliere.nombre)
+            ).group_by(StatistiqueJournaliere.statut)
             
             if period:
                 try:
-                    start_date = datetime.strptime(period['start'], '%Y-%m-%d')
-                    end_date = datetime.strptime(period['end'], '%Y-%m-%d')
-                    query = query.filter(DossierCSPE.date_analyse.between(start_date, end_date))
+                    start_date = datetime.strptime(period['start'], '%Y-%m-%d').date()
+                    end_date = datetime.strptime(period['end'], '%Y-%m-%d').date()
+                    query = query.filter(StatistiqueJournaliere.jour.between(start_date, end_date))
                 except (KeyError, ValueError):
                     pass  # Ignorer les erreurs de format de date
             
-            total = query.count()
+            par_statut = {statut: int(nombre) for statut, nombre in query.all()}
+            total = sum(par_statut.values())
             
             if total == 0:
                 return {
@@ -229,15 +1179,13 @@ class DatabaseManager:
                     'taux_recevabilite': 0
                 }
             
-            recevables = query.filter(DossierCSPE.statut == 'RECEVABLE').count()
-            irrecevables = query.filter(DossierCSPE.statut == 'IRRECEVABLE').count()
-            instruction = query.filter(DossierCSPE.statut == 'INSTRUCTION').count()
+            recevables = par_statut.get('RECEVABLE', 0)
             
             return {
                 'total': total,
                 'recevables': recevables,
-                'irrecevables': irrecevables,
-                'instruction': instruction,
+                'irrecevables': par_statut.get('IRRECEVABLE', 0),
+                'instruction': par_statut.get('INSTRUCTION', 0),
                 'taux_recevabilite': (recevables / total * 100) if total > 0 else 0
             }
         except Exception as e:
@@ -250,12 +1198,10 @@ class DatabaseManager:
         """Statistiques par type d'activité"""
         session = self.Session()
         try:
-            query = session.query(
-                DossierCSPE.activite, 
-                func.count(DossierCSPE.id).label('count')
-            ).group_by(DossierCSPE.activite)
-            
-            results = query.all()
+            results = session.query(
+                StatistiqueJournaliere.activite,
+                func.sum(StatistiqueJournaliere.nombre)
+            ).group_by(StatistiqueJournaliere.activite).all()
             
             if not results:
                 # Données de démonstration si aucune donnée réelle
@@ -266,7 +1212,7 @@ class DatabaseManager:
                     'Associations': 34
                 }
             
-            return {activity: count for activity, count in results}
+            return {(activity or None): int(count) for activity, count in results}
         except Exception as e:
             print(f"Erreur statistiques activité: {str(e)}")
             return {}
@@ -277,27 +1223,16 @@ class DatabaseManager:
         """Statistiques par tranche de montant"""
         session = self.Session()
         try:
-            # Requête pour calculer les tranches de montants
-            tranches = {
-                '0-1000€': 0,
-                '1000-5000€': 0,
-                '5000-10000€': 0,
-                '>10000€': 0
-            }
+            tranches = dict.fromkeys(AMOUNT_BUCKETS, 0)
             
-            dossiers = session.query(DossierCSPE.montant_reclame).all()
-            
-            for (montant,) in dossiers:
-                if montant is None:
-                    continue
-                elif montant <= 1000:
-                    tranches['0-1000€'] += 1
-                elif montant <= 5000:
-                    tranches['1000-5000€'] += 1
-                elif montant <= 10000:
-                    tranches['5000-10000€'] += 1
-                else:
-                    tranches['>10000€'] += 1
+            results = session.query(
+                StatistiqueJournaliere.tranche_montant,
+                func.sum(StatistiqueJournaliere.nombre)
+            ).filter(StatistiqueJournaliere.tranche_montant != ROLLUP_UNKNOWN)\
+             .group_by(StatistiqueJournaliere.tranche_montant).all()
+            
+            for tranche, count in results:
+                tranches[tranche] = int(count)
             
             # Si pas de données, retourner des données de démo
             if sum(tranches.values()) == 0:
@@ -322,14 +1257,16 @@ class DatabaseManager:
             if year is None:
                 year = datetime.now().year
             
+            month = cast(extract('month', StatistiqueJournaliere.jour), Integer)
+            counts = dict(session.query(month, func.sum(StatistiqueJournaliere.nombre))
+                          .filter(StatistiqueJournaliere.jour.between(datetime(year, 1, 1).date(),
+                                                                       datetime(year, 12, 31).date()))
+                          .group_by(month).all())
+            
             monthly_data = {}
-            for month in range(1, 13):
-                count = session.query(DossierCSPE).filter(
-                    func.extract('year', DossierCSPE.date_analyse) == year,
-                    func.extract('month', DossierCSPE.date_analyse) == month
-                ).count()
-                month_name = datetime(year, month, 1).strftime('%B')
-                monthly_data[month_name] = count
+            for m in range(1, 13):
+                month_name = datetime(year, m, 1).strftime('%B')
+                monthly_data[month_name] = int(counts.get(m, 0))
             
             return monthly_data
         except Exception as e:
@@ -349,6 +1286,7 @@ class DatabaseManager:
             return None
         
         try:
+            from fpdf import FPDF
             pdf = FPDF()
             pdf.add_page()
             
@@ -464,6 +1402,7 @@ class DatabaseManager:
             }
             
             filename = f"rapport_dossier_{dossier.numero_dossier}.csv"
+            import pandas as pd
             df = pd.DataFrame(data)
             df.to_csv(filename, index=False, encoding='utf-8', sep=';')
             return filename
@@ -503,6 +1442,7 @@ class DatabaseManager:
                 }
                 data.append(row)
             
+            import pandas as pd
             df = pd.DataFrame(data)
             
             if format.lower() == 'csv':
@@ -519,33 +1459,374 @@ class DatabaseManager:
         except Exception as e:
             print(f"Erreur génération rapport global: {str(e)}")
             return None
-    
-    def backup_database(self):
-        """Effectue une sauvegarde de la base de données"""
+
+    def export_analytics(self, output_dir="export_analytique", incremental=True, batch_size=10000):
+        """
+        Exporte l'historique au format Parquet partitionné par année d'analyse.
+
+        Trois jeux de données typés sont écrits dans output_dir
+        (dossiers_cspe, criteres_analyse, documents), chacun partitionné
+        en `annee=YYYY/`. Les critères restent une table longue avec un
+        statut booléen et le texte extrait des documents n'est pas exporté.
+
+        En mode incrémental, chaque table suit ses propres ids : seules les
+        lignes créées depuis le dernier export sont ajoutées, y compris les
+        critères et documents ajoutés à un dossier déjà exporté. Une ligne
+        dont le dossier n'a pas encore de date d'analyse (pas de partition)
+        reste en attente et est exportée dès que la date est renseignée.
+        L'état est conservé dans `_export_state.json`. Les mises à jour de
+        lignes déjà exportées ne sont pas reprises : relancer avec
+        incremental=False pour tout réécrire.
+
+        Returns:
+            Dictionnaire {table: nombre de lignes écrites}, ou None en cas d'erreur
+        """
+        if not PYARROW_AVAILABLE:
+            print("PyArrow non disponible - export Parquet non généré")
+            return None
+
+        session = self.Session()
         try:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            backup_filename = f"backup_cspe_{timestamp}.sql"
-            
-            # Pour SQLite, copier simplement le fichier
-            if 'sqlite' in self.db_url.lower():
+            output_path = os.path.abspath(output_dir)
+            state_file = os.path.join(output_path, ANALYTICS_STATE_FILE)
+            state = {}
+            if incremental and os.path.exists(state_file):
+                with open(state_file, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+            elif not incremental and os.path.isdir(output_path):
                 import shutil
-                db_file = self.db_url.replace('sqlite:///', '')
-                shutil.copy2(db_file, f"backup_{timestamp}_{os.path.basename(db_file)}")
-                return f"backup_{timestamp}_{os.path.basename(db_file)}"
+                for table in ANALYTICS_TABLES:
+                    shutil.rmtree(os.path.join(output_path, table), ignore_errors=True)
+            os.makedirs(output_path, exist_ok=True)
+
+            annee = cast(extract('year', DossierCSPE.date_analyse), Integer).label('annee')
+            queries = {
+                'dossiers_cspe': session.query(
+                    DossierCSPE.id, DossierCSPE.numero_dossier, DossierCSPE.demandeur,
+                    DossierCSPE.activite, DossierCSPE.date_reclamation, DossierCSPE.periode_debut,
+                    DossierCSPE.periode_fin, DossierCSPE.montant_reclame, DossierCSPE.statut,
+                    DossierCSPE.motif_irrecevabilite, DossierCSPE.confiance_analyse,
+                    DossierCSPE.date_analyse, DossierCSPE.analyste, DossierCSPE.documents_joints,
+                    DossierCSPE.commentaires, annee
+                ).order_by(DossierCSPE.id),
+                'criteres_analyse': session.query(
+                    CritereAnalyse.id, CritereAnalyse.dossier_id, CritereAnalyse.critere,
+                    CritereAnalyse.statut, CritereAnalyse.detail,
+                    CritereAnalyse.date_verification, annee
+                ).join(DossierCSPE, CritereAnalyse.dossier_id == DossierCSPE.id).order_by(CritereAnalyse.id),
+                'documents': session.query(
+                    Document.id, Document.dossier_id, Document.nom_fichier, Document.type_document,
+                    Document.chemin_fichier, Document.taille_fichier, Document.date_upload,
+                    Document.hash_fichier, annee
+                ).join(DossierCSPE, Document.dossier_id == DossierCSPE.id).order_by(Document.id),
+            }
+
+            id_columns = {'dossiers_cspe': DossierCSPE.id, 'criteres_analyse': CritereAnalyse.id,
+                          'documents': Document.id}
+
+            # Unique par export : deux exports dans la même seconde ne s'écrasent pas
+            run_id = f"{datetime.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:12]}"
+            schemas = _analytics_schemas()
+            written, tables_state = {}, {}
+            for table, query in queries.items():
+                id_column = id_columns[table]
+                previous = state.get('tables', {}).get(table, {})
+                if 'tables' not in state and 'dernier_id' in state:
+                    # État d'un export antérieur : seul le dernier id de dossier était conservé
+                    legacy = query.with_entities(func.max(id_column)).order_by(None)
+                    previous = {'dernier_id': legacy.filter(DossierCSPE.id <= state['dernier_id']).scalar() or 0}
+                first_id = previous.get('dernier_id', 0)
+                pending = previous.get('en_attente', [])
+                last_id = max(first_id, session.query(func.max(id_column)).scalar() or 0)
+                # Lignes créées depuis le dernier export et lignes restées sans partition
+                new_rows = or_(id_column > first_id, id_column.in_(pending)) if pending else id_column > first_id
+                scope = and_(new_rows, id_column <= last_id)
+                if last_id > first_id or pending:
+                    written[table] = self._write_analytics_table(
+                        query.filter(scope, DossierCSPE.date_analyse.isnot(None)),
+                        schemas[table], os.path.join(output_path, table), run_id, batch_size
+                    )
+                else:
+                    written[table] = 0
+                # Dossier sans date d'analyse : la ligne sera reprise au prochain export
+                waiting = query.with_entities(id_column).filter(scope, DossierCSPE.date_analyse.is_(None))
+                tables_state[table] = {'dernier_id': last_id, 'en_attente': [row[0] for row in waiting]}
+
+            if not any(written.values()):
+                print("Aucune nouvelle ligne à exporter")
+            state = {
+                'tables': tables_state,
+                'derniere_execution': datetime.now().isoformat(),
+                'lignes_ecrites': written
+            }
+            with open(state_file, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False, indent=2)
+
+            return written
+        except Exception as e:
+            print(f"Erreur export analytique: {str(e)}")
+            return None
+        finally:
+            session.close()
+
+    def _write_analytics_table(self, query, schema, table_dir, run_id, batch_size):
+        """Écrit le résultat d'une requête en lots Parquet partitionnés par année"""
+        import pyarrow as pa
+        import pyarrow.dataset as pa_ds
+        counter = {'rows': 0}
+        names = schema.names
+
+        def record_batches():
+            rows = []
+            for row in query.yield_per(batch_size):
+                rows.append(row)
+                if len(rows) >= batch_size:
+                    yield _rows_to_record_batch(rows, names, schema)
+                    counter['rows'] += len(rows)
+                    rows = []
+            if rows:
+                yield _rows_to_record_batch(rows, names, schema)
+                counter['rows'] += len(rows)
+
+        pa_ds.write_dataset(
+            record_batches(),
+            table_dir,
+            schema=schema,
+            format='parquet',
+            partitioning=pa_ds.partitioning(pa.schema([('annee', pa.int32())]), flavor='hive'),
+            basename_template=f"part-{run_id}-{{i}}.parquet",
+            existing_data_behavior='overwrite_or_ignore'
+        )
+        return counter['rows']
+
+    def backup_database(self, backup_dir='.', incremental=False, keep=None,
+                        pages_per_step=256, pause=0.005, verify=True):
+        """
+        Effectue une sauvegarde en ligne et cohérente de la base de données.
+
+        SQLite : API de sauvegarde de SQLite lue dans une transaction de
+        lecture (instantané WAL figé, les écritures de l'application ne sont
+        ni bloquées ni source de redémarrage), par paquets de pages_per_step
+        pages avec une pause entre chaque paquet pour ne pas saturer le disque.
+        En mode incrémental, l'instantané est découpé en blocs compressés
+        adressés par contenu : seuls les blocs modifiés depuis les sauvegardes
+        précédentes sont écrits.
+
+        PostgreSQL : pg_dump au format custom, écrit en flux dans le fichier.
+
+        Chaque sauvegarde est décrite par un manifeste JSON (empreinte,
+        nombre de lignes par table) utilisé par verify_backup et restore_backup.
+
+        Args:
+            backup_dir: Répertoire des sauvegardes
+            incremental: Sauvegarde par blocs dédupliqués (SQLite uniquement)
+            keep: Nombre de sauvegardes à conserver (rotation), None = toutes
+            pages_per_step: Pages copiées par étape (SQLite)
+            pause: Pause en secondes entre deux étapes (SQLite)
+            verify: Restaure et vérifie la sauvegarde après écriture
+
+        Returns:
+            Chemin de la sauvegarde (fichier ou manifeste), ou None en cas d'erreur
+        """
+        try:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+            os.makedirs(backup_dir, exist_ok=True)
+            backend = self.engine.dialect.name
+            
+            if backend == 'sqlite':
+                db_file = self.engine.url.database
+                backup_name = f"backup_{timestamp}_{os.path.basename(db_file)}"
+                snapshot = os.path.join(backup_dir, backup_name + ('.tmp' if incremental else ''))
+                _sqlite_online_backup(db_file, snapshot, pages_per_step, pause)
+                manifest = {
+                    'type': 'incremental' if incremental else 'complete',
+                    'backend': 'sqlite',
+                    'date': datetime.now().isoformat(),
+                    'source': db_file,
+                    'sha256': _file_sha256(snapshot),
+                    'taille': os.path.getsize(snapshot),
+                    'compteurs': _sqlite_row_counts(snapshot)
+                }
+                if incremental:
+                    manifest['taille_bloc'] = BACKUP_BLOCK_SIZE
+                    manifest['blocs'], manifest['blocs_ecrits'] = _store_backup_blocks(
+                        snapshot, os.path.join(backup_dir, BACKUP_BLOCKS_DIR)
+                    )
+                    os.remove(snapshot)
+                    result = os.path.join(backup_dir, backup_name + BACKUP_MANIFEST_SUFFIX)
+                else:
+                    manifest['fichier'] = backup_name
+                    result = snapshot
+            
+            elif backend == 'postgresql':
+                url = self.engine.url
+                backup_name = f"backup_{timestamp}_{url.database}.dump"
+                result = os.path.join(backup_dir, backup_name)
+                compteurs = {}
+                session = self.Session()
+                try:
+                    for model in (DossierCSPE, CritereAnalyse, Document):
+                        compteurs[model.__tablename__] = session.query(func.count(model.id)).scalar()
+                finally:
+                    session.close()
+                env = dict(os.environ)
+                if url.password:
+                    env['PGPASSWORD'] = url.password
+                command = ['pg_dump', '--format=custom', '--compress=6', '--dbname', url.database]
+                if url.host:
+                    command += ['--host', url.host]
+                if url.port:
+                    command += ['--port', str(url.port)]
+                if url.username:
+                    command += ['--username', url.username]
+                import subprocess
+                with open(result, 'wb') as f:
+                    subprocess.run(command, stdout=f, env=env, check=True)
+                manifest = {
+                    'type': 'complete',
+                    'backend': 'postgresql',
+                    'date': datetime.now().isoformat(),
+                    'source': url.database,
+                    'fichier': backup_name,
+                    'sha256': _file_sha256(result),
+                    'taille': os.path.getsize(result),
+                    'compteurs': compteurs
+                }
+            else:
+                print(f"Sauvegarde non supportée pour le backend {backend}")
+                return None
+            
+            manifest_path = os.path.join(backup_dir, backup_name + BACKUP_MANIFEST_SUFFIX)
+            with open(manifest_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=2)
+            
+            if verify:
+                verification = self.verify_backup(manifest_path)
+                if not verification['ok']:
+                    print(f"Sauvegarde invalide: {verification['details']}")
+                    return None
             
-            return backup_filename
+            if keep:
+                self._rotate_backups(backup_dir, keep)
+            
+            return result
             
         except Exception as e:
             print(f"Erreur sauvegarde: {str(e)}")
             return None
+
+    def restore_backup(self, backup_path, target_file):
+        """
+        Reconstitue une sauvegarde SQLite (complète ou incrémentale) dans target_file.
+
+        Returns:
+            Chemin du fichier restauré, ou None en cas d'erreur
+        """
+        try:
+            manifest_path = _backup_manifest_path(backup_path)
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest['backend'] != 'sqlite':
+                print("Restauration PostgreSQL : utiliser pg_restore sur le fichier .dump")
+                return None
+            
+            backup_dir = os.path.dirname(manifest_path)
+            if manifest['type'] == 'incremental':
+                blocks_dir = os.path.join(backup_dir, BACKUP_BLOCKS_DIR)
+                with open(target_file, 'wb') as out:
+                    for block_hash in manifest['blocs']:
+                        with open(os.path.join(blocks_dir, block_hash), 'rb') as block:
+                            out.write(zlib.decompress(block.read()))
+            else:
+                import shutil
+                shutil.copyfile(os.path.join(backup_dir, manifest['fichier']), target_file)
+            return target_file
+        except Exception as e:
+            print(f"Erreur restauration: {str(e)}")
+            return None
+
+    def verify_backup(self, backup_path):
+        """
+        Vérifie qu'une sauvegarde est restaurable et conforme à son manifeste.
+
+        SQLite : restauration dans un fichier temporaire, contrôle de
+        l'empreinte, PRAGMA integrity_check et comparaison des nombres de
+        lignes. PostgreSQL : empreinte et lecture de la table des matières
+        de l'archive par pg_restore --list.
+
+        Returns:
+            Dictionnaire {'ok': bool, 'details': str}
+        """
+        import tempfile
+        try:
+            manifest_path = _backup_manifest_path(backup_path)
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            
+            if manifest['backend'] == 'postgresql':
+                dump_file = os.path.join(os.path.dirname(manifest_path), manifest['fichier'])
+                if _file_sha256(dump_file) != manifest['sha256']:
+                    return {'ok': False, 'details': 'Empreinte SHA-256 différente du manifeste'}
+                import subprocess
+                listing = subprocess.run(['pg_restore', '--list', dump_file],
+                                         capture_output=True, text=True, check=True).stdout
+                missing = [t for t in manifest['compteurs'] if f"TABLE DATA public {t} " not in listing]
+                if missing:
+                    return {'ok': False, 'details': f"Tables absentes de l'archive: {', '.join(missing)}"}
+                return {'ok': True, 'details': 'Archive pg_dump lisible'}
+            
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                restored = self.restore_backup(manifest_path, os.path.join(tmp_dir, 'verification.db'))
+                if restored is None:
+                    return {'ok': False, 'details': 'Restauration impossible'}
+                if _file_sha256(restored) != manifest['sha256']:
+                    return {'ok': False, 'details': 'Empreinte SHA-256 différente du manifeste'}
+                import sqlite3
+                conn = sqlite3.connect(restored)
+                try:
+                    integrity = conn.execute('PRAGMA integrity_check').fetchone()[0]
+                finally:
+                    conn.close()
+                if integrity != 'ok':
+                    return {'ok': False, 'details': f"integrity_check: {integrity}"}
+                if _sqlite_row_counts(restored) != manifest['compteurs']:
+                    return {'ok': False, 'details': 'Nombre de lignes différent du manifeste'}
+            return {'ok': True, 'details': 'Sauvegarde restaurée et vérifiée'}
+        except Exception as e:
+            return {'ok': False, 'details': str(e)}
+
+    def _rotate_backups(self, backup_dir, keep):
+        """Conserve les `keep` sauvegardes les plus récentes et purge les blocs orphelins"""
+        manifests = sorted(
+            name for name in os.listdir(backup_dir)
+            if name.startswith('backup_') and name.endswith(BACKUP_MANIFEST_SUFFIX)
+        )
+        for name in manifests[:-keep]:
+            with open(os.path.join(backup_dir, name), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('fichier'):
+                data_file = os.path.join(backup_dir, manifest['fichier'])
+                if os.path.exists(data_file):
+                    os.remove(data_file)
+            os.remove(os.path.join(backup_dir, name))
+        
+        blocks_dir = os.path.join(backup_dir, BACKUP_BLOCKS_DIR)
+        if os.path.isdir(blocks_dir):
+            referenced = set()
+            for name in manifests[-keep:]:
+                with open(os.path.join(backup_dir, name), 'r', encoding='utf-8') as f:
+                    referenced.update(json.load(f).get('blocs', []))
+            for block_hash in os.listdir(blocks_dir):
+                if block_hash not in referenced:
+                    os.remove(os.path.join(blocks_dir, block_hash))
     
     def get_system_info(self):
         """Retourne des informations sur le système"""
         session = self.Session()
         try:
-            total_dossiers = session.query(DossierCSPE).count()
-            total_criteres = session.query(CritereAnalyse).count()
-            total_documents = session.query(Document).count()
+            total_dossiers = session.query(func.count(DossierCSPE.id)).scalar()
+            total_criteres = session.query(func.count(CritereAnalyse.id)).scalar()
+            total_documents = session.query(func.count(Document.id)).scalar()
             
             # Dernier dossier analysé
             last_dossier = session.query(DossierCSPE).order_by(DossierCSPE.date_analyse.desc()).first()
@@ -557,6 +1838,7 @@ class DatabaseManager:
                 'dernier_dossier': last_dossier.numero_dossier if last_dossier else None,
                 'derniere_analyse': last_dossier.date_analyse if last_dossier else None,
                 'db_url': self.db_url,
+                'storage_backend': self.storage_profile['backend'],
                 'version': '1.0.0'
             }
         except Exception as e:
@@ -637,10 +1919,23 @@ def create_sample_data(db_manager):
 
 # Test de la classe
 if __name__ == "__main__":
-    # Test de base
-    db = DatabaseManager()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Base de données de l'assistant CSPE")
+    parser.add_argument('--db-url', default="sqlite:///cspe_assistant.db", help="URL SQLAlchemy de la base")
+    parser.add_argument('--rebuild-stats', action='store_true',
+                        help="Reconstruire la table statistiques_journalieres puis quitter")
+    args = parser.parse_args()
+    
+    db = DatabaseManager(args.db_url)
     db.init_db()
     
+    if args.rebuild_stats:
+        print(f"✅ {db.rebuild_statistics()} agrégats statistiques reconstruits")
+        raise SystemExit(0)
+    
+    # Test de base
+    
     # Créer des données de test
     create_sample_data(db)
     
@@ -10,14 +10,14 @@ Date: Décembre 2024
 """
 
 import streamlit as st
-import pandas as pd
 import time
 import json
 from datetime import datetime, date
-import plotly.express as px
-import plotly.graph_objects as go
 from src.models.classifier import CSPEClassifier
 
+# pandas et plotly ne servent qu'aux graphiques et à l'export CSV :
+# ils sont importés dans les fonctions concernées, pas à chaque réexécution du script
+
 # Configuration de la page
 st.set_page_config(
     page_title="🏛️ Assistant CSPE - Démo Entretien",
@@ -447,6 +447,10 @@ def display_analysis_results(result):
 
 def show_system_performance():
     """Affiche les métriques de performance du système"""
+    import pandas as pd
+    import plotly.express as px
+    import plotly.graph_objects as go
+
     st.markdown("### 📈 Performance du Système")
     
     # Métriques principales
@@ -715,6 +719,7 @@ def main():
                                     })
                             
                             if export_data:
+                                import pandas as pd
                                 df_export = pd.DataFrame(export_data)
                                 csv = df_export.to_csv(index=False, sep=';', encoding='utf-8-sig')
                                 st.download_button(
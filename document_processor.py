@@ -1,7 +1,12 @@
 ﻿import re
 from dataclasses import dataclass
-from typing import List, Dict
-from datetime import datetime
+from typing import List, Dict, Optional
+from datetime import date, timedelta
+
+try:
+    from src.processing.dates import date_from_parts
+except ImportError:
+    from processing.dates import date_from_parts
 
 @dataclass
 class ExtractedEntity:
@@ -12,6 +17,7 @@ class ExtractedEntity:
     start_pos: int = 0
     end_pos: int = 0
     source: str = "regex"
+    date_value: Optional[date] = None  # valeur typée des entités de type date
 
 class SmartEntityExtractor:
     """Smart entity extractor for CSPE documents."""
@@ -24,7 +30,7 @@ class SmartEntityExtractor:
             'septembre': '09', 'octobre': '10', 'novembre': '11', 'décembre': '12'
         }
 
-    def _parse_french_date(self, date_str: str) -> str:
+    def _parse_french_date(self, date_str: str) -> Optional[date]:
         """Parse une date française du type '1er janvier 2023' ou '1 janvier 2023'"""
         try:
             # Supprimer le 'er' si présent
@@ -34,14 +40,11 @@ class SmartEntityExtractor:
             if len(parts) != 3:
                 return None
 
-            day = parts[0].zfill(2)
             month = self.month_map.get(parts[1].lower())
-            year = parts[2]
-
             if not month:
                 return None
 
-            return f"{year}-{month}-{day}"
+            return date_from_parts(parts[0], month, parts[2])
         except Exception:
             return None
 
@@ -53,15 +56,16 @@ class SmartEntityExtractor:
         fr_pattern = r'\b(\d{1,2}(?:er)?\s+(?:janvier|février|mars|avril|mai|juin|juillet|août|septembre|octobre|novembre|décembre)\s+\d{4})\b'
         for match in re.finditer(fr_pattern, text, re.IGNORECASE):
             date_str = match.group(1)
-            formatted_date = self._parse_french_date(date_str)
-            if formatted_date:
+            parsed_date = self._parse_french_date(date_str)
+            if parsed_date:
                 results.append(ExtractedEntity(
                     type="date",
-                    value=formatted_date,
+                    value=parsed_date.isoformat(),
                     confidence=0.9,
                     start_pos=match.start(),
                     end_pos=match.end(),
-                    source="regex"
+                    source="regex",
+                    date_value=parsed_date
                 ))
 
         # 2. Format JJ/MM/AAAA ou JJ-MM-AAAA
@@ -77,7 +81,8 @@ class SmartEntityExtractor:
                 confidence=0.9,
                 start_pos=match.start(),
                 end_pos=match.end(),
-                source="regex"
+                source="regex",
+                date_value=date_from_parts(day, month, year)
             ))
 
         # 3. Format AAAA-MM-JJ (ISO)
@@ -93,7 +98,8 @@ class SmartEntityExtractor:
                 confidence=0.9,
                 start_pos=match.start(),
                 end_pos=match.end(),
-                source="regex"
+                source="regex",
+                date_value=date_from_parts(day, month, year)
             ))
 
         return results
@@ -330,13 +336,8 @@ class DocumentProcessor:
                     "is_on_time": False
                 }
 
-            dated_entities = []
-            for date_entity in dates:
-                try:
-                    dt = datetime.strptime(date_entity.value, '%Y-%m-%d')
-                    dated_entities.append((dt, date_entity))
-                except ValueError:
-                    continue
+            # Les dates inexistantes (ex. 31/02) n'ont pas de valeur typée
+            dated_entities = [(e.date_value, e) for e in dates if e.date_value is not None]
 
             if not dated_entities:
                 return {
@@ -351,9 +352,9 @@ class DocumentProcessor:
 
             # Date de référence pour le test (1er mars 2023)
             if test_mode:
-                today = datetime.strptime("2023-03-01", "%Y-%m-%d")
+                today = date(2023, 3, 1)
             else:
-                today = datetime.now()
+                today = date.today()
 
             # Calculer la différence en jours
             delta = (today - latest_date_dt).days
@@ -394,9 +395,9 @@ class DocumentProcessor:
         try:
             # Obtenir la date de référence
             if reference_date:
-                ref_date = datetime.strptime(reference_date, '%Y-%m-%d').date()
+                ref_date = date.fromisoformat(reference_date)
             else:
-                ref_date = datetime.now().date()
+                ref_date = date.today()
             
             # Extraire toutes les dates du texte
             dates = self.extract_dates(text)
@@ -408,11 +409,9 @@ class DocumentProcessor:
                     "date_reference": ref_date.isoformat()
                 }
             
-            # Trier les dates par ordre chronologique (plus ancienne d'abord)
-            sorted_dates = sorted([d for d in dates if d.value], 
-                                key=lambda x: x.value)
+            valid_dates = [d.date_value for d in dates if d.date_value is not None]
             
-            if not sorted_dates:
+            if not valid_dates:
                 return {
                     "is_prescrit": False,
                     "message": "Aucune date valide trouvée",
@@ -421,10 +420,9 @@ class DocumentProcessor:
                 }
             
             # Prendre la date la plus ancienne comme date de fait générateur
-            date_fait = datetime.strptime(sorted_dates[0].value, '%Y-%m-%d').date()
+            date_fait = min(valid_dates)
             
             # Calculer la date limite de prescription (4 ans après la date du fait)
-            from datetime import timedelta
             date_limite = date_fait + timedelta(days=4*365 + 1)  # +1 pour l'année bissextile
             
             # Vérifier si la date de référence est postérieure à la date limite
@@ -12,6 +12,8 @@ from typing import List, Dict, Any
 from datetime import datetime
 import re
 
+from src.processing.decoding import decode_file
+
 # Configuration des chemins
 BASE_DIR = Path(__file__).parent.absolute()
 TEST_CASES_DIR = BASE_DIR / "test_cases"
@@ -20,27 +22,13 @@ REPORTS_DIR = BASE_DIR / "reports"
 # Créer le répertoire de rapports si nécessaire
 REPORTS_DIR.mkdir(exist_ok=True)
 
-def clean_text(text: str) -> str:
-    """Nettoie le texte des caractères problématiques."""
-    if not isinstance(text, str):
-        return ""
-    # Supprimer les caractères nuls et autres caractères de contrôle
-    return ''.join(char for char in text if 31 < ord(char) < 127 or char in '\n\r\t ')
-
 def load_document(file_path: Path) -> str:
-    """Charge le contenu d'un fichier avec gestion d'erreur d'encodage."""
+    """Charge le contenu d'un fichier (encodage détecté, texte normalisé)."""
     try:
-        with open(file_path, 'r', encoding='utf-8-sig') as f:
-            content = f.read()
-        return clean_text(content)
-    except UnicodeDecodeError:
-        try:
-            with open(file_path, 'r', encoding='latin-1') as f:
-                content = f.read()
-            return clean_text(content)
-        except Exception as e:
-            print(f"Erreur lors de la lecture de {file_path}: {e}")
-            return ""
+        return decode_file(file_path)
+    except OSError as e:
+        print(f"Erreur lors de la lecture de {file_path}: {e}")
+        return ""
 
 def analyze_document_content(content: str) -> Dict[str, Any]:
     """Analyse le contenu d'un document pour détecter des motifs spécifiques."""
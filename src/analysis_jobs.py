@@ -0,0 +1,241 @@
+"""
+Exécution en arrière-plan des analyses de fichiers téléversés.
+
+Les interfaces Streamlit analysaient les fichiers pendant l'exécution du
+script : un envoi de 30 fichiers bloquait la session et un rafraîchissement
+du navigateur perdait tout le travail. Ici, chaque envoi devient un travail
+identifié (job_id) dont les fichiers sont analysés par un JobScheduler
+partagé par toutes les sessions :
+
+- les petits envois passent en classe interactive, les gros en classe lot,
+  de sorte qu'un envoi volumineux ne bloque pas les autres utilisateurs ;
+- l'état et les résultats de chaque travail sont écrits (de façon atomique)
+  dans un fichier JSON par job_id, relu après un rafraîchissement de la page
+  ou un redémarrage ;
+- les travaux interrompus par un redémarrage sont marqués comme tels (les
+  fichiers reçus ne sont conservés qu'en mémoire) ;
+- les rapports sont mémorisés par empreinte SHA-256 du contenu : un fichier
+  déjà analysé (même envoyé par une autre session) n'est pas réanalysé ;
+- l'export groupé des rapports d'un travail terminé est écrit en flux une
+  seule fois (export), au lieu d'être resérialisé à chaque affichage.
+
+Exemple d'utilisation:
+    runner = AnalysisJobRunner(analyzer.analyze_bytes)
+    job_id = runner.submit([('facture.pdf', contenu)])
+    etat = runner.status(job_id)
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import hashlib
+import threading
+from pathlib import Path
+from datetime import datetime
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+# Modules du répertoire src (ordonnanceur), quel que soit le point d'entrée
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from scheduler import BATCH, INTERACTIVE, JobScheduler
+from serialization import JSONObjectWriter, dumpb, loads, pack, unpack
+
+JOBS_DIR = Path(os.getenv('CSPE_JOBS_DIR', 'data/jobs'))
+INTERACTIVE_MAX_FILES = 3  # au-delà, l'envoi est traité en classe lot
+RETENTION_DAYS = 7
+MAX_CACHED_RESULTS = 256  # rapports mémorisés par empreinte de contenu
+EXPORTS_DIR = 'exports'  # exports groupés des travaux terminés
+
+EN_ATTENTE = 'en_attente'
+EN_COURS = 'en_cours'
+TERMINE = 'termine'
+ERREUR = 'erreur'
+INTERROMPU = 'interrompu'
+FINAL_STATES = (TERMINE, ERREUR, INTERROMPU)
+
+_JOB_ID = re.compile(r'^[0-9a-f]{32}$')
+
+
+class AnalysisJobRunner:
+    """
+    File de travaux d'analyse partagée entre sessions, persistée par job_id.
+
+    Args:
+        analyze_fn: Fonction (contenu, nom de fichier) -> rapport d'analyse
+        jobs_dir: Répertoire des fichiers d'état des travaux
+        scheduler: JobScheduler existant ; à défaut, un ordonnanceur propre
+            de `workers` travailleurs est créé
+        workers: Nombre de travailleurs de l'ordonnanceur créé
+        retention_days: Durée de conservation des travaux terminés
+    """
+
+    def __init__(self, analyze_fn: Callable[[Any, str], Dict[str, Any]], jobs_dir: Path = JOBS_DIR,
+                 scheduler: Optional[JobScheduler] = None, workers: int = 2,
+                 retention_days: int = RETENTION_DAYS):
+        self.analyze_fn = analyze_fn
+        self.jobs_dir = Path(jobs_dir)
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        self._owns_scheduler = scheduler is None
+        self.scheduler = scheduler or JobScheduler(workers=workers)
+        self._active: Dict[str, Dict[str, Any]] = {}
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+        self._recover(retention_days)
+
+    def submit(self, files: Iterable[Tuple[str, Any]]) -> str:
+        """
+        Met en file l'analyse d'un envoi de fichiers.
+
+        Args:
+            files: Couples (nom, contenu) ; le contenu (bytes ou memoryview)
+                est copié, le tampon du téléversement pouvant être libéré
+
+        Returns:
+            Identifiant du travail
+        """
+        files = [(name, bytes(data)) for name, data in files]
+        if not files:
+            raise ValueError("Aucun fichier à analyser")
+        job_id = uuid.uuid4().hex
+        now = datetime.now().isoformat()
+        job = {
+            'id': job_id,
+            'statut': EN_ATTENTE,
+            'cree_le': now,
+            'maj_le': now,
+            'fichiers': [{'nom': name, 'statut': EN_ATTENTE, 'resultat': None, 'erreur': None}
+                         for name, _ in files]
+        }
+        with self._lock:
+            self._active[job_id] = job
+            self._save(job)
+        kind = INTERACTIVE if len(files) <= INTERACTIVE_MAX_FILES else BATCH
+        for index, (name, data) in enumerate(files):
+            self.scheduler.submit(self._run_file, job_id, index, data, name, kind=kind)
+        return job_id
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """État d'un travail (en mémoire s'il est actif, sinon relu sur disque) ; None s'il est inconnu."""
+        if not _JOB_ID.match(job_id or ''):
+            return None
+        with self._lock:
+            job = self._active.get(job_id)
+            if job is not None:
+                return unpack(pack(job))  # copie profonde
+        try:
+            with open(self._path(job_id), 'rb') as f:
+                return loads(f.read())
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def export(self, job_id: str) -> Optional[Path]:
+        """
+        Fichier JSON {nom: rapport} des fichiers analysés d'un travail terminé.
+
+        Le fichier est écrit en flux, rapport par rapport, à la première
+        demande puis réutilisé.
+
+        Returns:
+            Chemin du fichier, ou None si le travail est inconnu ou en cours
+        """
+        job = self.status(job_id)
+        if job is None or job['statut'] not in FINAL_STATES:
+            return None
+        path = self.jobs_dir / EXPORTS_DIR / f'{job_id}.json'
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            tmp_path = path.with_name(path.name + '.tmp')
+            with open(tmp_path, 'wb') as f, JSONObjectWriter(f, lines=True) as writer:
+                for entry in job['fichiers']:
+                    if entry['statut'] == TERMINE and entry['resultat'] is not None:
+                        writer.write(entry['nom'], entry['resultat'])
+            os.replace(tmp_path, path)
+        return path
+
+    def shutdown(self, wait: bool = True):
+        """Arrête l'ordonnanceur s'il a été créé par ce gestionnaire."""
+        if self._owns_scheduler:
+            self.scheduler.shutdown(wait=wait)
+
+    def _run_file(self, job_id: str, index: int, data: bytes, name: str):
+        self._update(job_id, index, statut=EN_COURS)
+        # L'extension fait partie de la clé : elle oriente la reconnaissance du format
+        key = (hashlib.sha256(data).hexdigest(), Path(name).suffix.lower())
+        with self._lock:
+            result = self._results.get(key)
+        if result is None:
+            try:
+                result = self.analyze_fn(data, name)
+            except Exception as e:
+                self._update(job_id, index, statut=ERREUR, erreur=str(e))
+                return
+            if 'error' not in result:
+                with self._lock:
+                    self._results[key] = result
+                    while len(self._results) > MAX_CACHED_RESULTS:
+                        self._results.popitem(last=False)
+        self._update(job_id, index, statut=TERMINE, resultat=result)
+
+    def _update(self, job_id: str, index: int, **changes):
+        with self._lock:
+            job = self._active[job_id]
+            job['fichiers'][index].update(changes)
+            states = [entry['statut'] for entry in job['fichiers']]
+            if all(state in FINAL_STATES for state in states):
+                job['statut'] = ERREUR if all(state == ERREUR for state in states) else TERMINE
+                del self._active[job_id]
+            elif EN_COURS in states or any(state in FINAL_STATES for state in states):
+                job['statut'] = EN_COURS
+            job['maj_le'] = datetime.now().isoformat()
+            self._save(job)
+
+    def _path(self, job_id: str) -> Path:
+        return self.jobs_dir / f'{job_id}.json'
+
+    def _save(self, job: Dict[str, Any]):
+        # Écriture atomique : un lecteur ne voit jamais un fichier tronqué
+        path = self._path(job['id'])
+        tmp_path = path.with_name(path.name + '.tmp')
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(dumpb(job))
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Erreur lors de l'enregistrement du travail {job['id']}: {e}")
+
+    def _recover(self, retention_days: int):
+        """Marque les travaux interrompus par un redémarrage et purge les anciens."""
+        limit = time.time() - retention_days * 86400
+        for path in (self.jobs_dir / EXPORTS_DIR).glob('*.json'):
+            try:
+                if path.stat().st_mtime < limit:
+                    path.unlink()
+            except OSError:
+                continue
+        for path in self.jobs_dir.glob('*.json'):
+            try:
+                if path.stat().st_mtime < limit:
+                    path.unlink()
+                    continue
+                with open(path, 'rb') as f:
+                    job = loads(f.read())
+            except (OSError, json.JSONDecodeError):
+                continue
+            if job.get('statut') in FINAL_STATES:
+                continue
+            for entry in job.get('fichiers', []):
+                if entry.get('statut') not in FINAL_STATES:
+                    entry['statut'] = INTERROMPU
+            job['statut'] = INTERROMPU
+            job['maj_le'] = datetime.now().isoformat()
+            self._save(job)
+
+
+def progress(job: Dict[str, Any]) -> Tuple[int, int]:
+    """(fichiers traités, total) d'un travail."""
+    files = job.get('fichiers', [])
+    return sum(entry['statut'] in FINAL_STATES for entry in files), len(files)
@@ -8,34 +8,41 @@ Exemples d'utilisation:
     # Importer depuis un dossier
     python -m src.batch_import --input D:\chemin\vers\dossier --output rapports
     
-    # Importer depuis une archive ZIP
+    # Importer depuis une archive ZIP ou .tar.gz (lue en flux, sans extraction)
     python -m src.batch_import --input archive.zip --output rapports --zip
     
+    # Reprendre un import interrompu avec 8 processus d'extraction
+    python -m src.batch_import --input D:\chemin\vers\dossier --output rapports --workers 8
+    
+    # Traiter d'abord les dossiers proches de l'échéance de recours et les dossiers désignés
+    python -m src.batch_import --input D:\chemin\vers\dossier --prioritize --urgent "*/URGENT_*"
+    
     # Afficher l'aide
     python -m src.batch_import --help
+
+Les résultats sont ajoutés au fil de l'eau à <output>/resultats.jsonl et les
+fichiers terminés consignés dans <output>/.journal_import.jsonl ; une nouvelle
+exécution vers le même dossier de sortie ne reclassifie que les fichiers
+nouveaux, modifiés (taille/date puis empreinte SHA-256) ou traités par une
+autre version du modèle : une relance quotidienne sur une archive stable ne
+fait que des stat().
 """
 
 import sys
 import os
 import zipfile
+import tarfile
+import fnmatch
 import argparse
-import tempfile
-import shutil
 import json
-from pathlib import Path
-from typing import List, Dict, Any, Optional, Union
-from datetime import datetime
+import logging
+from pathlib import Path, PurePosixPath
+from typing import List, Dict, Any, Callable, Optional, Union
+from datetime import date, datetime
 
 # Ajout du répertoire racine au PYTHONPATH
 sys.path.insert(0, str(Path(__file__).resolve().parent))
 
-try:
-    import pandas as pd
-    PANDAS_AVAILABLE = True
-except ImportError:
-    PANDAS_AVAILABLE = False
-    print("Avertissement: pandas n'est pas installé. Un rapport simplifié sera généré.")
-
 try:
     from models.classifier import CSPEClassifier
 except ImportError as e:
@@ -43,20 +50,70 @@ except ImportError as e:
     print("Assurez-vous que le module 'models' est dans le PYTHONPATH")
     sys.exit(1)
 
+from result_sink import ResultSink, summarize_results
+from pipeline_metrics import PipelineMetrics
+from scheduler import JobScheduler, estimate_deadline, PREVIEW_CHARS
+from processing.decoding import decode_bytes, decode_file
+from batch_pipeline import (
+    BatchPipeline, CheckpointJournal, PipelineItem, read_text_file, decode_member, extract_entities, iter_archive
+)
+
+JOURNAL_NAME = '.journal_import.jsonl'
+# À incrémenter quand le format des résultats ou la chaîne d'analyse change :
+# les fichiers traités par une version antérieure sont alors reclassifiés
+RESULT_VERSION = '2'
+URGENT_PRIORITY = 10  # priorité des fichiers désignés par --urgent
+CRITERIA_KEYS = {
+    'delai': 'delai_reclamation',
+    'periode': 'periode_couverte',
+    'prescription': 'prescription_quadriennale',
+    'repercussion': 'repercussion_client_final'
+}
+
 class BatchImporter:
     """Classe pour l'import par lot de documents."""
     
-    def __init__(self):
-        """Initialise l'importateur avec le classifieur."""
+    def __init__(self, workers: Optional[int] = None, llm_concurrency: int = 4, resume: bool = True,
+                 parquet: bool = False, progress: bool = False, metrics_file: Optional[Path] = None,
+                 metrics_interval: float = 5.0, prioritize: bool = False, urgent: Optional[List[str]] = None,
+                 scheduler: Optional[JobScheduler] = None):
+        """
+        Initialise l'importateur avec le classifieur.
+        
+        Args:
+            workers: Nombre de processus d'extraction (défaut: nombre de CPU)
+            llm_concurrency: Nombre d'appels simultanés au modèle (ignoré avec un
+                ordonnanceur partagé, dimensionné par son propriétaire)
+            resume: Sauter les fichiers déjà consignés dans le journal de reprise
+            parquet: Écrire aussi les résultats en Parquet (pyarrow requis)
+            progress: Barre de progression au lieu d'une ligne par fichier
+            metrics_file: Export périodique des métriques (.json ou .prom)
+            metrics_interval: Période d'export des métriques en secondes
+            prioritize: Trier les fichiers d'un répertoire par urgence avant traitement
+            urgent: Motifs (glob) des fichiers à traiter en priorité
+            scheduler: Ordonnanceur partagé avec les requêtes interactives ;
+                par défaut, un ordonnanceur propre à chaque lot
+        """
         self.classifier = CSPEClassifier()
-        self.results: List[Dict[str, Any]] = []
+        self.workers = workers
+        self.llm_concurrency = llm_concurrency
+        self.resume = resume
+        self.parquet = parquet
+        self.progress = progress
+        self.metrics_file = metrics_file
+        self.metrics_interval = metrics_interval
+        self.prioritize = prioritize
+        self.urgent = urgent or []
+        self.scheduler = scheduler
+        # Résultats écrits au fil de l'eau dans <output>/resultats.jsonl
+        self.sink: Optional[ResultSink] = None
+        self.result_refs = None  # pointeurs des résultats à jour (manifeste)
     
     def process_file(self, file_path: Path, category: str = None) -> Optional[Dict[str, Any]]:
         """Traite un fichier et retourne le résultat de la classification."""
         try:
-            # Lire le contenu du fichier
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            # Lire le contenu du fichier (encodage détecté)
+            content = decode_file(file_path)
             
             # Si aucune catégorie n'est fournie, essayer de la détecter
             if category is None:
@@ -64,111 +121,188 @@ class BatchImporter:
                 parent_dir = file_path.parent.name
                 category = self._detect_category(parent_dir)
             
-            # Classer le document
-            result = self.classifier.classify(content)
-            
-            # Créer le résultat final
-            return {
-                'fichier': file_path.name,
-                'chemin': str(file_path),
-                'categorie': category,
-                'decision': result.decision,
-                'confiance': result.confidence,
-                'criteres': {
-                    'delai': {
-                        'valide': result.criteria_met.get('delai', False),
-                        'details': result.criteria_details.get('delai', '')
-                    },
-                    'periode': {
-                        'valide': result.criteria_met.get('periode', False),
-                        'details': result.criteria_details.get('periode', '')
-                    },
-                    'prescription': {
-                        'valide': result.criteria_met.get('prescription', False),
-                        'details': result.criteria_details.get('prescription', '')
-                    },
-                    'repercussion': {
-                        'valide': result.criteria_met.get('repercussion', False),
-                        'details': result.criteria_details.get('repercussion', '')
-                    }
-                },
-                'date_traitement': datetime.now().isoformat()
-            }
+            return self._format_result(file_path, category, self.classifier.classify(content))
             
         except Exception as e:
             print(f"Erreur lors du traitement du fichier {file_path}: {e}")
             return None
     
     def process_directory(self, input_dir: Path, output_dir: Path, category: str = None):
-        """Traite tous les fichiers d'un répertoire et de ses sous-répertoires."""
+        """
+        Traite tous les fichiers d'un répertoire et de ses sous-répertoires.
+        
+        Les fichiers passent par le pipeline en étapes (lecture, extraction en
+        processus parallèles, classification concurrente) ; chaque fichier
+        terminé est consigné dans le journal de reprise du dossier de sortie.
+        Avec prioritize, les fichiers sont d'abord triés par urgence (début du
+        texte lu pour estimer l'échéance de recours) au lieu de l'ordre du
+        système de fichiers.
+        """
         print(f"\nTraitement du répertoire: {input_dir}")
         
         # Détecter la catégorie à partir du nom du dossier si non spécifiée
         if category is None:
             category = self._detect_category(input_dir.name)
         
-        # Parcourir tous les fichiers .txt dans le répertoire et ses sous-répertoires
-        for file_path in input_dir.rglob('*.txt'):
-            # Ne traiter que les fichiers, pas les dossiers
-            if file_path.is_file():
-                print(f"Traitement du fichier: {file_path}")
-                result = self.process_file(file_path, category)
-                if result:
-                    self.results.append(result)
-                    print(f"  - Décision: {result['decision']} (Confiance: {result['confiance']:.2f})")
+        def discover():
+            # Parcourir tous les fichiers .txt dans le répertoire et ses sous-répertoires
+            for file_path in input_dir.rglob('*.txt'):
+                # Ne traiter que les fichiers, pas les dossiers
+                if file_path.is_file():
+                    stat = file_path.stat()
+                    yield PipelineItem(key=str(file_path), path=file_path, category=category,
+                                       size=stat.st_size, mtime=stat.st_mtime,
+                                       priority=self._user_priority(str(file_path)))
+        
+        def prioritized(journal):
+            items = [item for item in discover() if not journal.is_done(item)]
+            for item in items:
+                with open(item.path, 'rb') as f:
+                    bonus, item.deadline = estimate_deadline(decode_bytes(f.read(PREVIEW_CHARS)))
+                item.priority += bonus
+            items.sort(key=lambda item: (-item.priority, item.deadline or date.max))
+            return iter(items)
+        
+        self._run_pipeline(prioritized if self.prioritize else lambda journal: discover(),
+                           read_text_file, output_dir)
     
     def process_zip(self, zip_path: Path, output_dir: Path):
         """
-        Traite une archive ZIP contenant des documents.
+        Traite une archive ZIP ou tar(.gz) contenant des documents.
+        
+        Les membres sont lus en flux depuis l'archive, sans extraction sur
+        disque ; les archives imbriquées sont parcourues et les membres dont
+        l'en-tête n'est pas du texte sont ignorés. Une archive se lit dans
+        l'ordre : la priorité s'applique à la classification (ordonnanceur).
         
         Args:
-            zip_path: Chemin vers l'archive ZIP
+            zip_path: Chemin vers l'archive
             output_dir: Répertoire de sortie pour les rapports
         """
         print(f"\nTraitement de l'archive: {zip_path}")
         
-        # Créer un répertoire temporaire
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
-            
-            # Extraire l'archive
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                zip_ref.extractall(temp_path)
-            
-            # Traiter les dossiers extraits
-            for item in temp_path.glob('*'):
-                if item.is_dir():
-                    self.process_directory(item, output_dir)
+        def category_of(member_name: str) -> str:
+            # Catégorie du dossier de premier niveau de l'archive
+            parts = PurePosixPath(member_name.split('!')[0]).parts
+            return self._detect_category(parts[0] if len(parts) > 1 else zip_path.stem)
+        
+        def discover(journal):
+            for item in iter_archive(zip_path, category_of, journal.is_done, archive_stats):
+                item.priority = self._user_priority(item.key)
+                yield item
+        
+        archive_stats = {}
+        self._run_pipeline(discover, decode_member, output_dir)
+        if archive_stats.get('ignores'):
+            print(f"{archive_stats['ignores']} membre(s) non textuel(s) ignoré(s)")
+    
+    def _run_pipeline(self, discover: Callable, read_fn: Callable, output_dir: Path):
+        """
+        Exécute le pipeline en étapes avec journal de reprise.
+        
+        Args:
+            discover: journal -> itérateur de PipelineItem
+            read_fn: étape lecture/décodage
+            output_dir: Répertoire de sortie (contient le journal et les résultats)
+        """
+        journal_path = output_dir / JOURNAL_NAME
+        if not self.resume and journal_path.exists():
+            journal_path.unlink()
+        journal = CheckpointJournal(journal_path, version=f"{self.classifier.model_name}/{RESULT_VERSION}")
+        if self.sink is None:
+            # Les résultats des exécutions précédentes restent dans le JSONL
+            self.sink = ResultSink(output_dir, parquet=self.parquet, truncate=not self.resume)
+        
+        def classify(item: PipelineItem, job_context=None) -> Dict[str, Any]:
+            # job_context : l'appel au modèle cède sa place aux requêtes interactives
+            classification = self.classifier.classify(item.text, job_context=job_context)
+            result = self._format_result(item.path, item.category, classification)
+            result['chemin'] = item.key
+            result['entites'] = item.entities
+            return result
+        
+        def sink(item: PipelineItem):
+            if item.error:
+                print(f"Erreur lors du traitement du fichier {item.key}: {item.error}")
+                return None
+            if not self.progress:
+                print(f"Traité: {item.key}")
+                print(f"  - Décision: {item.result['decision']} (Confiance: {item.result['confiance']:.2f})")
+            return self.sink.write(item.result)
+        
+        metrics = PipelineMetrics(self.metrics_file, self.metrics_interval, progress=self.progress)
+        # Ordonnanceur propre au lot, sauf s'il est partagé (requêtes interactives).
+        # Sans requête interactive, aucun travailleur n'est réservé : --llm-concurrency
+        # reste le nombre d'appels simultanés du lot
+        scheduler = self.scheduler or JobScheduler(workers=self.llm_concurrency, reserved_interactive=0)
+        pipeline = BatchPipeline(read_fn, extract_entities, classify, sink, journal=journal,
+                                 extract_workers=self.workers, classify_concurrency=self.llm_concurrency,
+                                 metrics=metrics, scheduler=scheduler)
+        try:
+            stats = pipeline.run(discover(journal))
+            self.result_refs = journal.result_refs()
+        finally:
+            journal.close()
+            if scheduler is not self.scheduler:
+                scheduler.shutdown(wait=False)
+        print(f"{stats['traites']} fichier(s) traité(s), "
+              f"{stats['deja_traites'] + stats['inchanges']} inchangé(s), {stats['erreurs']} erreur(s)")
+        snap = metrics.snapshot()
+        print("Temps par étape: " + ", ".join(
+            f"{stage} p50={values['p50_ms']:.0f}ms p95={values['p95_ms']:.0f}ms"
+            for stage, values in snap['etapes'].items()))
     
     def generate_reports(self, output_dir: Path):
         """
         Génère les rapports de résultats.
         
+        Les rapports sont produits par une passe en flux sur resultats.jsonl :
+        la mémoire utilisée ne dépend pas du nombre de fichiers.
+        
         Args:
             output_dir: Répertoire de sortie pour les rapports
         """
-        if not self.results:
-            print("Aucun résultat à rapporter.")
-            return
+        if self.sink is not None:
+            self.sink.close()
+            self.sink = None
         
         # Créer le répertoire de sortie
         output_dir.mkdir(parents=True, exist_ok=True)
         
-        # Générer le rapport JSON
-        json_path = output_dir / 'rapport_complet.json'
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(self.results, f, ensure_ascii=False, indent=2)
-        print(f"\nRapport JSON généré: {json_path}")
-        
-        # Générer le rapport CSV si pandas est disponible
-        if PANDAS_AVAILABLE and self.results:
-            try:
-                df = pd.DataFrame(self.results)
-                csv_path = output_dir / 'synthese_resultats.csv'
-                df.to_csv(csv_path, index=False, encoding='utf-8-sig')
-                print(f"Rapport CSV généré: {csv_path}")
-            except Exception as e:
-                print(f"Erreur lors de la génération du rapport CSV: {e}")
+        # Seul le dernier résultat de chaque fichier figure dans les rapports
+        summary = summarize_results(output_dir, live_refs=self.result_refs)
+        if summary is None:
+            print("Aucun résultat à rapporter.")
+            return
+        
+        print(f"\nRésultats JSONL: {output_dir / 'resultats.jsonl'}")
+        print(f"Rapport JSON généré: {output_dir / 'rapport_complet.json'}")
+        print(f"Rapport CSV généré: {output_dir / 'synthese_resultats.csv'}")
+        print(f"Synthèse: {summary['total']} fichier(s), décisions {summary['decisions']}")
+    
+    def _user_priority(self, key: str) -> int:
+        """Priorité explicite : fichiers désignés comme urgents par l'utilisateur."""
+        name = key.replace(os.sep, '/')
+        return URGENT_PRIORITY if any(fnmatch.fnmatch(name, pattern) for pattern in self.urgent) else 0
+    
+    def _format_result(self, file_path: Path, category: str, result) -> Dict[str, Any]:
+        """Convertit un ClassificationResult en ligne de rapport."""
+        criteres = {}
+        for name, key in CRITERIA_KEYS.items():
+            critere = result.criteres.get(key, {})
+            criteres[name] = {
+                'valide': critere.get('verdict') == 'respecté',
+                'details': critere.get('explication', '')
+            }
+        return {
+            'fichier': file_path.name,
+            'chemin': str(file_path),
+            'categorie': category,
+            'decision': getattr(result.decision, 'value', result.decision),
+            'confiance': result.confiance,
+            'criteres': criteres,
+            'date_traitement': datetime.now().isoformat()
+        }
     
     def _detect_category(self, dir_name: str) -> str:
         """Détecte la catégorie à partir du nom du dossier."""
@@ -197,7 +331,58 @@ def parse_args():
     parser.add_argument(
         '--zip', 
         action='store_true',
-        help="Indique que l'entrée est une archive ZIP"
+        help="Indique que l'entrée est une archive (ZIP, .tar.gz, éventuellement imbriquées)"
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help="Nombre de processus d'extraction (défaut: nombre de CPU)"
+    )
+    parser.add_argument(
+        '--llm-concurrency',
+        type=int,
+        default=4,
+        help="Nombre d'appels simultanés au modèle (défaut: 4)"
+    )
+    parser.add_argument(
+        '--parquet',
+        action='store_true',
+        help="Écrire aussi les résultats en Parquet (pyarrow requis)"
+    )
+    parser.add_argument(
+        '--progress',
+        action='store_true',
+        help="Afficher une barre de progression (débit, latence LLM, files) au lieu d'une ligne par fichier"
+    )
+    parser.add_argument(
+        '--metrics-file',
+        type=str,
+        default=None,
+        help="Fichier de métriques mis à jour périodiquement (.json, ou .prom pour Prometheus)"
+    )
+    parser.add_argument(
+        '--metrics-interval',
+        type=float,
+        default=5.0,
+        help="Période de mise à jour des métriques en secondes (défaut: 5)"
+    )
+    parser.add_argument(
+        '--prioritize',
+        action='store_true',
+        help="Traiter d'abord les dossiers proches de la fin du délai de recours"
+    )
+    parser.add_argument(
+        '--urgent',
+        action='append',
+        default=[],
+        metavar='MOTIF',
+        help="Motif (glob) de fichiers à traiter en priorité, répétable"
+    )
+    parser.add_argument(
+        '--no-resume',
+        action='store_true',
+        help="Ignorer le journal de reprise et tout retraiter"
     )
     return parser.parse_args()
 
@@ -207,6 +392,11 @@ def main():
         # Parser les arguments
         args = parse_args()
         
+        logging.basicConfig(
+            level=logging.INFO,
+            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        )
+        
         # Vérifier que le fichier/dossier source existe
         input_path = Path(args.input).resolve()
         if not input_path.exists():
@@ -217,12 +407,16 @@ def main():
         output_dir = Path(args.output).resolve()
         
         # Initialiser l'importateur
-        importer = BatchImporter()
+        importer = BatchImporter(workers=args.workers, llm_concurrency=args.llm_concurrency,
+                                 resume=not args.no_resume, parquet=args.parquet, progress=args.progress,
+                                 metrics_file=Path(args.metrics_file) if args.metrics_file else None,
+                                 metrics_interval=args.metrics_interval, prioritize=args.prioritize,
+                                 urgent=args.urgent)
         
         # Lancer l'import
         if args.zip:
-            if not zipfile.is_zipfile(input_path):
-                print(f"Erreur: {input_path} n'est pas une archive ZIP valide.")
+            if not (zipfile.is_zipfile(input_path) or tarfile.is_tarfile(input_path)):
+                print(f"Erreur: {input_path} n'est pas une archive ZIP ou tar valide.")
                 return 1
             importer.process_zip(input_path, output_dir)
         else:
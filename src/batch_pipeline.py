@@ -0,0 +1,576 @@
+"""
+Pipeline d'import par lot en étapes parallèles et reprenables.
+
+Le traitement d'un lot est découpé en cinq étapes reliées par des files
+bornées, chacune avec son propre groupe de travailleurs :
+
+    découverte -> lecture/décodage -> extraction -> classification -> sortie
+    (itérateur)    (threads, E/S)     (processus)   (asyncio, LLM)    (thread principal)
+
+Les files bornées assurent la contre-pression : une étape lente (le LLM en
+général) ralentit la découverte au lieu de remplir la mémoire. Un journal
+manifeste (JSONL, une ligne par fichier terminé : taille, date, empreinte,
+version du modèle, pointeur vers le résultat) permet à une nouvelle
+exécution de ne reclassifier que les fichiers nouveaux, modifiés ou traités
+par une version antérieure du modèle.
+
+Les archives (ZIP, .tar.gz, imbriquées) sont lues membre par membre en
+une seule passe séquentielle, sans extraction sur disque : seuls les
+membres dont l'en-tête ressemble à du texte entrent dans le pipeline.
+
+Exemple d'utilisation:
+    pipeline = BatchPipeline(read_text_file, extract_entities, classify, sink,
+                             journal=CheckpointJournal(Path('rapports/.journal_import.jsonl')))
+    stats = pipeline.run(items)
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import hashlib
+import queue
+import gzip
+import zlib
+import codecs
+import shutil
+import tarfile
+import zipfile
+import tempfile
+import asyncio
+import threading
+from pathlib import Path, PurePosixPath
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+# Extracteur d'entités (module document_processor à la racine du projet)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scheduler import BATCH, Preempted, accepts_context, deadline_from_dates
+from processing.decoding import decode_bytes, decode_file
+from serialization import dumps, loads
+
+_STOP = object()  # marqueur de fin de flux entre deux étapes
+
+
+@dataclass
+class PipelineItem:
+    """Fichier en cours de traitement dans le pipeline."""
+    key: str
+    path: Path
+    category: str = 'inconnu'
+    size: int = 0
+    mtime: float = 0.0
+    data: Optional[bytes] = None  # contenu brut d'un membre d'archive
+    text: Optional[str] = None
+    entities: Dict[str, Any] = field(default_factory=dict)
+    result: Optional[Dict[str, Any]] = None
+    result_ref: Any = None  # pointeur vers le résultat dans la sortie
+    content_hash: Optional[str] = None
+    unchanged: bool = False  # contenu identique à la dernière exécution
+    priority: int = 0  # priorité explicite + bonus d'urgence
+    deadline: Any = None  # échéance de recours estimée (date)
+    error: Optional[str] = None
+
+    @property
+    def pending(self) -> bool:
+        """L'élément doit encore passer par les étapes suivantes."""
+        return self.error is None and not self.unchanged
+
+
+class CheckpointJournal:
+    """
+    Journal manifeste en ajout seul (une ligne JSON par fichier terminé).
+
+    Chaque entrée enregistre la taille, la date de modification, l'empreinte
+    SHA-256 du contenu, la version du classifieur et un pointeur vers le
+    résultat. Un fichier est sauté sans être relu si sa taille, sa date et
+    la version correspondent ; si seule sa date a changé, il est relu et
+    haché mais pas reclassifié lorsque son empreinte est identique. La
+    dernière ligne d'une clé fait foi ; le fichier est compacté à
+    l'ouverture lorsque les lignes périmées sont majoritaires.
+
+    Chaque ligne est écrite puis vidée sur disque immédiatement, de sorte
+    qu'un arrêt brutal ne perd au plus que le fichier en cours.
+    """
+
+    def __init__(self, path: Path, version: Optional[str] = None):
+        self.path = Path(path)
+        self.version = version
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        lines = 0
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = loads(line)
+                    except json.JSONDecodeError:
+                        continue  # dernière ligne tronquée par un arrêt brutal
+                    self.entries[entry['cle']] = entry
+                    lines += 1
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if lines > 2 * len(self.entries):
+            self._compact()
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def _compact(self):
+        """Réécrit le journal avec une seule ligne par clé."""
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for entry in self.entries.values():
+                f.write(dumps(entry) + '\n')
+        os.replace(tmp_path, self.path)
+
+    def _current(self, item: PipelineItem) -> Optional[Dict[str, Any]]:
+        entry = self.entries.get(item.key)
+        if entry is None or entry.get('version') != self.version:
+            return None
+        return entry
+
+    def is_done(self, item: PipelineItem) -> bool:
+        """Indique si le fichier a déjà été traité dans son état actuel (sans le relire)."""
+        entry = self._current(item)
+        return entry is not None and entry['taille'] == item.size and entry['mtime'] == item.mtime
+
+    def is_unchanged(self, item: PipelineItem) -> bool:
+        """Indique si le contenu relu est identique à celui déjà traité."""
+        entry = self._current(item)
+        return entry is not None and item.content_hash is not None and entry.get('sha256') == item.content_hash
+
+    def mark_done(self, item: PipelineItem):
+        """Enregistre la fin du traitement d'un fichier."""
+        # Le résultat complet est dans la sortie : seuls décision et pointeur sont conservés ici
+        self._append({'cle': item.key, 'taille': item.size, 'mtime': item.mtime, 'sha256': item.content_hash,
+                      'version': self.version, 'decision': (item.result or {}).get('decision'),
+                      'resultat': item.result_ref})
+
+    def touch(self, item: PipelineItem):
+        """Met à jour taille et date d'un fichier au contenu inchangé."""
+        entry = dict(self.entries[item.key], taille=item.size, mtime=item.mtime)
+        self._append(entry)
+
+    def result_refs(self) -> set:
+        """Pointeurs des résultats à jour (un par fichier)."""
+        return {entry['resultat'] for entry in self.entries.values() if entry.get('resultat') is not None}
+
+    def _append(self, entry: Dict[str, Any]):
+        self._file.write(dumps(entry) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.entries[entry['cle']] = entry
+
+    def close(self):
+        """Ferme le fichier journal."""
+        self._file.close()
+
+
+def read_text_file(item: PipelineItem) -> str:
+    """Étape lecture/décodage par défaut : fichier texte, encodage détecté."""
+    return decode_file(item.path)
+
+
+def decode_member(item: PipelineItem) -> str:
+    """Étape lecture/décodage pour un membre d'archive déjà lu en mémoire."""
+    data, item.data = item.data, None
+    return decode_bytes(data)
+
+
+# Reconnaissance des membres d'archive par leur en-tête
+SNIFF_SIZE = 4096
+ZIP_MAGIC = b'PK\x03\x04'
+GZIP_MAGIC = b'\x1f\x8b'
+TEXT_BOMS = (codecs.BOM_UTF8, codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)
+# Au-delà, une archive imbriquée dans une autre est copiée sur disque
+# (ZipFile a besoin d'un fichier adressable pour lire le répertoire central)
+NESTED_SPOOL_SIZE = 64 * 1024 * 1024
+# Membre illisible (archive imbriquée tronquée, gzip corrompu...) : résultat en erreur
+MEMBER_ERRORS = (zipfile.BadZipFile, tarfile.TarError, zlib.error, EOFError, OSError)
+
+
+def sniff_kind(head: bytes) -> str:
+    """Type d'un contenu d'après ses premiers octets : 'zip', 'tar', 'gzip', 'text' ou 'binary'."""
+    if head.startswith(ZIP_MAGIC):
+        return 'zip'
+    if head.startswith(GZIP_MAGIC):
+        return 'gzip'
+    if head[257:262] == b'ustar':
+        return 'tar'
+    if head.startswith(TEXT_BOMS):
+        return 'text'
+    if b'\x00' in head:
+        return 'binary'
+    try:
+        # Décodage incrémental : un caractère coupé en fin d'en-tête est toléré
+        codecs.getincrementaldecoder('utf-8')().decode(head, final=False)
+        return 'text'
+    except UnicodeDecodeError:
+        pass
+    # Encodage 8 bits (Windows-1252, Latin-1) : presque uniquement des caractères imprimables
+    controls = sum(1 for b in head if b < 32 and b not in (9, 10, 12, 13))
+    return 'text' if controls <= len(head) // 100 else 'binary'
+
+
+class _HeadStream(io.RawIOBase):
+    """Flux relisant l'en-tête déjà consommé puis la suite du flux d'origine."""
+
+    def __init__(self, head: bytes, stream):
+        self._head = memoryview(head)
+        self._stream = stream
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._head:
+            n = min(len(buffer), len(self._head))
+            buffer[:n] = self._head[:n]
+            self._head = self._head[n:]
+            return n
+        return self._stream.readinto(buffer)
+
+
+def iter_archive(path: Path, category_fn: Callable[[str], str], skip: Optional[Callable] = None,
+                 stats: Optional[Dict[str, int]] = None) -> Iterator[PipelineItem]:
+    """
+    Parcourt une archive ZIP ou tar (éventuellement compressée) sans l'extraire.
+
+    Les membres sont lus dans l'ordre de l'archive ; les archives imbriquées
+    sont parcourues récursivement et les membres binaires sont ignorés. Un
+    membre illisible (archive imbriquée tronquée, gzip corrompu) donne un
+    élément en erreur, sans interrompre le parcours.
+
+    Args:
+        path: Chemin de l'archive
+        category_fn: nom du membre -> catégorie
+        skip: item -> bool ; un membre texte déjà traité (journal) n'est pas lu
+        stats: Compteurs optionnels ('ignores' est incrémenté)
+    """
+    context = {'key': str(path), 'category_fn': category_fn, 'skip': skip,
+               'stats': stats if stats is not None else {}}
+    with open(path, 'rb') as f:
+        kind = sniff_kind(f.read(SNIFF_SIZE))
+        f.seek(0)
+        if kind == 'zip':
+            yield from _iter_zip(f, '', context)
+        else:
+            yield from _iter_tar(f, '', context)
+
+
+def _member_items(name, head, stream, size, mtime, prefix, context):
+    """Élément de pipeline pour un membre, ou parcours récursif d'une archive imbriquée."""
+    kind = sniff_kind(head)
+    full_name = prefix + name
+    if kind == 'text':
+        item = PipelineItem(key=f"{context['key']}!{full_name}", path=PurePosixPath(full_name),
+                            category=context['category_fn'](full_name), size=size, mtime=mtime)
+        if context['skip'] is None or not context['skip'](item):
+            item.data = head + stream.read()
+        yield item
+    elif kind == 'zip':
+        with tempfile.SpooledTemporaryFile(max_size=NESTED_SPOOL_SIZE) as spool:
+            shutil.copyfileobj(_HeadStream(head, stream), spool)
+            spool.seek(0)
+            yield from _iter_zip(spool, full_name + '!', context)
+    elif kind == 'tar':
+        yield from _iter_tar(io.BufferedReader(_HeadStream(head, stream)), full_name + '!', context)
+    elif kind == 'gzip':
+        # tar compressé ou simple fichier compressé (notes.txt.gz) : reconnu après décompression
+        unpacked = gzip.GzipFile(fileobj=io.BufferedReader(_HeadStream(head, stream)))
+        yield from _member_items(name, unpacked.read(SNIFF_SIZE), unpacked, size, mtime, prefix, context)
+    else:
+        context['stats']['ignores'] = context['stats'].get('ignores', 0) + 1
+
+
+def _member_error(name, error, prefix, context):
+    """Élément en erreur pour un membre illisible."""
+    full_name = prefix + name
+    return PipelineItem(key=f"{context['key']}!{full_name}", path=PurePosixPath(full_name),
+                        category=context['category_fn'](full_name), error=f"{type(error).__name__}: {error}")
+
+
+def _iter_zip(fileobj, prefix, context):
+    with zipfile.ZipFile(fileobj) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            try:
+                with archive.open(info) as member:
+                    head = member.read(SNIFF_SIZE)
+                    mtime = time.mktime(info.date_time + (0, 0, -1))
+                    yield from _member_items(info.filename, head, member, info.file_size, mtime, prefix, context)
+            except MEMBER_ERRORS as e:
+                yield _member_error(info.filename, e, prefix, context)
+
+
+def _iter_tar(fileobj, prefix, context):
+    # Mode flux 'r|*' : lecture strictement séquentielle, compression détectée
+    with tarfile.open(fileobj=fileobj, mode='r|*') as archive:
+        for info in archive:
+            if not info.isfile():
+                continue
+            try:
+                member = archive.extractfile(info)
+                head = member.read(SNIFF_SIZE)
+                yield from _member_items(info.name, head, member, info.size, float(info.mtime), prefix, context)
+            except MEMBER_ERRORS as e:
+                yield _member_error(info.name, e, prefix, context)
+
+
+_extractor = None  # un extracteur par processus de travail
+
+
+def extract_entities(text: str) -> Dict[str, Any]:
+    """Étape extraction par défaut : dates et montants (exécutée dans un processus)."""
+    global _extractor
+    if _extractor is None:
+        from document_processor import SmartEntityExtractor
+        _extractor = SmartEntityExtractor()
+    return {
+        'dates': [e.value for e in _extractor.extract_dates(text)],
+        'montants': [e.value for e in _extractor.extract_amounts(text)]
+    }
+
+
+class BatchPipeline:
+    """
+    Pipeline en étapes : découverte, lecture, extraction, classification, sortie.
+
+    Args:
+        read_fn: item -> texte, exécutée dans un groupe de threads (E/S)
+        extract_fn: texte -> dict, exécutée dans un groupe de processus (CPU) ;
+            doit être une fonction de module pour pouvoir être transmise
+        classify_fn: item -> dict résultat, fonction ou coroutine ; exécutée
+            avec au plus classify_concurrency appels simultanés. Avec un
+            ordonnanceur, si elle accepte l'argument job_context, elle le
+            reçoit pour céder sa place aux requêtes interactives
+        sink_fn: item -> pointeur de résultat (ou None), appelée dans le thread
+            principal pour chaque fichier (résultat ou erreur), dans l'ordre
+            d'achèvement ; les fichiers inchangés ne lui sont pas transmis
+        journal: journal de reprise optionnel
+        read_workers, extract_workers: taille des groupes de travailleurs
+        queue_size: capacité de chaque file entre deux étapes
+        use_processes: False pour exécuter l'extraction dans des threads
+        metrics: PipelineMetrics optionnel (latences par étape, débit, files)
+        scheduler: JobScheduler optionnel ; les appels de classification lui
+            sont soumis comme travaux par lot, ordonnés par priorité et
+            échéance (estimée depuis les dates extraites) et partagés avec les
+            requêtes interactives. Jusqu'à queue_size fichiers sont alors en
+            attente de classification, le nombre d'appels simultanés étant
+            fixé par l'ordonnanceur ; la file de classification suivie par
+            metrics compte alors les travaux en attente dans l'ordonnanceur
+    """
+
+    def __init__(self, read_fn: Callable, extract_fn: Callable, classify_fn: Callable, sink_fn: Callable,
+                 journal: Optional[CheckpointJournal] = None, read_workers: int = 4,
+                 extract_workers: Optional[int] = None, classify_concurrency: int = 4,
+                 queue_size: int = 64, use_processes: bool = True, metrics=None, scheduler=None):
+        self.read_fn = read_fn
+        self.extract_fn = extract_fn
+        self.classify_fn = classify_fn
+        self.sink_fn = sink_fn
+        self.journal = journal
+        self.read_workers = max(1, read_workers)
+        self.extract_workers = max(1, extract_workers or os.cpu_count() or 1)
+        self.classify_concurrency = max(1, classify_concurrency)
+        self.queue_size = queue_size
+        self.use_processes = use_processes
+        self.metrics = metrics
+        self.scheduler = scheduler
+
+    def run(self, items: Iterable[PipelineItem]) -> Dict[str, int]:
+        """Traite tous les éléments et retourne les compteurs du lot."""
+        if self.metrics:
+            stats = self.metrics.counters
+        else:
+            stats = {'decouverts': 0, 'deja_traites': 0, 'inchanges': 0, 'traites': 0, 'erreurs': 0}
+        to_read, to_extract, to_classify, to_sink = (queue.Queue(self.queue_size) for _ in range(4))
+        if self.metrics:
+            classify_depth = _ScheduledDepth(to_classify, self.scheduler) if self.scheduler else to_classify
+            self.metrics.queues = {'lecture': to_read, 'extraction': to_extract,
+                                   'classification': classify_depth, 'sortie': to_sink}
+            self.metrics.start()
+
+        self._discovery_error = None
+        self._extract_futures = set()
+        executor = ProcessPoolExecutor(self.extract_workers) if self.use_processes else None
+        threads = [threading.Thread(target=self._discover, args=(items, to_read, stats), daemon=True)]
+        threads += self._start_pool(to_read, to_extract, self.read_workers, self._read, 'lecture')
+        threads += self._start_pool(to_extract, to_classify, self.extract_workers,
+                                    lambda item: self._extract(item, executor), 'extraction')
+        threads.append(threading.Thread(target=lambda: asyncio.run(self._classify_all(to_classify, to_sink)),
+                                        daemon=True))
+        threads[0].start()
+        threads[-1].start()
+
+        try:
+            while True:
+                item = to_sink.get()
+                if item is _STOP:
+                    break
+                if item.unchanged:
+                    self.journal.touch(item)
+                    self._count(stats, 'inchanges')
+                    continue
+                # Sortie avant journal : un arrêt entre les deux fait retraiter
+                # le fichier plutôt que de perdre son résultat
+                started = time.perf_counter()
+                item.result_ref = self.sink_fn(item)
+                if item.error is None and self.journal:
+                    self.journal.mark_done(item)
+                if self.metrics:
+                    self.metrics.record('sortie', time.perf_counter() - started)
+                self._count(stats, 'traites' if item.error is None else 'erreurs')
+            for thread in threads:
+                thread.join()
+            if self._discovery_error is not None:
+                # Les fichiers découverts avant l'erreur ont été traités et journalisés
+                raise self._discovery_error
+        finally:
+            # En cas d'interruption, les threads (démons) sont abandonnés ;
+            # le journal permet de reprendre au prochain lancement
+            if executor:
+                # Équivalent de shutdown(cancel_futures=True), absent en Python 3.8
+                for future in list(self._extract_futures):
+                    future.cancel()
+                executor.shutdown(wait=False)
+            if self.metrics:
+                self.metrics.stop()
+        return dict(stats)
+
+    def _count(self, stats, name):
+        if self.metrics:
+            self.metrics.completed(name)
+        else:
+            stats[name] += 1
+
+    def _discover(self, items, out_q, stats):
+        """Étape découverte : filtre les fichiers déjà journalisés."""
+        try:
+            for item in items:
+                stats['decouverts'] += 1
+                if self.journal and self.journal.is_done(item):
+                    stats['deja_traites'] += 1
+                    continue
+                out_q.put(item)
+        except Exception as e:
+            self._discovery_error = e  # relevée par run() une fois les étapes terminées
+        finally:
+            # Toujours terminer le flux : sinon run() attendrait la sortie indéfiniment
+            out_q.put(_STOP)
+
+    def _start_pool(self, in_q, out_q, workers, fn, stage):
+        """Démarre un groupe de threads appliquant fn aux éléments de in_q."""
+        remaining = [workers]
+        lock = threading.Lock()
+
+        def worker():
+            while True:
+                item = in_q.get()
+                if item is _STOP:
+                    in_q.put(_STOP)  # réveiller les autres travailleurs
+                    with lock:
+                        remaining[0] -= 1
+                        if remaining[0] == 0:
+                            out_q.put(_STOP)
+                    return
+                if item.pending:
+                    started = time.perf_counter()
+                    try:
+                        fn(item)
+                    except Exception as e:
+                        item.error = f"{type(e).__name__}: {e}"
+                    if self.metrics:
+                        self.metrics.record(stage, time.perf_counter() - started)
+                out_q.put(item)
+
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def _read(self, item):
+        item.text = self.read_fn(item)
+        if self.journal:
+            # Seuls les fichiers nouveaux ou modifiés (taille/date) arrivent ici
+            item.content_hash = hashlib.sha256(item.text.encode('utf-8', 'surrogatepass')).hexdigest()
+            item.unchanged = self.journal.is_unchanged(item)
+
+    def _extract(self, item, executor):
+        # Un thread par processus : au plus extract_workers tâches en vol
+        if executor is None:
+            item.entities = self.extract_fn(item.text)
+        else:
+            future = executor.submit(self.extract_fn, item.text)
+            self._extract_futures.add(future)
+            future.add_done_callback(self._extract_futures.discard)
+            item.entities = future.result()
+        if self.scheduler and item.deadline is None:
+            bonus, item.deadline = deadline_from_dates(item.entities.get('dates', []))
+            item.priority += bonus
+
+    async def _classify_all(self, in_q, out_q):
+        """Étape classification : appels LLM concurrents et bornés."""
+        is_coroutine = asyncio.iscoroutinefunction(self.classify_fn)
+        # Avec ordonnanceur, une fenêtre plus large lui laisse de quoi réordonner
+        in_flight = self.queue_size if self.scheduler else self.classify_concurrency
+        # Attente sur la file + appel bloquant : deux threads par travailleur
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(2 * in_flight))
+
+        async def worker():
+            while True:
+                item = await loop.run_in_executor(None, in_q.get)
+                if item is _STOP:
+                    in_q.put(_STOP)
+                    return
+                if item.pending and self.scheduler:
+                    # Latence mesurée dans le travail : l'attente dans l'ordonnanceur n'en fait pas partie
+                    try:
+                        item.result = await asyncio.wrap_future(self.scheduler.submit(
+                            self._classify_job, item, kind=BATCH, priority=item.priority, deadline=item.deadline))
+                    except Exception as e:
+                        item.error = f"{type(e).__name__}: {e}"
+                elif item.pending:
+                    started = time.perf_counter()
+                    try:
+                        if is_coroutine:
+                            item.result = await self.classify_fn(item)
+                        else:
+                            item.result = await loop.run_in_executor(None, self.classify_fn, item)
+                    except Exception as e:
+                        item.error = f"{type(e).__name__}: {e}"
+                    if self.metrics:
+                        self.metrics.record('classification', time.perf_counter() - started)
+                item.text = None  # libérer le texte avant la sortie
+                await loop.run_in_executor(None, out_q.put, item)
+
+        await asyncio.gather(*(worker() for _ in range(in_flight)))
+        out_q.put(_STOP)
+
+    def _classify_job(self, item, job_context):
+        """Travail de classification exécuté par l'ordonnanceur (préemptible si classify_fn coopère)."""
+        started = time.perf_counter()
+        try:
+            if accepts_context(self.classify_fn):
+                return self.classify_fn(item, job_context=job_context)
+            return self.classify_fn(item)
+        except Preempted:
+            started = None  # tentative interrompue et remise en file : pas une latence d'appel
+            raise
+        finally:
+            if self.metrics and started is not None:
+                self.metrics.record('classification', time.perf_counter() - started)
+
+
+class _ScheduledDepth:
+    """Profondeur de la file de classification quand les appels passent par un ordonnanceur."""
+
+    def __init__(self, in_q, scheduler):
+        self.in_q = in_q
+        self.scheduler = scheduler
+
+    def qsize(self) -> int:
+        # Les travailleurs vident la file d'entrée aussitôt : l'attente est dans l'ordonnanceur
+        return self.in_q.qsize() + self.scheduler.pending()[BATCH]
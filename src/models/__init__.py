@@ -2,6 +2,12 @@
 Module contenant les modèles de classification pour l'application CSPE.
 """
 
-from .classifier import CSPEClassifier
-
 __all__ = ['CSPEClassifier']
+
+
+def __getattr__(name):
+    # Import différé : `from models.expert_analyzer import ...` ne charge pas le classifieur
+    if name == 'CSPEClassifier':
+        from .classifier import CSPEClassifier
+        return CSPEClassifier
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -10,13 +10,13 @@ import logging
 from dataclasses import dataclass, asdict, field
 from typing import Dict, Any, List, Optional, Union
 from enum import Enum, auto
-import ollama  # Import du client Ollama
 
-# Configuration du logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+try:
+    from ..serialization import dumps
+except (ImportError, ValueError):
+    from serialization import dumps
+
+# La configuration du logging revient aux points d'entrée (voir batch_import.main)
 logger = logging.getLogger(__name__)
 
 class Decision(str, Enum):
@@ -43,7 +43,8 @@ class ClassificationResult:
     
     def to_json(self) -> str:
         """Sérialise l'objet en JSON."""
-        return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+        # Énumérations et dataclass sérialisées directement, sans passe to_dict
+        return dumps(self, indent=True)
 
 class CSPEClassifier:
     """
@@ -67,6 +68,9 @@ class CSPEClassifier:
     def _setup_model(self):
         """Configure le modèle de classification avec Ollama."""
         try:
+            # Client Ollama (httpx...) importé à la première instanciation, pas à l'import du module
+            import ollama
+            
             # Vérifier que le modèle est disponible
             models = ollama.list()
             model_names = [m['name'] for m in models.get('models', [])]
@@ -126,7 +130,8 @@ class CSPEClassifier:
         self,
         texte: str,
         document_id: str = "",
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+        job_context=None
     ) -> ClassificationResult:
         """
         Classe un document selon les critères CSPE en utilisant le LLM.
@@ -135,6 +140,9 @@ class CSPEClassifier:
             texte: Contenu textuel du document à classifier
             document_id: Identifiant unique du document (optionnel)
             metadata: Métadonnées supplémentaires (optionnel)
+            job_context: JobContext de l'ordonnanceur (optionnel) ; la réponse
+                est alors lue en flux et l'appel abandonné (Preempted) dès
+                qu'une requête interactive réclame le travailleur
             
         Returns:
             Un objet ClassificationResult contenant la décision et les détails
@@ -153,15 +161,29 @@ class CSPEClassifier:
             prompt = self._generate_prompt(texte)
             
             # Appeler le modèle
-            response = self.llm.generate(
-                model=self.model_name,
-                prompt=prompt,
-                format="json",
-                options={"temperature": 0.2}
-            )
+            if job_context is None:
+                response = self.llm.generate(
+                    model=self.model_name,
+                    prompt=prompt,
+                    format="json",
+                    options={"temperature": 0.2}
+                )['response']
+            else:
+                # Réponse en flux : point de préemption entre deux fragments
+                fragments = []
+                for chunk in self.llm.generate(
+                    model=self.model_name,
+                    prompt=prompt,
+                    format="json",
+                    options={"temperature": 0.2},
+                    stream=True
+                ):
+                    job_context.checkpoint()
+                    fragments.append(chunk['response'])
+                response = "".join(fragments)
             
             # Parser la réponse
-            result = json.loads(response['response'])
+            result = json.loads(response)
             
             # Convertir la décision en énumération
             decision_map = {
@@ -190,6 +212,8 @@ class CSPEClassifier:
             return self._fallback_classification(texte, document_id, metadata)
             
         except Exception as e:
+            if job_context is not None and job_context.should_yield():
+                raise  # préemption : l'ordonnanceur remet le travail en file
             logger.error(f"Erreur lors de la classification: {str(e)}")
             return self._fallback_classification(texte, document_id, metadata)
     
@@ -4,7 +4,13 @@ from typing import Dict, List, Optional, Tuple, Any
 from pathlib import Path
 import re
 import json
-from dateutil.parser import parse as parse_date
+
+try:
+    from ..processing.text_extraction import extract_text
+    from ..processing.dates import DATE_PATTERN, extract_dates
+except (ImportError, ValueError):
+    from processing.text_extraction import extract_text
+    from processing.dates import DATE_PATTERN, extract_dates
 
 class Decision(Enum):
     RECEVABLE = "recevable"
@@ -26,10 +32,7 @@ class CSPEExpertAnalyzer:
         self.llm = llm_client
         
         # Expressions régulières pour l'extraction des entités
-        self.date_pattern = re.compile(
-            r'\b(0?[1-9]|[12][0-9]|3[01])[/\-](0?[1-9]|1[0-2])[/\-](20\d{2}|\d{2})\b|'  # DD/MM/YYYY ou DD-MM-YYYY
-            r'\b(20\d{2})[/\-](0?[1-9]|1[0-2])[/\-](0?[1-9]|[12][0-9]|3[01])\b'  # YYYY-MM-DD ou YYYY/MM/DD
-        )
+        self.date_pattern = DATE_PATTERN  # JJ/MM/AAAA, JJ-MM-AA, AAAA-MM-JJ
         self.amount_pattern = re.compile(
             r'\b(\d{1,3}(?:[\s.]?\d{3})*(?:[.,]\d{1,2})?)\s*(?:€|euros?|EUR)?\b',
             re.IGNORECASE
@@ -46,26 +49,64 @@ class CSPEExpertAnalyzer:
         Returns:
             Dictionnaire contenant le rapport d'analyse
         """
-        try:
-            # Lire le contenu du fichier
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-                
-            # Extraire les entités clés
-            extracted_data = self._extract_entities(content)
+        return self._analyze_source(file_path, str(file_path))
+    
+    def analyze_bytes(self, data, filename: Optional[str] = None) -> Dict:
+        """
+        Analyse un contenu en mémoire, sans fichier temporaire.
+        
+        Args:
+            data: Contenu du fichier (bytes ou memoryview, lu sans copie,
+                ex. uploaded_file.getbuffer())
+            filename: Nom du fichier, dont l'extension aide à reconnaître le format
             
-            # Évaluer les critères
-            criteria = self._evaluate_criteria(extracted_data)
+        Returns:
+            Dictionnaire contenant le rapport d'analyse
+        """
+        return self._analyze_source(data, filename, filename)
+    
+    def analyze_stream(self, stream, filename: Optional[str] = None) -> Dict:
+        """
+        Analyse un flux binaire adressable (fichier ouvert, BytesIO, fichier téléversé).
+        
+        Args:
+            stream: Flux binaire disposant de read et seek
+            filename: Nom du fichier, dont l'extension aide à reconnaître le format
             
-            # Générer le rapport
-            report = self._generate_report(criteria, extracted_data)
+        Returns:
+            Dictionnaire contenant le rapport d'analyse
+        """
+        return self._analyze_source(stream, filename or getattr(stream, 'name', None), filename)
+    
+    def analyze_text(self, content: str) -> Dict:
+        """
+        Analyse un texte déjà extrait et retourne un rapport d'analyse.
+        
+        Args:
+            content: Texte du document
             
-            return report
+        Returns:
+            Dictionnaire contenant le rapport d'analyse
+        """
+        # Extraire les entités clés
+        extracted_data = self._extract_entities(content)
+        
+        # Évaluer les critères
+        criteria = self._evaluate_criteria(extracted_data)
+        
+        # Générer le rapport
+        return self._generate_report(criteria, extracted_data)
+    
+    def _analyze_source(self, source, label: Optional[str], filename: Optional[str] = None) -> Dict:
+        try:
+            # Extraire le texte (PDF, DOCX, image ou texte)
+            content = extract_text(source, filename)
+            return self.analyze_text(content)
             
         except Exception as e:
             return {
                 'error': f"Erreur lors de l'analyse du fichier : {str(e)}",
-                'file': str(file_path)
+                'file': label
             }
     
     def _extract_entities(self, text: str) -> Dict:
@@ -78,16 +119,8 @@ class CSPEExpertAnalyzer:
         Returns:
             Dictionnaire contenant les entités extraites
         """
-        # Extraire les dates
-        dates = []
-        for match in self.date_pattern.finditer(text):
-            try:
-                date_str = match.group()
-                # Essayer de parser la date
-                date_obj = parse_date(date_str, dayfirst=True, yearfirst=False, fuzzy=True)
-                dates.append(date_obj.strftime('%d/%m/%Y'))
-            except (ValueError, OverflowError):
-                continue
+        # Extraire les dates (objets date, conservés typés jusqu'au rapport)
+        dates = extract_dates(text)
         
         # Extraire les montants
         amounts = []
@@ -103,7 +136,7 @@ class CSPEExpertAnalyzer:
         sirets = [match.group().replace(' ', '') for match in self.siret_pattern.finditer(text)]
         
         return {
-            'dates': sorted(list(set(dates))),
+            'dates': dates,
             'montants': sorted(list(set(amounts))),
             'sirets': sirets,
             'text_length': len(text),
@@ -137,7 +170,7 @@ class CSPEExpertAnalyzer:
         Returns:
             Dictionnaire contenant la décision et les détails
         """
-        dates = [datetime.strptime(d, '%d/%m/%Y').date() for d in data.get('dates', [])]
+        dates = data.get('dates', [])
         
         if not dates:
             return {
@@ -171,13 +204,7 @@ class CSPEExpertAnalyzer:
         Returns:
             Dictionnaire contenant la décision et les détails
         """
-        annees = []
-        for d in data.get('dates', []):
-            try:
-                dt = datetime.strptime(d, '%d/%m/%Y')
-                annees.append(dt.year)
-            except (ValueError, TypeError):
-                continue
+        annees = [d.year for d in data.get('dates', [])]
         
         if not annees:
             return {
@@ -212,7 +239,7 @@ class CSPEExpertAnalyzer:
         Returns:
             Dictionnaire contenant la décision et les détails
         """
-        dates = [datetime.strptime(d, '%d/%m/%Y').date() for d in data.get('dates', [])]
+        dates = data.get('dates', [])
         
         if not dates:
             return {
@@ -298,7 +325,7 @@ class CSPEExpertAnalyzer:
                 }
             },
             'extracted_data': {
-                'dates': extracted_data.get('dates', []),
+                'dates': [d.strftime('%d/%m/%Y') for d in extracted_data.get('dates', [])],
                 'montants': extracted_data.get('montants', []),
                 'sirets': extracted_data.get('sirets', [])
             },
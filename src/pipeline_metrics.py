@@ -0,0 +1,203 @@
+"""
+Télémétrie du pipeline d'import par lot.
+
+Mesure, pour chaque étape (lecture, extraction, classification, sortie), le
+nombre d'appels et les latences p50/p95 sur une fenêtre glissante, le débit
+récent (documents/s), les erreurs et la profondeur des files entre étapes.
+Ces mesures servent à dimensionner les groupes de travailleurs : une file
+pleine devant la classification signale par exemple un LLM saturé.
+
+Les instantanés sont écrits périodiquement, de façon atomique, dans un
+fichier JSON ou au format texte Prometheus (collecteur textfile de
+node_exporter) selon l'extension du fichier (.json ou .prom).
+
+Exemple d'utilisation:
+    metrics = PipelineMetrics(Path('rapports/metriques.prom'), interval=5)
+    pipeline = BatchPipeline(..., metrics=metrics)
+"""
+
+import os
+import time
+import threading
+from pathlib import Path
+from collections import deque
+from typing import Any, Dict, Optional
+
+from serialization import dumps
+
+try:
+    from tqdm import tqdm
+    TQDM_AVAILABLE = True
+except ImportError:
+    TQDM_AVAILABLE = False
+
+STAGES = ('lecture', 'extraction', 'classification', 'sortie')
+LATENCY_WINDOW = 1000  # dernières mesures conservées par étape
+THROUGHPUT_WINDOW = 60.0  # secondes
+
+
+def _percentile(values, pct):
+    """Percentile simple (plus proche rang) d'une liste de durées"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class PipelineMetrics:
+    """
+    Compteurs, latences par étape et profondeur des files du pipeline.
+
+    Args:
+        output_path: Fichier d'export (.json ou .prom), optionnel
+        interval: Période d'écriture de l'export et de l'affichage, en secondes
+        progress: Afficher une barre de progression (tqdm) ou, à défaut,
+            une ligne d'état à chaque période
+    """
+
+    def __init__(self, output_path: Optional[Path] = None, interval: float = 5.0, progress: bool = False):
+        self.output_path = Path(output_path) if output_path else None
+        self.interval = interval
+        self.progress = progress
+        self.started = time.time()
+        self.counters = {'decouverts': 0, 'deja_traites': 0, 'inchanges': 0, 'traites': 0, 'erreurs': 0}
+        self.queues: Dict[str, Any] = {}
+        self._latencies = {stage: deque(maxlen=LATENCY_WINDOW) for stage in STAGES}
+        self._calls = dict.fromkeys(STAGES, 0)
+        self._busy = dict.fromkeys(STAGES, 0.0)
+        self._completions = deque()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._bar = None
+
+    def record(self, stage: str, seconds: float):
+        """Enregistre la durée d'un appel d'étape (thread-safe)."""
+        with self._lock:
+            self._latencies[stage].append(seconds)
+            self._calls[stage] += 1
+            self._busy[stage] += seconds
+
+    def completed(self, counter: str):
+        """Compte un fichier sorti du pipeline ('traites', 'erreurs' ou 'inchanges')."""
+        now = time.time()
+        with self._lock:
+            self.counters[counter] += 1
+            self._completions.append(now)
+            while self._completions and self._completions[0] < now - THROUGHPUT_WINDOW:
+                self._completions.popleft()
+        if self._bar is not None:
+            self._bar.total = max(self.counters['decouverts'] - self.counters['deja_traites'], self._bar.n + 1)
+            self._bar.update(1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """État courant : compteurs, débit glissant, latences et files."""
+        now = time.time()
+        with self._lock:
+            window = [t for t in self._completions if t >= now - THROUGHPUT_WINDOW]
+            elapsed = now - self.started
+            span = min(THROUGHPUT_WINDOW, elapsed) or 1.0
+            stages = {
+                stage: {
+                    'appels': self._calls[stage],
+                    'p50_ms': round(_percentile(self._latencies[stage], 50) * 1000, 2),
+                    'p95_ms': round(_percentile(self._latencies[stage], 95) * 1000, 2),
+                    'temps_total_s': round(self._busy[stage], 3)
+                }
+                for stage in STAGES
+            }
+            counters = dict(self.counters)
+        remaining = counters['decouverts'] - counters['deja_traites'] - counters['inchanges'] \
+            - counters['traites'] - counters['erreurs']
+        throughput = len(window) / span
+        return {
+            'horodatage': now,
+            'duree_s': round(elapsed, 1),
+            'compteurs': counters,
+            'debit_docs_s': round(throughput, 3),
+            'restants_decouverts': max(0, remaining),
+            'eta_s': round(remaining / throughput, 1) if throughput and remaining > 0 else None,
+            'etapes': stages,
+            'files': {name: q.qsize() for name, q in self.queues.items()}
+        }
+
+    def start(self):
+        """Démarre l'affichage et l'export périodiques."""
+        if self.progress and TQDM_AVAILABLE:
+            self._bar = tqdm(total=0, unit='doc', dynamic_ncols=True)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Arrête les tâches périodiques et écrit un dernier instantané."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._emit(self.snapshot())
+        if self._bar is not None:
+            self._bar.close()
+            self._bar = None
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self._emit(self.snapshot())
+
+    def _emit(self, snap: Dict[str, Any]):
+        if self._bar is not None:
+            self._bar.set_postfix_str(self._status(snap), refresh=False)
+        elif self.progress:
+            print(f"[{snap['duree_s']:.0f}s] {snap['compteurs']['traites']} traité(s) - {self._status(snap)}")
+        if self.output_path:
+            try:
+                self.write(snap)
+            except OSError as e:
+                print(f"Erreur lors de l'écriture des métriques: {e}")
+
+    @staticmethod
+    def _status(snap: Dict[str, Any]) -> str:
+        files = ' '.join(f"{name}={depth}" for name, depth in snap['files'].items())
+        llm = snap['etapes']['classification']
+        return (f"{snap['debit_docs_s']:.2f} doc/s, LLM p95 {llm['p95_ms']:.0f}ms, "
+                f"erreurs {snap['compteurs']['erreurs']}, files {files}")
+
+    def write(self, snap: Optional[Dict[str, Any]] = None):
+        """Écrit l'instantané de façon atomique (JSON ou texte Prometheus)."""
+        snap = snap or self.snapshot()
+        if self.output_path.suffix == '.prom':
+            content = self._prometheus(snap)
+        else:
+            content = dumps(snap, indent=True)
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.output_path.with_name(self.output_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, self.output_path)
+
+    @staticmethod
+    def _prometheus(snap: Dict[str, Any]) -> str:
+        lines = [
+            '# HELP cspe_import_fichiers_total Fichiers par issue de traitement.',
+            '# TYPE cspe_import_fichiers_total counter'
+        ]
+        lines += [f'cspe_import_fichiers_total{{issue="{name}"}} {value}'
+                  for name, value in snap['compteurs'].items()]
+        lines += [
+            '# HELP cspe_import_debit_docs_par_seconde Débit sur la dernière minute.',
+            '# TYPE cspe_import_debit_docs_par_seconde gauge',
+            f"cspe_import_debit_docs_par_seconde {snap['debit_docs_s']}",
+            '# HELP cspe_import_latence_secondes Latence des étapes (fenêtre glissante).',
+            '# TYPE cspe_import_latence_secondes summary'
+        ]
+        for stage, values in snap['etapes'].items():
+            lines.append(f'cspe_import_latence_secondes{{etape="{stage}",quantile="0.5"}} {values["p50_ms"] / 1000}')
+            lines.append(f'cspe_import_latence_secondes{{etape="{stage}",quantile="0.95"}} {values["p95_ms"] / 1000}')
+            lines.append(f'cspe_import_latence_secondes_sum{{etape="{stage}"}} {values["temps_total_s"]}')
+            lines.append(f'cspe_import_latence_secondes_count{{etape="{stage}"}} {values["appels"]}')
+        lines += [
+            '# HELP cspe_import_file_profondeur Éléments en attente entre deux étapes.',
+            '# TYPE cspe_import_file_profondeur gauge'
+        ]
+        lines += [f'cspe_import_file_profondeur{{file="{name}"}} {depth}' for name, depth in snap['files'].items()]
+        return '\n'.join(lines) + '\n'
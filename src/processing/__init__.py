@@ -5,6 +5,12 @@ Ce module fournit des fonctionnalités pour extraire et traiter les informations
 des documents liés à la Contribution au Service Public de l'Électricité (CSPE).
 """
 
-from .document_processor import CSPEDocumentProcessor, CSPEEntity
-
 __all__ = ['CSPEDocumentProcessor', 'CSPEEntity']
+
+
+def __getattr__(name):
+    # Import différé : les sous-modules légers (decoding, dates...) ne chargent pas pytz
+    if name in __all__:
+        from . import document_processor
+        return getattr(document_processor, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
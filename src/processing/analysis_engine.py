@@ -9,9 +9,12 @@ from datetime import datetime, date
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Tuple
 import json
+import hashlib
 import logging
 
 from .document_processor import CSPEDocumentProcessor, CSPEEntity
+from .entity_table import EntityTable
+from .text_extraction import extract_text
 from ..models.expert_analyzer import CSPEExpertAnalyzer, Decision
 
 logger = logging.getLogger(__name__)
@@ -38,19 +41,54 @@ class CSPEAnalysisEngine:
         Returns:
             Dictionnaire contenant les résultats de l'analyse
         """
-        try:
-            # Vérifier si l'analyse est en cache
-            if file_path in self.analysis_cache:
-                return self.analysis_cache[file_path]
+        return self._to_json(self._analyze_path(file_path))
+    
+    def _analyze_path(self, file_path: str) -> Dict[str, Any]:
+        # Vérifier si l'analyse est en cache (entités conservées en table colonnaire)
+        if file_path in self.analysis_cache:
+            return self.analysis_cache[file_path]
+        
+        doc_analysis = self._analyze_source(file_path, str(file_path), Path(file_path).name,
+                                            lambda: Path(file_path).stat().st_size)
+        if 'error' not in doc_analysis:
+            # Mettre en cache les résultats
+            self.analysis_cache[file_path] = doc_analysis
+        return doc_analysis
+    
+    def analyze_bytes(self, data, filename: str) -> Dict[str, Any]:
+        """Analyse un document en mémoire, sans fichier temporaire.
+        
+        Args:
+            data: Contenu du fichier (bytes ou memoryview, lu sans copie)
+            filename: Nom du fichier, dont l'extension aide à reconnaître le format
             
-            # Analyser avec le processeur de document
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
+        Returns:
+            Dictionnaire contenant les résultats de l'analyse
+        """
+        return self._to_json(self._analyze_source(data, filename, filename, lambda: memoryview(data).nbytes))
+    
+    def analyze_stream(self, stream, filename: str) -> Dict[str, Any]:
+        """Analyse un document lu depuis un flux binaire adressable.
+        
+        Args:
+            stream: Flux binaire disposant de read et seek (fichier téléversé, BytesIO...)
+            filename: Nom du fichier, dont l'extension aide à reconnaître le format
+            
+        Returns:
+            Dictionnaire contenant les résultats de l'analyse
+        """
+        return self._to_json(self._analyze_source(stream, filename, filename, lambda: stream.seek(0, 2)))
+    
+    def _analyze_source(self, source, file_path: str, file_name: str, file_size) -> Dict[str, Any]:
+        try:
+            content = extract_text(source, file_name)
             
             doc_analysis = {
-                'file_path': str(file_path),
-                'file_name': Path(file_path).name,
-                'file_size': Path(file_path).stat().st_size,
+                'file_path': file_path,
+                'file_name': file_name,
+                'file_size': file_size(),
+                # Empreinte du début du texte, pour la détection des doublons sans relecture
+                'content_digest': hashlib.sha256(content[:1000].encode('utf-8', 'surrogatepass')).hexdigest(),
                 'analysis_date': datetime.now().isoformat(),
                 'entities': {},
                 'expert_analysis': None,
@@ -59,41 +97,26 @@ class CSPEAnalysisEngine:
             
             # Extraire les entités avec le processeur de document
             try:
-                # Remplacer l'appel à extract_entities par les méthodes spécifiques
-                dates = self.document_processor.extract_dates(content)
-                amounts = self.document_processor.extract_amounts(content)
-                references = self.document_processor.extract_references(content)
-                
-                # Combiner les références en une seule liste plate
-                all_references = []
-                for ref_list in references.values():
-                    all_references.extend(ref_list)
-                
-                doc_analysis['entities'] = {
-                    'dates': [e.to_dict() for e in dates],
-                    'amounts': [e.to_dict() for e in amounts],
-                    'references': [e.to_dict() for e in all_references]
-                }
+                # Table colonnaire : les dictionnaires ne sont construits qu'à la sortie (_to_json)
+                doc_analysis['entities'] = self.document_processor.extract_entity_table(content)
             except Exception as e:
                 logger.error(f"Erreur lors de l'extraction des entités: {e}")
                 doc_analysis['warnings'].append(f"Erreur d'extraction des entités: {str(e)}")
             
-            # Analyser avec l'expert
+            # Analyser avec l'expert, sur le texte déjà extrait
             try:
-                expert_result = self.expert_analyzer.analyze_file(file_path)
+                expert_result = self.expert_analyzer.analyze_text(content)
                 doc_analysis['expert_analysis'] = expert_result
             except Exception as e:
                 logger.error(f"Erreur lors de l'analyse experte: {e}")
                 doc_analysis['warnings'].append(f"Erreur d'analyse experte: {str(e)}")
             
-            # Mettre en cache les résultats
-            self.analysis_cache[file_path] = doc_analysis
             return doc_analysis
             
         except Exception as e:
             logger.exception(f"Erreur lors de l'analyse du document {file_path}")
             return {
-                'file_path': str(file_path),
+                'file_path': file_path,
                 'error': str(e),
                 'analysis_date': datetime.now().isoformat()
             }
@@ -116,7 +139,7 @@ class CSPEAnalysisEngine:
             documents = []
             for file_path in folder_path.glob('*'):
                 if file_path.is_file() and not file_path.name.startswith('.'):
-                    doc_analysis = self.analyze_document(str(file_path))
+                    doc_analysis = self._analyze_path(str(file_path))
                     documents.append(doc_analysis)
             
             # Générer un rapport consolidé
@@ -148,16 +171,17 @@ class CSPEAnalysisEngine:
         total_docs = len(documents)
         total_warnings = sum(len(doc.get('warnings', [])) for doc in documents)
         
-        # Compiler les entités trouvées
-        all_dates = []
-        all_amounts = []
+        # Compiler les entités trouvées dans une seule table
+        all_entities = EntityTable()
         for doc in documents:
-            all_dates.extend(doc.get('entities', {}).get('dates', []))
-            all_amounts.extend(doc.get('entities', {}).get('amounts', []))
+            if isinstance(doc.get('entities'), EntityTable):
+                all_entities.extend(doc['entities'])
         
-        # Trier les dates et montants
-        all_dates.sort(key=lambda x: x.get('value', ''))
-        all_amounts.sort(key=lambda x: float(x.get('value', 0)))
+        # 5 dates les plus récentes et 5 montants les plus élevés, par ordre croissant
+        latest_dates = all_entities.top_k(5, 'date')[::-1]
+        largest_amounts = all_entities.top_k(5, 'amount')[::-1]
+        
+        documents = [self._to_json(doc) for doc in documents]
         
         # Détecter les incohérences
         inconsistencies = self._detect_inconsistencies(documents)
@@ -169,12 +193,26 @@ class CSPEAnalysisEngine:
             'analysis_date': datetime.now().isoformat(),
             'documents_analyzed': total_docs,
             'total_warnings': total_warnings,
-            'dates_found': all_dates[-5:] if all_dates else [],  # 5 dates les plus récentes
-            'amounts_found': all_amounts[-5:] if all_amounts else [],  # 5 montants les plus élevés
+            'dates_found': all_entities.to_dicts(latest_dates),
+            'amounts_found': all_entities.to_dicts(largest_amounts),
             'inconsistencies': inconsistencies,
             'documents': documents
         }
     
+    def _to_json(self, doc_analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """Copie sérialisable en JSON d'une analyse : la table d'entités devient des listes de dictionnaires."""
+        table = doc_analysis.get('entities')
+        if not isinstance(table, EntityTable):
+            return doc_analysis
+        references = []
+        for ref_type in self.document_processor.REFERENCE_PATTERNS:
+            references.extend(table.where(f'reference_{ref_type}'))
+        return dict(doc_analysis, entities={
+            'dates': table.to_dicts(table.where('date')),
+            'amounts': table.to_dicts(table.where('amount')),
+            'references': table.to_dicts(references)
+        })
+    
     def _detect_case_type(self, folder_name: str) -> str:
         """Détecte le type de cas à partir du nom du dossier."""
         if "RECEVABLE" in folder_name and "IRRECEVABLE" not in folder_name:
@@ -213,8 +251,9 @@ class CSPEAnalysisEngine:
         # Vérifier les doublons de documents
         seen_docs = {}
         for doc in documents:
-            content = open(doc['file_path'], 'r', encoding='utf-8', errors='ignore').read()
-            content_hash = hash(content[:1000])  # Prendre un hash du début du contenu
+            content_hash = doc.get('content_digest')  # calculée à l'analyse, sur le texte déjà extrait
+            if content_hash is None:
+                continue  # document en erreur
             if content_hash in seen_docs:
                 inconsistencies.append({
                     'type': 'document_duplicate',
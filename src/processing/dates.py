@@ -0,0 +1,80 @@
+"""
+Extraction de dates typées.
+
+Les analyseurs passaient chaque correspondance de l'expression régulière à
+dateutil (parse(..., fuzzy=True), très coûteux), reformataient le résultat
+en chaîne, puis chaque critère le relisait avec strptime. Ici, les dates sont
+construites directement à partir des groupes de l'expression régulière, via
+une table mémorisée (jour, mois, année) -> date : une même date rencontrée
+dans des milliers de documents n'est convertie qu'une fois, et les critères
+manipulent des objets date de bout en bout. La mise en forme en chaîne n'a
+lieu qu'à la sortie (rapport JSON).
+
+Formats reconnus : JJ/MM/AAAA, JJ-MM-AA et AAAA-MM-JJ (séparateurs / ou -).
+Les années sur deux chiffres sont placées dans la fenêtre de 100 ans centrée
+sur l'année courante, comme le fait dateutil.
+
+Exemple d'utilisation:
+    for valeur, debut, fin in iter_dates(texte):
+        ...
+    dates = extract_dates(texte)  # dates uniques, triées
+"""
+
+import re
+from datetime import date
+from functools import lru_cache
+from typing import Iterator, List, Optional, Tuple
+
+DATE_PATTERN = re.compile(
+    r'\b(?:(?P<jour>0?[1-9]|[12][0-9]|3[01])[/\-](?P<mois>0?[1-9]|1[0-2])[/\-](?P<annee>20\d{2}|\d{2})'  # JJ/MM/AAAA ou JJ-MM-AA
+    r'|(?P<annee_iso>20\d{2})[/\-](?P<mois_iso>0?[1-9]|1[0-2])[/\-](?P<jour_iso>0?[1-9]|[12][0-9]|3[01]))\b'  # AAAA-MM-JJ
+)
+
+_CURRENT_YEAR = date.today().year
+DATE_TABLE_SIZE = 1 << 16  # dates distinctes mémorisées
+
+
+def _full_year(year: int) -> int:
+    """Année sur deux chiffres -> année la plus proche de l'année courante (fenêtre de 100 ans)."""
+    year += _CURRENT_YEAR // 100 * 100
+    if year >= _CURRENT_YEAR + 50:
+        year -= 100
+    elif year < _CURRENT_YEAR - 50:
+        year += 100
+    return year
+
+
+@lru_cache(maxsize=DATE_TABLE_SIZE)
+def date_from_parts(day: str, month: str, year: str) -> Optional[date]:
+    """
+    Date correspondant aux groupes (jour, mois, année) d'une correspondance.
+
+    La table est indexée par les chaînes brutes : ni conversion en entier ni
+    validation ne sont refaites pour une date déjà vue.
+
+    Returns:
+        La date, ou None si elle n'existe pas (ex. 31/02/2014)
+    """
+    numeric_year = int(year)
+    if len(year) <= 2:
+        numeric_year = _full_year(numeric_year)
+    try:
+        return date(numeric_year, int(month), int(day))
+    except ValueError:
+        return None
+
+
+def iter_dates(text: str) -> Iterator[Tuple[date, int, int]]:
+    """Dates valides du texte, dans l'ordre d'apparition : (date, début, fin)."""
+    for match in DATE_PATTERN.finditer(text):
+        day, month, year, year_iso, month_iso, day_iso = match.groups()
+        if year is None:
+            day, month, year = day_iso, month_iso, year_iso
+        value = date_from_parts(day, month, year)
+        if value is not None:
+            yield value, match.start(), match.end()
+
+
+def extract_dates(text: str) -> List[date]:
+    """Dates distinctes du texte, triées chronologiquement."""
+    return sorted({value for value, _, _ in iter_dates(text)})
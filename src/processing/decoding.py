@@ -0,0 +1,176 @@
+"""
+Décodage commun des fichiers texte reçus (courriers, exports, membres d'archive).
+
+Les fichiers des dossiers CSPE arrivent en UTF-8, en Windows-1252 (exports
+Windows) ou en UTF-16 (exports Excel « texte Unicode »). Ce module :
+
+- détecte l'encodage sur un échantillon du début du contenu : BOM, puis
+  validité UTF-8, puis statistiques (chardet si installé, à défaut
+  heuristiques UTF-16 sans BOM / Windows-1252) ;
+- décode en une seule passe ;
+- normalise le texte (NFC, espaces insécables et fines insécables, BOM et
+  caractères de contrôle) avec des tables str.translate plutôt qu'une
+  boucle Python par caractère ;
+- mémorise le texte décodé par empreinte du contenu (cache LRU borné en
+  taille), un même fichier étant souvent relu par plusieurs étapes.
+
+Exemple d'utilisation:
+    texte = decode_file(Path('courrier.txt'))
+    texte = decode_bytes(uploaded_file.getvalue())
+"""
+
+import codecs
+import hashlib
+import threading
+import unicodedata
+from pathlib import Path
+from collections import OrderedDict
+from typing import Optional, Tuple, Union
+
+try:
+    import chardet
+    CHARDET_AVAILABLE = True
+except ImportError:
+    CHARDET_AVAILABLE = False
+
+SAMPLE_SIZE = 64 * 1024  # octets examinés pour la détection
+CHARDET_MIN_CONFIDENCE = 0.7
+CACHE_MAX_CHARS = 64 * 1024 * 1024  # caractères décodés conservés en mémoire
+
+# UTF-32 avant UTF-16 : le BOM UTF-32 LE commence par celui d'UTF-16 LE
+_BOMS: Tuple[Tuple[bytes, str], ...] = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16')
+)
+
+# Espaces insécables et espaces typographiques -> espace ; BOM, contrôles
+# (sauf tabulation et fins de ligne) et contrôles C1 supprimés
+_NORMALIZE_TABLE = str.maketrans({
+    **{chr(c): None for c in range(0x20) if chr(c) not in '\t\n\r'},
+    **{chr(c): None for c in range(0x7F, 0xA0)},
+    '\u00a0': ' ', '\u202f': ' ', '\u2007': ' ', '\u2009': ' ',
+    '\ufeff': None, '\u200b': None
+})
+
+
+def detect_encoding(sample: bytes) -> str:
+    """
+    Encodage le plus probable d'après un échantillon du début du contenu.
+
+    Returns:
+        Nom de codec Python ('utf-8-sig', 'utf-16', 'utf-8', 'cp1252'...)
+    """
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+
+    # UTF-16 sans BOM : un octet nul sur deux pour du texte latin (avant UTF-8,
+    # où l'octet nul est valide)
+    if len(sample) >= 4:
+        even_nuls, odd_nuls = sample[0::2].count(0), sample[1::2].count(0)
+        half = len(sample) // 2
+        if odd_nuls > 0.4 * half and even_nuls < 0.05 * half:
+            return 'utf-16-le'
+        if even_nuls > 0.4 * half and odd_nuls < 0.05 * half:
+            return 'utf-16-be'
+
+    # UTF-8 valide (un caractère coupé en fin d'échantillon est toléré)
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+
+    if CHARDET_AVAILABLE:
+        guess = chardet.detect(sample)
+        if guess.get('encoding') and (guess.get('confidence') or 0) >= CHARDET_MIN_CONFIDENCE:
+            try:
+                return codecs.lookup(guess['encoding']).name
+            except LookupError:
+                pass
+
+    # Windows-1252 : sur-ensemble imprimable d'ISO-8859-1, usuel pour le français
+    return 'cp1252'
+
+
+def normalize_text(text: str) -> str:
+    """NFC, espaces insécables remplacés, BOM et caractères de contrôle supprimés."""
+    text = text.translate(_NORMALIZE_TABLE)
+    if not unicodedata.is_normalized('NFC', text):
+        text = unicodedata.normalize('NFC', text)
+    return text
+
+
+class DecodeCache:
+    """Texte décodé par empreinte du contenu, LRU borné en caractères."""
+
+    def __init__(self, max_chars: int = CACHE_MAX_CHARS):
+        self.max_chars = max_chars
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple) -> Optional[str]:
+        with self._lock:
+            text = self._entries.get(key)
+            if text is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return text
+
+    def put(self, key: Tuple, text: str):
+        cost = len(text)
+        if cost > self.max_chars // 4:
+            return  # un très gros fichier évincerait tout le cache
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = text
+            self.size += cost
+            while self.size > self.max_chars:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        """Vide le cache et remet ses compteurs à zéro."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+            self.hits = 0
+            self.misses = 0
+
+
+_cache = DecodeCache()
+
+
+def decode_bytes(data: Union[bytes, bytearray, memoryview], encoding: Optional[str] = None,
+                 normalize: bool = True) -> str:
+    """
+    Décode un contenu en une passe (encodage détecté si non fourni).
+
+    Le contenu peut être un memoryview (ex. UploadedFile.getbuffer()) : il
+    est haché et décodé sans copie. Les octets invalides pour l'encodage
+    retenu sont remplacés par U+FFFD plutôt que silencieusement supprimés.
+    """
+    key = (hashlib.blake2b(data, digest_size=16).digest(), encoding, normalize)
+    text = _cache.get(key)
+    if text is not None:
+        return text
+    text = str(data, encoding or detect_encoding(bytes(data[:SAMPLE_SIZE])), 'replace')
+    if normalize:
+        text = normalize_text(text)
+    _cache.put(key, text)
+    return text
+
+
+def decode_file(path: Path, encoding: Optional[str] = None, normalize: bool = True) -> str:
+    """Lit et décode un fichier texte (voir decode_bytes)."""
+    with open(path, 'rb') as f:
+        return decode_bytes(f.read(), encoding, normalize)
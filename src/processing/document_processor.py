@@ -4,6 +4,9 @@ from datetime import datetime, date
 import re
 import pytz
 
+from .dates import date_from_parts
+from .entity_table import EntityTable
+
 @dataclass
 class CSPEEntity:
     """Représente une entité extraite d'un document CSPE."""
@@ -26,16 +29,15 @@ class CSPEEntity:
 class CSPEDocumentProcessor:
     """Processeur de documents pour l'extraction d'informations CSPE."""
     
-    # Modèles de regex pour l'extraction
+    # Modèles de regex pour l'extraction, avec les numéros des groupes (jour, mois, année)
     DATE_PATTERNS = [
         # Format JJ/MM/AAAA ou JJ-MM-AAAA ou JJ.MM.AAAA
-        (r'\b(0?[1-9]|[12][0-9]|3[01])[/\-\.](0?[1-9]|1[0-2])[/\-\.](20\d{2}|\d{2})\b', '%d/%m/%Y'),
+        (r'\b(0?[1-9]|[12][0-9]|3[01])[/\-\.](0?[1-9]|1[0-2])[/\-\.](20\d{2}|\d{2})\b', (1, 2, 3)),
         # Format AAAA-MM-JJ ou AAAA/MM/JJ ou AAAA.MM.JJ
-        (r'\b(20\d{2})[\-\./](0?[1-9]|1[0-2])[\-\./](0?[1-9]|[12][0-9]|3[01])\b', '%Y-%m-%d'),
+        (r'\b(20\d{2})[\-\./](0?[1-9]|1[0-2])[\-\./](0?[1-9]|[12][0-9]|3[01])\b', (3, 2, 1)),
         # Format date en toutes lettres (ex: 15 mars 2023)
-        (r'\b(0?[1-9]|[12][0-9]|3[01])\s+(janvier|février|mars|avril|mai|juin|juillet|ao[uû]t|septembre|octobre|novembre|décembre)\s+(20\d{2}|\d{2})\b', 
-         lambda m: f"{m.group(1)} {self._get_month_number(m.group(2))} {m.group(3)}",
-         '%d %m %Y')
+        (r'\b(0?[1-9]|[12][0-9]|3[01])\s+(janvier|février|mars|avril|mai|juin|juillet|ao[uû]t|septembre|octobre|novembre|décembre)\s+(20\d{2}|\d{2})\b',
+         (1, 2, 3))
     ]
     
     # Dictionnaire des mois
@@ -46,7 +48,7 @@ class CSPEDocumentProcessor:
     }
     
     # Modèle pour les montants (euros) avec contexte amélioré
-    AMOUNT_PATTERN = r'(?<![\d\-+±])(?<=\b|\s|^)(\d{1,3}(?:[ \u202F]?\d{3})*(?:[,\.]\d{1,2})?)(?=\s*(?:€|euros?|EUR|\b(?:TTC|HT|e\.?a\.?d\.?|soit|total|montant|prix))|\s|$)'
+    AMOUNT_PATTERN = r'(?<![\d\-+±])\b(\d{1,3}(?:[ \u202F]?\d{3})*(?:[,\.]\d{1,2})?)(?=\s*(?:€|euros?|EUR|\b(?:TTC|HT|e\.?a\.?d\.?|soit|total|montant|prix))|\s|$)'
     
     # Modèles pour les références améliorés
     REFERENCE_PATTERNS = {
@@ -62,7 +64,7 @@ class CSPEDocumentProcessor:
         
     def _compile_patterns(self) -> None:
         """Compile les expressions régulières pour de meilleures performances."""
-        self.date_regexes = [(re.compile(pattern), fmt) for pattern, fmt in self.DATE_PATTERNS]
+        self.date_regexes = [(re.compile(pattern), groups) for pattern, groups in self.DATE_PATTERNS]
         self.amount_regex = re.compile(self.AMOUNT_PATTERN, re.IGNORECASE)
         self.ref_regexes = {k: re.compile(v, re.IGNORECASE) for k, v in self.REFERENCE_PATTERNS.items()}
 
@@ -70,17 +72,6 @@ class CSPEDocumentProcessor:
         """Convertit le nom du mois en numéro."""
         return self.MONTHS.get(month_str.lower(), '00')
 
-    def _parse_date(self, date_str: str, date_fmt: str) -> Optional[date]:
-        """Tente de parser une date à partir d'une chaîne et d'un format donnés."""
-        try:
-            # Si le format contient des espaces, c'est une date en toutes lettres
-            if ' ' in date_str:
-                day, month, year = date_str.split()
-                date_str = f"{day} {month} {year}"
-            return datetime.strptime(date_str, date_fmt).date()
-        except (ValueError, AttributeError):
-            return None
-
     def _is_likely_amount(self, text: str, match: re.Match) -> bool:
         """Vérifie si la correspondance est probablement un montant."""
         # Exclure les numéros de téléphone, codes postaux, etc.
@@ -108,28 +99,20 @@ class CSPEDocumentProcessor:
             
         return False
 
-    def extract_dates(self, text: str) -> List[CSPEEntity]:
-        """Extrait les dates du texte."""
-        entities = []
-        
-        for regex, date_fmt in self.date_regexes:
+    def _iter_dates(self, text: str):
+        """(date, début, fin) des dates valides du texte."""
+        for regex, groups in self.date_regexes:
             for match in regex.finditer(text):
-                date_str = match.group(0)
-                parsed_date = self._parse_date(date_str, date_fmt)
+                day, month, year = match.group(*groups)
+                if not month.isdigit():
+                    month = self._get_month_number(month)
+                parsed_date = date_from_parts(day, month, year)
                 if parsed_date:
-                    entities.append(CSPEEntity(
-                        value=parsed_date,
-                        entity_type='date',
-                        start_pos=match.start(),
-                        end_pos=match.end()
-                    ))
-        return entities
+                    yield parsed_date, match.start(), match.end()
 
-    def extract_amounts(self, text: str) -> List[CSPEEntity]:
-        """Extrait les montants du texte avec un filtre de contexte amélioré."""
-        entities = []
-        
-        for match in re.finditer(self.AMOUNT_PATTERN, text, re.IGNORECASE):
+    def _iter_amounts(self, text: str):
+        """(montant, début, fin, confiance) des montants du texte, avec un filtre de contexte."""
+        for match in self.amount_regex.finditer(text):
             if not self._is_likely_amount(text, match):
                 continue
                 
@@ -137,53 +120,68 @@ class CSPEDocumentProcessor:
             try:
                 # Vérifier si c'est un nombre décimal valide
                 amount = float(amount_str)
-                
-                # Filtrer les nombres qui ne sont probablement pas des montants
-                if amount < 0.01 or amount > 10_000_000:  # Plage raisonnable pour des montants
-                    continue
-                    
-                # Calculer la confiance basée sur le contexte
-                confidence = 0.9 if '€' in match.group(0) else 0.7
-                
-                entities.append(CSPEEntity(
-                    value=round(amount, 2),  # Arrondir à 2 décimales
-                    entity_type='amount',
-                    start_pos=match.start(),
-                    end_pos=match.end(),
-                    confidence=confidence
-                ))
             except ValueError:
                 continue
                 
-        return entities
+            # Filtrer les nombres qui ne sont probablement pas des montants
+            if amount < 0.01 or amount > 10_000_000:  # Plage raisonnable pour des montants
+                continue
+                
+            # Calculer la confiance basée sur le contexte
+            confidence = 0.9 if '€' in match.group(0) else 0.7
+            yield round(amount, 2), match.start(), match.end(), confidence  # Arrondir à 2 décimales
+
+    def _iter_references(self, text: str):
+        """(type de référence, valeur, début, fin) des références du texte."""
+        for ref_type, regex in self.ref_regexes.items():
+            for match in regex.finditer(text):
+                yield ref_type, match.group(1), match.start(1), match.end(1)
+
+    def extract_dates(self, text: str) -> List[CSPEEntity]:
+        """Extrait les dates du texte."""
+        return [CSPEEntity(value=value, entity_type='date', start_pos=start, end_pos=end)
+                for value, start, end in self._iter_dates(text)]
+
+    def extract_amounts(self, text: str) -> List[CSPEEntity]:
+        """Extrait les montants du texte avec un filtre de contexte amélioré."""
+        return [CSPEEntity(value=value, entity_type='amount', start_pos=start, end_pos=end, confidence=confidence)
+                for value, start, end, confidence in self._iter_amounts(text)]
 
     def extract_references(self, text: str) -> Dict[str, List[CSPEEntity]]:
         """Extrait les références du texte."""
         references = {ref_type: [] for ref_type in self.REFERENCE_PATTERNS}
-        
-        for ref_type, regex in self.ref_regexes.items():
-            for match in regex.finditer(text):
-                ref_value = match.group(1)
-                references[ref_type].append(CSPEEntity(
-                    value=ref_value,
-                    entity_type=f'reference_{ref_type}',
-                    start_pos=match.start(1),
-                    end_pos=match.end(1)
-                ))
-        
+        for ref_type, value, start, end in self._iter_references(text):
+            references[ref_type].append(CSPEEntity(
+                value=value,
+                entity_type=f'reference_{ref_type}',
+                start_pos=start,
+                end_pos=end
+            ))
         return references
 
+    def extract_entity_table(self, text: str) -> EntityTable:
+        """Extrait dates, montants et références dans une table colonnaire, sans objet par entité."""
+        table = EntityTable()
+        for value, start, end in self._iter_dates(text):
+            table.append('date', value, start, end)
+        for value, start, end, confidence in self._iter_amounts(text):
+            table.append('amount', value, start, end, confidence)
+        for ref_type, value, start, end in self._iter_references(text):
+            table.append(f'reference_{ref_type}', value, start, end)
+        return table
+
     def extract_document_info(self, text: str) -> Dict[str, Any]:
         """Extrait toutes les informations pertinentes d'un document CSPE."""
-        dates = self.extract_dates(text)
-        amounts = self.extract_amounts(text)
-        references = self.extract_references(text)
+        table = self.extract_entity_table(text)
+        dates = table.where('date')
+        amounts = table.where('amount')
+        references = {ref_type: table.where(f'reference_{ref_type}') for ref_type in self.REFERENCE_PATTERNS}
         
         return {
-            'dates': [e.to_dict() for e in dates],
-            'amounts': [e.to_dict() for e in amounts],
+            'dates': table.to_dicts(dates),
+            'amounts': table.to_dicts(amounts),
             'references': {
-                ref_type: [e.to_dict() for e in refs] 
+                ref_type: table.to_dicts(refs)
                 for ref_type, refs in references.items()
             },
             'metadata': {
@@ -0,0 +1,154 @@
+"""
+Table colonnaire des entités extraites d'un document.
+
+Une facture chargée produit des centaines d'entités ; les représenter par un
+objet CSPEEntity chacune, immédiatement converti en dictionnaire, puis trier
+des listes de dictionnaires par clé chaîne coûte en allocations et en
+mémoire. EntityTable range les entités dans des colonnes parallèles
+(array de la bibliothèque standard, sans dépendance à importer) :
+
+- type et source : codes sur un octet, renvoyant aux noms internés de la table ;
+- clé numérique : montant, ou ordinal de la date (tri et filtres sans
+  conversion) ; les valeurs textuelles (références) ont leur propre colonne ;
+- positions de début et de fin, confiance.
+
+Les filtres, tris et top-k travaillent sur des indices de lignes ; les
+dictionnaires (format CSPEEntity.to_dict) ne sont construits qu'à la
+frontière JSON, par to_dicts.
+
+Exemple d'utilisation:
+    table = EntityTable()
+    table.append('amount', 1250.0, 10, 21, confidence=0.9)
+    plus_eleves = table.top_k(5, 'amount')
+    rapport = table.to_dicts(plus_eleves)
+"""
+
+import heapq
+from array import array
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+KIND_TEXT = 0
+KIND_NUMBER = 1
+KIND_DATE = 2
+
+
+class EntityTable:
+    """Entités d'un ou plusieurs documents, stockées par colonnes."""
+
+    __slots__ = ('types', 'sources', '_type', '_kind', '_num', '_text', '_start', '_end',
+                 '_confidence', '_source')
+
+    def __init__(self):
+        self.types: List[str] = []
+        self.sources: List[str] = []
+        self._type = array('B')
+        self._kind = array('B')
+        self._num = array('d')
+        self._text: List[Optional[str]] = []
+        self._start = array('l')
+        self._end = array('l')
+        self._confidence = array('d')
+        self._source = array('B')
+
+    def __len__(self) -> int:
+        return len(self._type)
+
+    @staticmethod
+    def _code(names: List[str], name: str) -> int:
+        try:
+            return names.index(name)
+        except ValueError:
+            names.append(name)
+            return len(names) - 1
+
+    def append(self, entity_type: str, value: Any, start: int, end: int,
+               confidence: float = 1.0, source: str = 'regex'):
+        """Ajoute une entité ; la valeur est une date, un nombre ou une chaîne."""
+        self._type.append(self._code(self.types, entity_type))
+        if isinstance(value, date):
+            self._kind.append(KIND_DATE)
+            self._num.append(value.toordinal())
+            self._text.append(None)
+        elif isinstance(value, (int, float)):
+            self._kind.append(KIND_NUMBER)
+            self._num.append(value)
+            self._text.append(None)
+        else:
+            self._kind.append(KIND_TEXT)
+            self._num.append(0.0)
+            self._text.append(value)
+        self._start.append(start)
+        self._end.append(end)
+        self._confidence.append(confidence)
+        self._source.append(self._code(self.sources, source))
+
+    def extend(self, other: 'EntityTable'):
+        """Ajoute toutes les lignes d'une autre table (codes de type et de source réindexés)."""
+        type_map = bytes(self._code(self.types, name) for name in other.types)
+        source_map = bytes(self._code(self.sources, name) for name in other.sources)
+        self._type.frombytes(other._type.tobytes().translate(type_map.ljust(256, b'\0')))
+        self._source.frombytes(other._source.tobytes().translate(source_map.ljust(256, b'\0')))
+        self._kind.extend(other._kind)
+        self._num.extend(other._num)
+        self._text.extend(other._text)
+        self._start.extend(other._start)
+        self._end.extend(other._end)
+        self._confidence.extend(other._confidence)
+
+    def value(self, index: int) -> Any:
+        """Valeur Python d'une ligne (date, nombre ou chaîne)."""
+        kind = self._kind[index]
+        if kind == KIND_DATE:
+            return date.fromordinal(int(self._num[index]))
+        if kind == KIND_NUMBER:
+            return self._num[index]
+        return self._text[index]
+
+    def where(self, entity_type: Optional[str] = None, min_confidence: float = 0.0) -> array:
+        """Indices des lignes d'un type donné (tous types si None) et de confiance suffisante."""
+        if entity_type is None:
+            candidates = range(len(self))
+        elif entity_type not in self.types:
+            return array('l')
+        else:
+            code = self.types.index(entity_type)
+            type_column = self._type
+            candidates = (i for i in range(len(self)) if type_column[i] == code)
+        if min_confidence > 0.0:
+            confidence = self._confidence
+            return array('l', (i for i in candidates if confidence[i] >= min_confidence))
+        return array('l', candidates)
+
+    def argsort(self, indices: Optional[Sequence[int]] = None, reverse: bool = False) -> array:
+        """Indices triés selon la clé numérique (montant ou date)."""
+        if indices is None:
+            indices = range(len(self))
+        return array('l', sorted(indices, key=self._num.__getitem__, reverse=reverse))
+
+    def top_k(self, k: int, entity_type: Optional[str] = None, largest: bool = True) -> array:
+        """Indices des k plus grandes (ou plus petites) valeurs d'un type, sans tri complet."""
+        select = heapq.nlargest if largest else heapq.nsmallest
+        return array('l', select(k, self.where(entity_type), key=self._num.__getitem__))
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """Ligne au format CSPEEntity.to_dict."""
+        value = self.value(index)
+        return {
+            'value': value.isoformat() if self._kind[index] == KIND_DATE else value,
+            'entity_type': self.types[self._type[index]],
+            'start_pos': self._start[index],
+            'end_pos': self._end[index],
+            'confidence': self._confidence[index]
+        }
+
+    def to_dicts(self, indices: Optional[Iterable[int]] = None) -> List[Dict[str, Any]]:
+        """Matérialise des lignes (toutes par défaut) en dictionnaires sérialisables en JSON."""
+        if indices is None:
+            indices = range(len(self))
+        return [self.row(i) for i in indices]
+
+    def nbytes(self) -> int:
+        """Taille approximative des colonnes numériques (hors chaînes des références)."""
+        columns = (self._type, self._kind, self._num, self._start, self._end, self._confidence, self._source)
+        return sum(column.itemsize * len(column) for column in columns) + 8 * len(self._text)
@@ -0,0 +1,311 @@
+"""
+OCR parallèle, page par page, des documents numérisés.
+
+Les dossiers CSPE contiennent des PDF numérisés (factures EDF, accusés de
+réception de la CRE) sans couche texte. Tesseract à 300 dpi demande
+plusieurs secondes par page ; ce module :
+
+- détecte pour chaque page si la couche texte est exploitable et ne lance
+  l'OCR que sur les pages qui n'en ont pas ;
+- répartit l'OCR des pages sur un groupe de processus (tous les cœurs) en
+  conservant l'ordre des pages et une avance bornée ;
+- met en cache le texte reconnu par empreinte de l'image de la page, en
+  mémoire et, si un répertoire est fourni, sur disque ;
+- propose des préréglages de qualité (résolution de rendu et mode de
+  segmentation Tesseract) pour arbitrer entre vitesse et précision.
+
+Le rendu des pages utilise pypdfium2 ; à défaut, l'image intégrée la plus
+grande de la page (cas des numérisations) est extraite avec pypdf.
+
+Exemple d'utilisation:
+    pool = OCRPool(quality='rapide', cache_dir=Path('.cache/ocr'))
+    for page in pool.pdf_pages(open('scan.pdf', 'rb')):
+        print(page[:80])
+"""
+
+import io
+import os
+import re
+import hashlib
+import threading
+import importlib
+import importlib.util
+from pathlib import Path
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Iterator, Optional, Tuple
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+# Moteurs détectés sans être importés : ils ne sont chargés qu'au premier
+# document PDF ou image, pas au démarrage des interfaces et des travailleurs
+PYPDF_MODULE = 'pypdf' if _installed('pypdf') else 'PyPDF2' if _installed('PyPDF2') else None  # PyPDF2 3.x : ancien nom de pypdf
+PYPDF_AVAILABLE = PYPDF_MODULE is not None
+PDFIUM_AVAILABLE = _installed('pypdfium2')
+PIL_AVAILABLE = _installed('PIL')
+TESSERACT_AVAILABLE = PIL_AVAILABLE and _installed('pytesseract')
+
+OCR_LANG = os.getenv('OCR_LANG', 'fra')
+
+# (résolution de rendu en dpi, options Tesseract)
+QUALITY_PRESETS: Dict[str, Tuple[int, str]] = {
+    'rapide': (200, '--oem 1 --psm 6'),
+    'standard': (300, '--oem 1 --psm 3'),
+    'precis': (400, '--oem 1 --psm 1')
+}
+
+MIN_TEXT_CHARS = 40  # caractères alphanumériques pour une couche texte exploitable
+MIN_TEXT_RATIO = 0.6  # part minimale de lettres, chiffres et espaces
+MEMORY_CACHE_SIZE = 512  # pages conservées en mémoire
+
+_WORD_CHARS = re.compile(r'\w', re.UNICODE)
+_CLEAN_CHARS = re.compile(r'[\w\s.,;:!?()\'"€%/-]', re.UNICODE)
+
+
+def has_text_layer(text: Optional[str]) -> bool:
+    """
+    Vrai si le texte extrait d'une page est exploitable sans OCR.
+
+    Une page numérisée n'a pas de texte, ou seulement quelques caractères
+    parasites (tampon, numéro de page, glyphes mal encodés).
+    """
+    if not text:
+        return False
+    stripped = text.strip()
+    if len(_WORD_CHARS.findall(stripped)) < MIN_TEXT_CHARS:
+        return False
+    return len(_CLEAN_CHARS.findall(stripped)) / len(stripped) >= MIN_TEXT_RATIO
+
+
+def image_digest(image, lang: str, config: str) -> str:
+    """Empreinte d'une image de page (pixels, dimensions) et des options OCR."""
+    digest = hashlib.sha256(f'{image.mode}|{image.size}|{lang}|{config}'.encode('utf-8'))
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def _recognize(image, lang: str, config: str) -> str:
+    """OCR d'une image de page (exécuté dans un processus du groupe)."""
+    import pytesseract
+    if image.mode not in ('L', 'RGB'):
+        image = image.convert('RGB')
+    return pytesseract.image_to_string(image, lang=lang, config=config)
+
+
+class OCRCache:
+    """
+    Texte reconnu par empreinte d'image : LRU en mémoire, fichiers sur disque.
+
+    Args:
+        cache_dir: Répertoire du cache persistant (optionnel)
+        max_entries: Nombre de pages conservées en mémoire
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, max_entries: int = MEMORY_CACHE_SIZE):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f'{key}.txt'
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        text = None
+        if self.cache_dir:
+            try:
+                text = self._path(key).read_text(encoding='utf-8')
+            except OSError:
+                pass
+        with self._lock:
+            if text is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._remember(key, text)
+        return text
+
+    def put(self, key: str, text: str):
+        with self._lock:
+            self._remember(key, text)
+        if self.cache_dir:
+            path = self._path(key)
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_suffix('.tmp')
+                tmp_path.write_text(text, encoding='utf-8')
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"Erreur lors de l'écriture du cache OCR: {e}")
+
+    def _remember(self, key: str, text: str):
+        self._entries[key] = text
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class OCRPool:
+    """
+    OCR des pages sans couche texte sur un groupe de processus.
+
+    Args:
+        workers: Nombre de processus (par défaut, le nombre de cœurs)
+        quality: Préréglage de QUALITY_PRESETS ('rapide', 'standard', 'precis')
+        dpi: Résolution de rendu ; remplace celle du préréglage
+        lang: Langue(s) Tesseract
+        cache_dir: Répertoire du cache persistant des pages reconnues
+        use_processes: False pour exécuter l'OCR dans des threads
+        lookahead: Pages rendues et soumises en avance sur la page produite
+    """
+
+    def __init__(self, workers: Optional[int] = None, quality: str = 'standard', dpi: Optional[int] = None,
+                 lang: str = OCR_LANG, cache_dir: Optional[Path] = None, use_processes: bool = True,
+                 lookahead: Optional[int] = None):
+        if quality not in QUALITY_PRESETS:
+            raise ValueError(f"Qualité OCR inconnue: {quality} (valeurs: {', '.join(QUALITY_PRESETS)})")
+        preset_dpi, self.config = QUALITY_PRESETS[quality]
+        self.dpi = dpi or preset_dpi
+        self.lang = lang
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.lookahead = lookahead or 2 * self.workers
+        self.cache = OCRCache(cache_dir)
+        self.use_processes = use_processes
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                executor_class = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+                self._executor = executor_class(self.workers)
+            return self._executor
+
+    def submit(self, image) -> Future:
+        """Soumet l'OCR d'une image de page ; le résultat en cache est immédiat."""
+        key = image_digest(image, self.lang, self.config)
+        cached = self.cache.get(key)
+        if cached is not None:
+            future = Future()
+            future.set_result(cached)
+            return future
+        future = self._pool().submit(_recognize, image, self.lang, self.config)
+
+        def store(done: Future):
+            if not done.cancelled() and done.exception() is None:
+                self.cache.put(key, done.result())
+        future.add_done_callback(store)
+        return future
+
+    def _ordered(self, pages: Iterator) -> Iterator[str]:
+        # pages produit du texte (couche exploitable) ou une image à reconnaître ;
+        # les images sont soumises en avance, les textes restitués dans l'ordre
+        pending = deque()
+        for page in pages:
+            pending.append(page if isinstance(page, str) else self.submit(page))
+            while pending and (len(pending) > self.lookahead or isinstance(pending[0], str) or pending[0].done()):
+                yield self._resolve(pending.popleft())
+        while pending:
+            yield self._resolve(pending.popleft())
+
+    @staticmethod
+    def _resolve(page) -> str:
+        return page if isinstance(page, str) else page.result()
+
+    def image_pages(self, stream) -> Iterator[str]:
+        """Texte de chaque image d'un fichier image (TIFF multipage compris)."""
+        if not TESSERACT_AVAILABLE:
+            raise RuntimeError("OCR indisponible : installer pytesseract et Tesseract (tesseract-ocr-fra)")
+
+        from PIL import Image, ImageSequence
+
+        def frames():
+            with Image.open(stream) as image:
+                for frame in ImageSequence.Iterator(image):
+                    yield frame.copy()
+        yield from self._ordered(frames())
+
+    def pdf_pages(self, stream) -> Iterator[str]:
+        """
+        Texte de chaque page d'un PDF : couche texte si exploitable, OCR sinon.
+
+        Sans Tesseract ou sans moyen d'obtenir l'image d'une page, la couche
+        texte est restituée telle quelle.
+        """
+        reader = importlib.import_module(PYPDF_MODULE).PdfReader(stream)
+        document = None
+        if TESSERACT_AVAILABLE and PDFIUM_AVAILABLE:
+            import pypdfium2 as pdfium
+            stream.seek(0)
+            document = pdfium.PdfDocument(stream.read())
+        warned = False
+
+        def pages():
+            nonlocal warned
+            for index, page in enumerate(reader.pages):
+                text = page.extract_text() or ''
+                if has_text_layer(text):
+                    yield text
+                    continue
+                image = self._page_image(document, page, index) if TESSERACT_AVAILABLE else None
+                if image is None:
+                    if not warned:
+                        print("Avertissement: page numérisée sans OCR disponible, texte incomplet.")
+                        warned = True
+                    yield text
+                else:
+                    yield image
+        try:
+            yield from self._ordered(pages())
+        finally:
+            if document is not None:
+                document.close()
+
+    def _page_image(self, document, page, index: int):
+        if document is not None:
+            return document[index].render(scale=self.dpi / 72).to_pil()
+        # Numérisation : la page est une image intégrée, extraite à sa résolution native
+        try:
+            images = list(page.images)
+        except Exception:
+            return None
+        if not images:
+            return None
+        largest = max(images, key=lambda embedded: len(embedded.data))
+        from PIL import Image
+        return Image.open(io.BytesIO(largest.data))
+
+    def shutdown(self):
+        """Arrête le groupe de processus."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+_default_pool = None
+_default_lock = threading.Lock()
+
+
+def default_pool() -> OCRPool:
+    """Groupe OCR partagé, configuré par OCR_WORKERS, OCR_QUALITY, OCR_DPI et OCR_CACHE_DIR."""
+    global _default_pool
+    with _default_lock:
+        if _default_pool is None:
+            _default_pool = OCRPool(
+                workers=int(os.getenv('OCR_WORKERS', '0')) or None,
+                quality=os.getenv('OCR_QUALITY', 'standard'),
+                dpi=int(os.getenv('OCR_DPI', '0')) or None,
+                cache_dir=os.getenv('OCR_CACHE_DIR') or None
+            )
+        return _default_pool
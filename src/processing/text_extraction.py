@@ -0,0 +1,218 @@
+"""
+Extraction du texte des pièces de dossier CSPE (PDF, DOCX, images, texte).
+
+Chaque format a son moteur ; le texte est produit page par page, à la
+demande, pour que l'analyse puisse commencer sur la première page avant
+que le fichier ne soit entièrement lu :
+
+- PDF : pypdf / PyPDF2 (rapide), à défaut pdfminer.six ; les pages sans
+  couche texte exploitable passent par l'OCR parallèle du module ocr ;
+- DOCX : lecture en flux de word/document.xml (bibliothèque standard),
+  une page par saut de page ;
+- images (PNG, JPEG, TIFF multipage) : Tesseract via le module ocr, langue
+  française par défaut (paquet tesseract-ocr-fra de l'image Docker) ;
+- texte : décodage commun du module decoding (encodage détecté).
+
+Les moteurs optionnels absents sont signalés par ExtractionError au moment
+où un fichier de ce format est rencontré.
+
+Exemple d'utilisation:
+    for numero, page in enumerate(iter_pages('facture.pdf'), 1):
+        print(numero, page[:80])
+    texte = extract_text(uploaded_file.getvalue(), uploaded_file.name)
+"""
+
+import io
+import os
+import zipfile
+import importlib.util
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Union
+from xml.etree.ElementTree import iterparse
+
+from .decoding import decode_bytes
+from .ocr import PYPDF_AVAILABLE, TESSERACT_AVAILABLE, OCRPool, default_pool
+
+PDFMINER_AVAILABLE = importlib.util.find_spec('pdfminer') is not None  # importé au premier PDF lu
+
+SUPPORTED_EXTENSIONS = {
+    '.pdf': 'pdf',
+    '.docx': 'docx',
+    '.png': 'image', '.jpg': 'image', '.jpeg': 'image', '.tif': 'image', '.tiff': 'image',
+    '.txt': 'text', '.csv': 'text', '.md': 'text'
+}
+
+_WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+Source = Union[str, os.PathLike, bytes, bytearray, memoryview, Any]
+
+
+class ExtractionError(Exception):
+    """Format non pris en charge ou moteur d'extraction absent."""
+
+
+def detect_format(filename: Optional[str] = None, head: bytes = b'') -> str:
+    """
+    Format d'un fichier d'après ses premiers octets, à défaut son extension.
+
+    Returns:
+        'pdf', 'docx', 'image' ou 'text'
+    """
+    if head.startswith(b'%PDF'):
+        return 'pdf'
+    if head.startswith((b'\x89PNG', b'\xff\xd8\xff', b'II*\x00', b'MM\x00*')):
+        return 'image'
+    if head.startswith(b'PK\x03\x04') and (filename is None or Path(filename).suffix.lower() != '.txt'):
+        return 'docx'
+    if filename:
+        return SUPPORTED_EXTENSIONS.get(Path(filename).suffix.lower(), 'text')
+    return 'text'
+
+
+def available_backends() -> Dict[str, bool]:
+    """Moteurs d'extraction installés."""
+    return {
+        'pypdf': PYPDF_AVAILABLE,
+        'pdfminer': PDFMINER_AVAILABLE,
+        'tesseract': TESSERACT_AVAILABLE
+    }
+
+
+class MemoryReader(io.RawIOBase):
+    """Flux binaire adressable en lecture seule sur un tampon, sans copie du contenu."""
+
+    def __init__(self, buffer):
+        super().__init__()
+        self._view = memoryview(buffer).cast('B')
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, target) -> int:
+        count = min(len(target), len(self._view) - self._pos)
+        if count <= 0:
+            return 0
+        target[:count] = self._view[self._pos:self._pos + count]
+        self._pos += count
+        return count
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._view)}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def close(self):
+        self._view.release()
+        super().close()
+
+
+def _open_binary(source: Source):
+    """Flux binaire adressable et indicateur de fermeture à la charge de l'appelant."""
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, 'rb'), True
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return MemoryReader(source), True
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return source, False
+
+
+def iter_pages(source: Source, filename: Optional[str] = None, ocr: Optional[OCRPool] = None) -> Iterator[str]:
+    """
+    Produit le texte d'un fichier page par page, à la demande.
+
+    Args:
+        source: Chemin, contenu en octets (memoryview compris, lu sans
+            copie) ou flux binaire (ex. fichier Streamlit téléversé)
+        filename: Nom du fichier (extension) si source n'est pas un chemin
+        ocr: Groupe OCR des pages numérisées (par défaut, le groupe partagé)
+
+    Raises:
+        ExtractionError: si le moteur requis pour ce format n'est pas installé
+    """
+    if filename is None and isinstance(source, (str, os.PathLike)):
+        filename = os.fspath(source)
+    stream, owned = _open_binary(source)
+    try:
+        head = stream.read(8)
+        stream.seek(0)
+        kind = detect_format(filename, head)
+        if kind == 'pdf':
+            yield from _pdf_pages(stream, ocr)
+        elif kind == 'image':
+            yield from _image_pages(stream, ocr)
+        elif kind == 'docx':
+            yield from _docx_pages(stream)
+        elif isinstance(source, (bytes, bytearray, memoryview)):
+            yield decode_bytes(source)
+        else:
+            yield from _text_pages(stream)
+    finally:
+        if owned:
+            stream.close()
+
+
+def extract_text(source: Source, filename: Optional[str] = None, page_separator: str = '\n\n',
+                 ocr: Optional[OCRPool] = None) -> str:
+    """Texte complet d'un fichier (pages jointes par page_separator)."""
+    return page_separator.join(iter_pages(source, filename, ocr))
+
+
+def _pdf_pages(stream, ocr: Optional[OCRPool]) -> Iterator[str]:
+    if PYPDF_AVAILABLE:
+        # Les pages sont analysées une à une lors de l'itération
+        yield from (ocr or default_pool()).pdf_pages(stream)
+    elif PDFMINER_AVAILABLE:
+        from pdfminer.high_level import extract_pages
+        from pdfminer.layout import LTTextContainer
+        for layout in extract_pages(stream):
+            yield ''.join(element.get_text() for element in layout if isinstance(element, LTTextContainer))
+    else:
+        raise ExtractionError("Aucun moteur PDF installé (pypdf ou pdfminer.six)")
+
+
+def _docx_pages(stream) -> Iterator[str]:
+    try:
+        archive = zipfile.ZipFile(stream)
+        document = archive.open('word/document.xml')
+    except (zipfile.BadZipFile, KeyError) as e:
+        raise ExtractionError(f"Document DOCX invalide : {e}")
+    with archive, document:
+        paragraphs, current = [], []
+        for event, element in iterparse(document, events=('start', 'end')):
+            tag = element.tag
+            if event == 'start':
+                if tag == f'{_WORD_NS}br' and element.get(f'{_WORD_NS}type') == 'page' and (paragraphs or current):
+                    paragraphs.append(''.join(current))
+                    current = []
+                    yield '\n'.join(paragraphs).strip('\n')
+                    paragraphs = []
+                continue
+            if tag == f'{_WORD_NS}t' and element.text:
+                current.append(element.text)
+            elif tag == f'{_WORD_NS}tab':
+                current.append('\t')
+            elif tag == f'{_WORD_NS}p':
+                paragraphs.append(''.join(current))
+                current = []
+                element.clear()  # mémoire bornée sur les longs documents
+        if paragraphs or current:
+            paragraphs.append(''.join(current))
+            yield '\n'.join(paragraphs).strip('\n')
+
+
+def _image_pages(stream, ocr: Optional[OCRPool]) -> Iterator[str]:
+    if not TESSERACT_AVAILABLE:
+        raise ExtractionError("OCR indisponible : installer pytesseract et Tesseract (tesseract-ocr-fra)")
+    yield from (ocr or default_pool()).image_pages(stream)
+
+
+def _text_pages(stream) -> Iterator[str]:
+    yield decode_bytes(stream.read())
@@ -0,0 +1,263 @@
+"""
+Sortie incrémentale des résultats d'import par lot.
+
+Chaque résultat est ajouté au fichier JSONL dès qu'il est produit (lisible
+pendant l'exécution avec `tail -f`), et optionnellement à un fichier
+Parquet par groupes de lignes. La mémoire utilisée ne dépend pas de la
+taille du lot : les rapports finaux sont produits par une passe en flux
+sur le fichier JSONL.
+
+Exemple d'utilisation:
+    with ResultSink(Path('rapports'), parquet=True) as sink:
+        for result in results:
+            sink.write(result)
+    summary = summarize_results(Path('rapports'))
+"""
+
+import csv
+import json
+import importlib.util
+from pathlib import Path
+from datetime import datetime
+from collections import Counter
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+
+from serialization import JSONArrayWriter, dumpb, loads
+
+# pyarrow n'est importé qu'à la première écriture Parquet
+PYARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+RESULTS_JSONL = 'resultats.jsonl'
+PARQUET_DIR = 'resultats_parquet'
+CRITERIA = ('delai', 'periode', 'prescription', 'repercussion')
+
+
+def _flatten(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Ligne plate (rapport CSV / Parquet) à partir d'un résultat."""
+    row = {
+        'fichier': result.get('fichier'),
+        'chemin': result.get('chemin'),
+        'categorie': result.get('categorie'),
+        'decision': result.get('decision'),
+        'confiance': result.get('confiance'),
+        'date_traitement': result.get('date_traitement')
+    }
+    criteres = result.get('criteres') or {}
+    for name in CRITERIA:
+        critere = criteres.get(name) or {}
+        row[f'{name}_valide'] = critere.get('valide')
+        row[f'{name}_details'] = critere.get('details')
+    return row
+
+
+def _parquet_schema():
+    import pyarrow as pa
+    fields = [
+        ('fichier', pa.string()), ('chemin', pa.string()), ('categorie', pa.string()),
+        ('decision', pa.string()), ('confiance', pa.float64()), ('date_traitement', pa.string())
+    ]
+    for name in CRITERIA:
+        fields += [(f'{name}_valide', pa.bool_()), (f'{name}_details', pa.string())]
+    return pa.schema(fields)
+
+
+def _drop_partial_line(path: Path, block_size: int = 65536):
+    """
+    Coupe le fichier après son dernier saut de ligne.
+
+    Une ligne tronquée par un arrêt brutal serait sinon prolongée par le
+    résultat suivant : la ligne fusionnée serait illisible et les positions
+    relues par _iter_lines ne correspondraient plus aux pointeurs du journal.
+    """
+    if not path.exists():
+        return
+    with open(path, 'r+b') as f:
+        end = f.seek(0, 2)
+        position = end
+        while position > 0:
+            start = max(0, position - block_size)
+            f.seek(start)
+            index = f.read(position - start).rfind(b'\n')
+            if index >= 0:
+                position = start + index + 1
+                break
+            position = start
+        if position < end:
+            f.truncate(position)
+
+
+class ResultSink:
+    """
+    Écrit les résultats au fil de l'eau en JSONL (et Parquet si demandé).
+
+    Args:
+        output_dir: Répertoire des rapports
+        parquet: Écrire aussi un fichier Parquet (pyarrow requis)
+        row_group_size: Nombre de lignes mises en tampon par groupe Parquet
+        truncate: Repartir d'un fichier JSONL vide au lieu d'ajouter
+    """
+
+    def __init__(self, output_dir: Path, parquet: bool = False, row_group_size: int = 5000,
+                 truncate: bool = False):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.jsonl_path = self.output_dir / RESULTS_JSONL
+        if not truncate:
+            _drop_partial_line(self.jsonl_path)
+        # Binaire : les positions renvoyées par write sont des octets exacts
+        self._jsonl = open(self.jsonl_path, 'wb' if truncate else 'ab')
+        self.count = 0
+
+        self.parquet_path = None
+        self._writer = None
+        self._rows = []
+        self.row_group_size = row_group_size
+        if parquet:
+            if PYARROW_AVAILABLE:
+                # Un fichier par exécution : un fichier Parquet ne se complète pas
+                parquet_dir = self.output_dir / PARQUET_DIR
+                parquet_dir.mkdir(exist_ok=True)
+                self.parquet_path = parquet_dir / f"resultats_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.parquet"
+            else:
+                print("Avertissement: pyarrow n'est pas installé. Sortie Parquet désactivée.")
+
+    def write(self, result: Dict[str, Any]) -> int:
+        """
+        Ajoute un résultat (visible immédiatement dans le fichier JSONL).
+
+        Returns:
+            Position de la ligne dans le fichier JSONL (pointeur pour read_result)
+        """
+        offset = self._jsonl.tell()
+        self._jsonl.write(dumpb(result) + b'\n')
+        self._jsonl.flush()
+        self.count += 1
+        if self.parquet_path:
+            self._rows.append(_flatten(result))
+            if len(self._rows) >= self.row_group_size:
+                self._flush_parquet()
+        return offset
+
+    def _flush_parquet(self):
+        if not self._rows:
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        schema = _parquet_schema()
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.parquet_path, schema)
+        self._writer.write_table(pa.Table.from_pylist(self._rows, schema=schema))
+        self._rows = []
+
+    def close(self):
+        """Vide les tampons et ferme les fichiers."""
+        if self.parquet_path:
+            self._flush_parquet()
+            if self._writer is not None:
+                self._writer.close()
+        self._jsonl.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def _iter_lines(output_dir: Path) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    path = Path(output_dir) / RESULTS_JSONL
+    if not path.exists():
+        return
+    with open(path, 'rb') as f:
+        offset = 0
+        for line in f:
+            try:
+                yield offset, loads(line)
+            except json.JSONDecodeError:
+                pass
+            offset += len(line)
+
+
+def iter_results(output_dir: Path, live_refs: Optional[Set[int]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Relit les résultats JSONL un par un (une ligne tronquée est ignorée).
+
+    Args:
+        output_dir: Répertoire des rapports
+        live_refs: Pointeurs à conserver ; les résultats remplacés lors d'une
+            exécution ultérieure (fichier modifié, nouveau modèle) sont ignorés
+    """
+    for offset, result in _iter_lines(output_dir):
+        if live_refs is None or offset in live_refs:
+            yield result
+
+
+def read_result(output_dir: Path, offset: int) -> Dict[str, Any]:
+    """Relit un seul résultat à partir de son pointeur."""
+    with open(Path(output_dir) / RESULTS_JSONL, 'rb') as f:
+        f.seek(offset)
+        return loads(f.readline())
+
+
+def summarize_results(output_dir: Path, json_report: bool = True,
+                      live_refs: Optional[Set[int]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Passe finale en flux sur le JSONL : synthèse agrégée et rapports.
+
+    Écrit synthese.json (compteurs), synthese_resultats.csv (une ligne par
+    fichier) et, si json_report, rapport_complet.json (liste JSON), sans
+    jamais charger l'ensemble des résultats en mémoire. Avec live_refs, seul
+    le dernier résultat de chaque fichier est pris en compte.
+
+    Returns:
+        La synthèse, ou None si aucun résultat n'a été produit
+    """
+    output_dir = Path(output_dir)
+    decisions, categories = Counter(), Counter()
+    criteres_valides = Counter()
+    total, confiance_totale = 0, 0.0
+
+    csv_file = open(output_dir / 'synthese_resultats.csv', 'w', newline='', encoding='utf-8-sig')
+    json_file = open(output_dir / 'rapport_complet.json', 'wb') if json_report else None
+    # Liste JSON écrite élément par élément, sans construire le document complet
+    json_writer = JSONArrayWriter(json_file, lines=True) if json_file else None
+    try:
+        writer = None
+        for result in iter_results(output_dir, live_refs):
+            row = _flatten(result)
+            if writer is None:
+                writer = csv.DictWriter(csv_file, fieldnames=list(row))
+                writer.writeheader()
+            writer.writerow(row)
+            if json_writer:
+                json_writer.write(result)
+
+            total += 1
+            decisions[row['decision']] += 1
+            categories[row['categorie']] += 1
+            confiance_totale += row['confiance'] or 0.0
+            for name in CRITERIA:
+                if row[f'{name}_valide']:
+                    criteres_valides[name] += 1
+        if json_writer:
+            json_writer.close()
+    finally:
+        csv_file.close()
+        if json_file:
+            json_file.close()
+
+    if total == 0:
+        return None
+
+    summary = {
+        'total': total,
+        'decisions': dict(decisions),
+        'categories': dict(categories),
+        'confiance_moyenne': round(confiance_totale / total, 4),
+        'criteres_valides': {name: criteres_valides[name] for name in CRITERIA},
+        'date_synthese': datetime.now().isoformat()
+    }
+    with open(output_dir / 'synthese.json', 'wb') as f:
+        f.write(dumpb(summary, indent=True))
+    return summary
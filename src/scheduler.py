@@ -0,0 +1,263 @@
+"""
+Ordonnancement des analyses de dossiers par priorité et échéance.
+
+Les dossiers urgents (proches de la fin du délai de recours de deux mois
+vérifié par DocumentProcessor.check_delay) ne doivent pas attendre derrière
+un lot de plusieurs milliers de fichiers. Ce module fournit :
+
+- deadline_from_dates / estimate_deadline : échéance de recours et bonus
+  d'urgence à partir des dates du dossier (pré-extraction peu coûteuse sur
+  le début du texte) ;
+- JobScheduler : groupe de travailleurs partagé entre requêtes interactives
+  (Streamlit) et travaux par lot, avec une file de priorité par classe
+  (priorité explicite, puis échéance la plus proche, puis ordre d'arrivée),
+  un partage pondéré entre les deux classes, des travailleurs réservés aux
+  requêtes interactives et une préemption coopérative des travaux par lot.
+
+Exemple d'utilisation:
+    scheduler = JobScheduler(workers=4)
+    future = scheduler.submit(classifier.classify, texte, kind=INTERACTIVE)
+    resultat = future.result()
+"""
+
+import sys
+import heapq
+import inspect
+import itertools
+import threading
+from pathlib import Path
+from dataclasses import dataclass, field
+from concurrent.futures import Future
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Union
+
+# Extracteur d'entités (module document_processor à la racine du projet)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+INTERACTIVE = 'interactif'
+BATCH = 'lot'
+
+RECOURS_DAYS = 60  # délai de recours vérifié par DocumentProcessor.check_delay
+PREVIEW_CHARS = 8192  # début de texte examiné par la pré-extraction
+URGENCY_LEVELS = ((15, 2), (30, 1))  # (jours restants maximum, bonus de priorité)
+
+_extractor = None
+
+
+def deadline_from_dates(dates: Iterable[Union[date, str]], today: Optional[date] = None) -> Tuple[int, Optional[date]]:
+    """
+    Échéance de recours et bonus d'urgence à partir de dates (objets date ou
+    chaînes 'AAAA-MM-JJ', telles que relues depuis un résultat JSON).
+
+    Comme check_delay, la date la plus récente est prise comme date de
+    décision ; l'échéance est cette date plus 60 jours.
+
+    Returns:
+        (bonus de priorité, échéance) ; (0, None) sans date exploitable.
+        Un délai déjà expiré ne donne pas de bonus : le dossier n'est plus urgent.
+    """
+    latest = None
+    for value in dates:
+        if isinstance(value, date):
+            parsed = value
+        else:
+            try:
+                parsed = datetime.strptime(value, '%Y-%m-%d').date()
+            except (TypeError, ValueError):
+                continue
+        if latest is None or parsed > latest:
+            latest = parsed
+    if latest is None:
+        return 0, None
+
+    deadline = latest + timedelta(days=RECOURS_DAYS)
+    days_left = (deadline - (today or date.today())).days
+    for max_days, bonus in URGENCY_LEVELS:
+        if 0 <= days_left <= max_days:
+            return bonus, deadline
+    return 0, deadline
+
+
+def estimate_deadline(text: str, today: Optional[date] = None) -> Tuple[int, Optional[date]]:
+    """Pré-extraction peu coûteuse : deadline_from_dates sur le début du texte."""
+    global _extractor
+    if _extractor is None:
+        from document_processor import SmartEntityExtractor
+        _extractor = SmartEntityExtractor()
+    return deadline_from_dates((e.date_value for e in _extractor.extract_dates(text[:PREVIEW_CHARS])), today)
+
+
+class Preempted(Exception):
+    """Levée par un travail par lot qui cède sa place ; il est remis en file."""
+
+
+@dataclass(order=True)
+class Job:
+    """Travail en attente ; l'ordre des champs de tri définit la priorité."""
+    sort_key: Tuple = field(init=False, repr=False)
+    priority: int = field(compare=False, default=0)
+    deadline: Optional[date] = field(compare=False, default=None)
+    seq: int = field(compare=False, default=0)
+    kind: str = field(compare=False, default=BATCH)
+    fn: Callable = field(compare=False, default=None, repr=False)
+    args: tuple = field(compare=False, default=(), repr=False)
+    kwargs: Dict[str, Any] = field(compare=False, default_factory=dict, repr=False)
+    future: Future = field(compare=False, default_factory=Future, repr=False)
+    preempt: threading.Event = field(compare=False, default_factory=threading.Event, repr=False)
+
+    def __post_init__(self):
+        # Priorité décroissante, puis échéance la plus proche, puis ordre d'arrivée
+        self.sort_key = (-self.priority, self.deadline or date.max, self.seq)
+
+
+class JobContext:
+    """Contexte passé aux travaux qui acceptent l'argument job_context."""
+
+    def __init__(self, job: Job):
+        self.job = job
+
+    def should_yield(self) -> bool:
+        """Vrai si une requête interactive attend le travailleur de ce travail par lot."""
+        return self.job.preempt.is_set()
+
+    def checkpoint(self):
+        """Point de préemption : lève Preempted si le travail doit céder sa place."""
+        if self.should_yield():
+            raise Preempted()
+
+
+def accepts_context(fn: Callable) -> bool:
+    """Indique si fn accepte l'argument job_context (travail préemptible)."""
+    try:
+        return 'job_context' in inspect.signature(fn).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+class JobScheduler:
+    """
+    Groupe de travailleurs à deux classes (interactif / lot) avec priorités.
+
+    Args:
+        workers: Nombre de travailleurs (appels simultanés, au LLM par exemple)
+        reserved_interactive: Travailleurs que les travaux par lot ne peuvent
+            pas occuper, pour qu'une requête interactive démarre sans attendre
+        interactive_weight: Nombre de travaux interactifs servis pour un
+            travail par lot lorsque les deux files sont non vides
+    """
+
+    def __init__(self, workers: int = 4, reserved_interactive: Optional[int] = None,
+                 interactive_weight: int = 3):
+        self.workers = max(1, workers)
+        if reserved_interactive is None:
+            reserved_interactive = 1 if self.workers > 1 else 0
+        self.batch_limit = max(1, self.workers - reserved_interactive)
+        self.interactive_weight = max(1, interactive_weight)
+        self._queues = {INTERACTIVE: [], BATCH: []}
+        self._running = {INTERACTIVE: [], BATCH: []}
+        self._served_interactive = 0  # interactifs servis depuis le dernier lot
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, fn: Callable, *args, kind: str = BATCH, priority: int = 0,
+               deadline: Optional[date] = None, text: Optional[str] = None, **kwargs) -> Future:
+        """
+        Met un travail en file et retourne son Future.
+
+        Args:
+            fn: Fonction à exécuter ; si elle accepte l'argument job_context,
+                elle reçoit un JobContext pour coopérer à la préemption
+            kind: INTERACTIVE ou BATCH
+            priority: Priorité explicite (plus grande = plus urgente)
+            deadline: Échéance du dossier ; estimée depuis text si absente
+            text: Texte du dossier pour la pré-extraction des dates
+        """
+        if text is not None and deadline is None:
+            bonus, deadline = estimate_deadline(text)
+            priority += bonus
+        job = Job(priority=priority, deadline=deadline, seq=next(self._seq), kind=kind,
+                  fn=fn, args=args, kwargs=kwargs)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Ordonnanceur arrêté")
+            heapq.heappush(self._queues[kind], job)
+            if kind == INTERACTIVE:
+                self._request_preemption()
+            self._cond.notify_all()
+        return job.future
+
+    def pending(self) -> Dict[str, int]:
+        """Nombre de travaux en attente par classe."""
+        with self._cond:
+            return {kind: len(jobs) for kind, jobs in self._queues.items()}
+
+    def shutdown(self, wait: bool = True):
+        """Arrête les travailleurs après la fin des travaux en file."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def _request_preemption(self):
+        # Appelé sous verrou : si aucun travailleur n'est libre pour les
+        # interactifs en attente, demander aux travaux par lot les moins
+        # prioritaires de céder leur place au prochain point de préemption
+        busy = len(self._running[INTERACTIVE]) + len(self._running[BATCH])
+        yielding = sum(job.preempt.is_set() for job in self._running[BATCH])
+        needed = len(self._queues[INTERACTIVE]) - (self.workers - busy) - yielding
+        for job in sorted(self._running[BATCH], reverse=True):
+            if needed <= 0:
+                break
+            if not job.preempt.is_set():
+                job.preempt.set()
+                needed -= 1
+
+    def _next_job(self) -> Optional[Job]:
+        # Appelé sous verrou : partage pondéré entre les deux classes
+        interactive, batch = self._queues[INTERACTIVE], self._queues[BATCH]
+        batch_allowed = bool(batch) and len(self._running[BATCH]) < self.batch_limit
+        if interactive and (not batch_allowed or self._served_interactive < self.interactive_weight):
+            self._served_interactive += 1
+            return heapq.heappop(interactive)
+        if batch_allowed:
+            self._served_interactive = 0
+            return heapq.heappop(batch)
+        return None
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                job = self._next_job()
+                while job is None:
+                    if self._closed and not any(self._queues.values()):
+                        return
+                    self._cond.wait()
+                    job = self._next_job()
+                self._running[job.kind].append(job)
+            # Un travail remis en file après préemption est déjà démarré
+            if job.future.running() or job.future.set_running_or_notify_cancel():
+                self._run(job)
+            with self._cond:
+                self._running[job.kind].remove(job)
+                self._cond.notify_all()
+
+    def _run(self, job: Job):
+        kwargs = job.kwargs
+        if accepts_context(job.fn):
+            kwargs = dict(kwargs, job_context=JobContext(job))
+        try:
+            job.future.set_result(job.fn(*job.args, **kwargs))
+        except Preempted:
+            # Remis en file avec sa clé d'origine : il garde son rang
+            requeued = Job(priority=job.priority, deadline=job.deadline, seq=job.seq, kind=job.kind,
+                           fn=job.fn, args=job.args, kwargs=job.kwargs, future=job.future)
+            with self._cond:
+                heapq.heappush(self._queues[job.kind], requeued)
+        except BaseException as e:
+            job.future.set_exception(e)
@@ -0,0 +1,153 @@
+"""
+Sérialisation JSON des rapports et des échanges internes.
+
+Les rapports étaient produits par json.dumps(..., indent=2,
+ensure_ascii=False) après une passe to_dict sur chaque objet, et les
+téléchargements groupés sérialisaient tous les rapports en une seule chaîne.
+Ce module centralise la sérialisation :
+
+- orjson lorsqu'il est installé (plusieurs fois plus rapide, sortie UTF-8
+  directement en octets), json de la bibliothèque standard sinon ;
+- dates, énumérations (Decision...), dataclasses, chemins et ensembles sont
+  pris en charge nativement, sans passe to_dict préalable ;
+- JSONArrayWriter / JSONObjectWriter écrivent un lot de rapports élément
+  par élément dans un flux binaire, sans construire la chaîne complète ;
+- pack / unpack pour les copies et caches internes : msgpack s'il est
+  installé, JSON compact sinon.
+
+Exemple d'utilisation:
+    contenu = dumpb(rapport, indent=True)
+    with open('rapports.json', 'wb') as f, JSONObjectWriter(f, lines=True) as writer:
+        for nom, rapport in rapports:
+            writer.write(nom, rapport)
+"""
+
+import json
+import dataclasses
+from enum import Enum
+from pathlib import PurePath
+from datetime import date, datetime
+from typing import Any, BinaryIO, Union
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+
+def _default(obj: Any) -> Any:
+    """Types non JSON : converti en équivalent sérialisable (les deux moteurs l'utilisent)."""
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return obj.to_dict() if hasattr(obj, 'to_dict') else dataclasses.asdict(obj)
+    if isinstance(obj, PurePath):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj, key=str)
+    if hasattr(obj, 'to_dict'):
+        return obj.to_dict()
+    raise TypeError(f"Type non sérialisable en JSON : {type(obj).__name__}")
+
+
+if ORJSON_AVAILABLE:
+    _OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumpb(obj: Any, indent: bool = False) -> bytes:
+        """Sérialise en JSON UTF-8 (indentation de 2 espaces si indent)."""
+        return orjson.dumps(obj, default=_default,
+                            option=_OPTIONS | orjson.OPT_INDENT_2 if indent else _OPTIONS)
+
+    def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        """Désérialise un document JSON (octets ou chaîne)."""
+        return orjson.loads(data)
+else:
+    def dumpb(obj: Any, indent: bool = False) -> bytes:
+        """Sérialise en JSON UTF-8 (indentation de 2 espaces si indent)."""
+        return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None, default=_default).encode('utf-8')
+
+    def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        """Désérialise un document JSON (octets ou chaîne)."""
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+
+
+def dumps(obj: Any, indent: bool = False) -> str:
+    """Comme dumpb, mais renvoie une chaîne."""
+    return dumpb(obj, indent).decode('utf-8')
+
+
+if MSGPACK_AVAILABLE:
+    def pack(obj: Any) -> bytes:
+        """Encodage compact pour les caches internes (msgpack)."""
+        return msgpack.packb(obj, default=_default, use_bin_type=True)
+
+    def unpack(data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+else:
+    def pack(obj: Any) -> bytes:
+        """Encodage compact pour les caches internes (JSON, msgpack n'étant pas installé)."""
+        return dumpb(obj)
+
+    def unpack(data: bytes) -> Any:
+        return loads(data)
+
+
+class _StreamWriter:
+    """Base des écritures incrémentales : un élément sérialisé à la fois dans un flux binaire."""
+
+    _open, _close = b'', b''
+
+    def __init__(self, stream: BinaryIO, lines: bool = False):
+        self.stream = stream
+        self.lines = lines  # un élément par ligne
+        self.count = 0
+        self._separator = b',\n' if lines else b','
+        self.stream.write(self._open)
+
+    def _write(self, chunk: bytes):
+        if self.count:
+            self.stream.write(self._separator)
+        elif self.lines:
+            self.stream.write(b'\n')
+        self.stream.write(chunk)
+        self.count += 1
+
+    def close(self):
+        """Termine le document JSON (le flux reste ouvert)."""
+        self.stream.write((b'\n' if self.lines and self.count else b'') + self._close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class JSONArrayWriter(_StreamWriter):
+    """Écrit une liste JSON élément par élément : [rapport, rapport, ...]."""
+
+    _open, _close = b'[', b']'
+
+    def write(self, item: Any):
+        self._write(dumpb(item))
+
+
+class JSONObjectWriter(_StreamWriter):
+    """Écrit un objet JSON entrée par entrée : {"nom": rapport, ...}."""
+
+    _open, _close = b'{', b'}'
+
+    def write(self, key: str, value: Any):
+        self._write(dumpb(str(key)) + b':' + dumpb(value))
@@ -1,6 +1,5 @@
 import streamlit as st
 from pathlib import Path
-import tempfile
 import json
 import os
 import sys
@@ -11,6 +10,7 @@ from datetime import datetime
 sys.path.append(str(Path(__file__).parent.parent))
 
 from models.expert_analyzer import CSPEExpertAnalyzer, Decision
+from ui.streamlit_jobs import show_job, submit_uploads
 
 def display_analysis(report: Dict[str, Any]) -> None:
     """Affiche le rapport d'analyse de manière interactive."""
@@ -43,29 +43,10 @@ def display_analysis(report: Dict[str, Any]) -> None:
         with st.expander("🔍 Données extraites (cliquez pour afficher)"):
             st.json(report['extracted_data'], expanded=False)
 
-def process_uploaded_file(uploaded_file, analyzer: CSPEExpertAnalyzer) -> Optional[Dict]:
-    """Traite un fichier uploadé et retourne le résultat de l'analyse."""
-    try:
-        # Créer un fichier temporaire
-        with tempfile.NamedTemporaryFile(delete=False, suffix=Path(uploaded_file.name).suffix) as tmp_file:
-            # Écrire le contenu du fichier uploadé
-            tmp_file.write(uploaded_file.getvalue())
-            tmp_path = tmp_file.name
-        
-        try:
-            # Analyser le fichier
-            with st.spinner(f"Analyse de {uploaded_file.name}..."):
-                result = analyzer.analyze_file(tmp_path)
-                return result
-        finally:
-            # Nettoyer le fichier temporaire
-            try:
-                os.unlink(tmp_path)
-            except Exception as e:
-                st.warning(f"Attention : impossible de supprimer le fichier temporaire : {e}")
-    except Exception as e:
-        st.error(f"Erreur lors du traitement du fichier {uploaded_file.name} : {str(e)}")
-    return None
+@st.cache_resource
+def get_analyzer() -> CSPEExpertAnalyzer:
+    """Analyseur partagé entre sessions et réexécutions."""
+    return CSPEExpertAnalyzer()
 
 def main():
     st.set_page_config(
@@ -100,10 +81,6 @@ def main():
     </style>
     """, unsafe_allow_html=True)
     
-    # Initialisation de l'analyseur
-    if 'analyzer' not in st.session_state:
-        st.session_state.analyzer = CSPEExpertAnalyzer()
-    
     # En-tête avec description
     st.markdown("""
     ### Bienvenue sur l'outil d'analyse des dossiers CSPE
@@ -128,54 +105,11 @@ def main():
             st.warning("Veuillez d'abord sélectionner au moins un fichier à analyser.")
             return
             
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        # Traitement de chaque fichier
-        results = []
-        for i, uploaded_file in enumerate(uploaded_files):
-            # Mise à jour de la progression
-            progress = int((i / len(uploaded_files)) * 100)
-            progress_bar.progress(progress)
-            status_text.text(f"Traitement du fichier {i+1}/{len(uploaded_files)} : {uploaded_file.name}")
-            
-            # Traitement du fichier
-            with st.expander(f"📄 {uploaded_file.name}", expanded=True):
-                result = process_uploaded_file(uploaded_file, st.session_state.analyzer)
-                
-                if result:
-                    results.append((uploaded_file.name, result))
-                    display_analysis(result)
-                    
-                    # Bouton de téléchargement
-                    json_report = json.dumps(result, indent=2, ensure_ascii=False)
-                    st.download_button(
-                        label=f"💾 Télécharger l'analyse de {uploaded_file.name}",
-                        data=json_report,
-                        file_name=f"rapport_cspe_{Path(uploaded_file.name).stem}.json",
-                        mime="application/json",
-                        key=f"dl_{uploaded_file.name}"
-                    )
-                
-                st.divider()
-        
-        # Réinitialisation de la barre de progression
-        progress_bar.empty()
-        status_text.empty()
-        
-        if results:
-            st.success(f"✅ Analyse terminée pour {len(results)} fichier(s) !")
-            
-            # Option pour télécharger tous les rapports en un seul fichier
-            if len(results) > 1:
-                all_reports = {name: result for name, result in results}
-                st.download_button(
-                    label="📥 Télécharger tous les rapports (ZIP)",
-                    data=json.dumps(all_reports, indent=2, ensure_ascii=False),
-                    file_name=f"rapports_cspe_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-                    mime="application/zip",
-                    key="dl_all_reports"
-                )
+        # Analyse en arrière-plan : la page reste réactive et le travail
+        # est retrouvé après un rafraîchissement (identifiant dans l'URL)
+        submit_uploads(uploaded_files, get_analyzer())
+    
+    show_job(get_analyzer(), display_analysis)
     
     # Section d'aide
     with st.expander("ℹ️ Comment utiliser cette application"):
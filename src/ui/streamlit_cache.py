@@ -0,0 +1,57 @@
+"""
+Cache des extractions pour les interfaces Streamlit.
+
+Streamlit réexécute tout le script à chaque interaction (clic, saisie dans
+un formulaire) : sans cache, chaque réexécution relit et réextrait tous les
+fichiers téléversés. Ce module mémorise :
+
+- le texte extrait de chaque fichier, avec st.cache_data, par empreinte
+  SHA-256 du contenu téléversé (lu en mémoire avec getbuffer(), sans copie
+  ni fichier temporaire) ;
+- l'empreinte elle-même, par identifiant de téléversement dans la session.
+
+Les analyseurs sont partagés entre sessions avec st.cache_resource par
+chaque interface (fonction get_analyzer) ; les analyses elles-mêmes passent
+par le gestionnaire de travaux en arrière-plan (module streamlit_jobs), qui
+mémorise les rapports par empreinte de contenu. Les caches sont bornés en
+nombre d'entrées et en durée de vie.
+
+Exemple d'utilisation:
+    texte = upload_text(uploaded_file)
+"""
+
+import hashlib
+
+import streamlit as st
+
+try:
+    from ..processing.text_extraction import extract_text
+except (ImportError, ValueError):
+    from processing.text_extraction import extract_text
+
+MAX_ENTRIES = 128  # fichiers conservés par cache
+TTL_SECONDS = 6 * 3600
+
+
+def upload_digest(uploaded_file) -> str:
+    """Empreinte SHA-256 du contenu téléversé, calculée une fois par téléversement."""
+    file_id = getattr(uploaded_file, 'file_id', None)
+    digests = st.session_state.setdefault('_upload_digests', {})
+    if file_id is not None and file_id in digests:
+        return digests[file_id]
+    digest = hashlib.sha256(uploaded_file.getbuffer()).hexdigest()
+    if file_id is not None:
+        digests[file_id] = digest
+    return digest
+
+
+@st.cache_data(max_entries=MAX_ENTRIES, ttl=TTL_SECONDS, show_spinner=False)
+def _cached_text(digest: str, filename: str, _data: memoryview) -> str:
+    # Les arguments préfixés par _ ne font pas partie de la clé du cache
+    return extract_text(_data, filename)
+
+
+def upload_text(uploaded_file) -> str:
+    """Texte extrait d'un fichier téléversé (mis en cache)."""
+    return _cached_text(upload_digest(uploaded_file), uploaded_file.name, uploaded_file.getbuffer())
+
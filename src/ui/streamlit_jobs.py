@@ -0,0 +1,118 @@
+"""
+Analyses en arrière-plan pour les interfaces Streamlit.
+
+Le bouton d'analyse met l'envoi en file (AnalysisJobRunner partagé par
+toutes les sessions via st.cache_resource) et inscrit l'identifiant du
+travail dans l'URL (?job=...) : la page reste réactive pendant l'analyse et
+un rafraîchissement du navigateur retrouve le travail et ses résultats.
+L'avancement est rafraîchi périodiquement dans un fragment (Streamlit >=
+1.37), sans réexécuter le reste de la page ; le rafraîchissement s'arrête
+dès que le travail est terminé.
+
+Exemple d'utilisation:
+    if st.button("Lancer l'analyse"):
+        submit_uploads(uploaded_files, get_analyzer())
+    show_job(get_analyzer(), display_analysis)
+"""
+
+from pathlib import Path
+from datetime import datetime
+from typing import Any, Callable, Dict
+
+import streamlit as st
+
+try:
+    from ..analysis_jobs import JOBS_DIR, ERREUR, INTERROMPU, TERMINE, FINAL_STATES, AnalysisJobRunner, progress
+    from ..serialization import dumpb
+except (ImportError, ValueError):
+    from analysis_jobs import JOBS_DIR, ERREUR, INTERROMPU, TERMINE, FINAL_STATES, AnalysisJobRunner, progress
+    from serialization import dumpb
+
+POLL_SECONDS = 2
+# st.fragment (Streamlit >= 1.37), st.experimental_fragment auparavant
+_fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None)
+
+
+@st.cache_resource
+def _get_runner(analyzer_key: str, _analyzer) -> AnalysisJobRunner:
+    # Un répertoire par analyseur : chaque interface ne reprend que ses travaux
+    return AnalysisJobRunner(_analyzer.analyze_bytes, jobs_dir=JOBS_DIR / analyzer_key)
+
+
+def get_job_runner(analyzer) -> AnalysisJobRunner:
+    """Gestionnaire de travaux partagé par toutes les sessions pour cet analyseur."""
+    return _get_runner(type(analyzer).__qualname__, analyzer)
+
+
+def submit_uploads(uploaded_files, analyzer) -> str:
+    """Met en file l'analyse des fichiers téléversés et inscrit le travail dans l'URL."""
+    job_id = get_job_runner(analyzer).submit((f.name, f.getbuffer()) for f in uploaded_files)
+    st.query_params['job'] = job_id
+    return job_id
+
+
+def show_job(analyzer, display_fn: Callable[[Dict[str, Any]], None]):
+    """Affiche l'avancement puis les résultats du travail inscrit dans l'URL."""
+    job_id = st.query_params.get('job')
+    if not job_id:
+        return
+    runner = get_job_runner(analyzer)
+    job = runner.status(job_id)
+    if _fragment is not None and job is not None and job['statut'] not in FINAL_STATES:
+        _fragment(run_every=POLL_SECONDS)(_live_panel)(runner, job_id, display_fn)
+    else:
+        done = _job_panel(runner, job_id, display_fn)
+        if not done:
+            # Streamlit antérieur aux fragments : pas de rafraîchissement automatique
+            st.button("🔄 Actualiser l'avancement", key="job_refresh")
+
+
+def _live_panel(runner: AnalysisJobRunner, job_id: str, display_fn):
+    if _job_panel(runner, job_id, display_fn):
+        # Travail terminé : page complète, affichée hors fragment, sans plus de sondage
+        st.rerun()
+
+
+def _job_panel(runner: AnalysisJobRunner, job_id: str, display_fn) -> bool:
+    job = runner.status(job_id)
+    if job is None:
+        st.warning("Analyse introuvable ou expirée.")
+        return True
+
+    processed, total = progress(job)
+    finished = job['statut'] in FINAL_STATES
+    if not finished:
+        st.progress(processed / total, text=f"Analyse en cours : {processed}/{total} fichier(s) traité(s)")
+    elif job['statut'] == INTERROMPU:
+        st.warning("L'analyse a été interrompue par un redémarrage du service. Veuillez relancer l'analyse.")
+
+    analysed = 0
+    for index, entry in enumerate(job['fichiers']):
+        if entry['statut'] == TERMINE and entry['resultat'] is not None:
+            analysed += 1
+            with st.expander(f"📄 {entry['nom']}", expanded=True):
+                display_fn(entry['resultat'])
+                st.download_button(
+                    label="💾 Télécharger le rapport d'analyse",
+                    data=dumpb(entry['resultat'], indent=True),
+                    file_name=f"rapport_cspe_{Path(entry['nom']).stem}.json",
+                    mime="application/json",
+                    key=f"dl_{job_id}_{index}"
+                )
+        elif entry['statut'] == ERREUR:
+            st.error(f"Erreur lors du traitement du fichier {entry['nom']} : {entry['erreur']}")
+
+    if finished and analysed:
+        st.success(f"✅ Analyse terminée pour {analysed} fichier(s) !")
+        export_path = runner.export(job_id) if analysed > 1 else None
+        if export_path is not None:
+            # Export écrit en flux une seule fois par le gestionnaire de travaux
+            with open(export_path, 'rb') as export_file:
+                st.download_button(
+                    label="📥 Télécharger tous les rapports (JSON)",
+                    data=export_file,
+                    file_name=f"rapports_cspe_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+                    mime="application/json",
+                    key=f"dl_all_{job_id}"
+                )
+    return finished
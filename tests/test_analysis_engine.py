@@ -0,0 +1,41 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Ajout du répertoire racine au PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.processing import analysis_engine
+from src.processing.analysis_engine import CSPEAnalysisEngine
+
+
+class TestFolderAnalysis(unittest.TestCase):
+    def setUp(self):
+        self.folder = Path(tempfile.mkdtemp())
+        (self.folder / 'a.txt').write_text("Réclamation du 12/03/2014. Montant : 1 000,00 €", encoding='utf-8')
+        (self.folder / 'b.txt').write_text("Réclamation du 12/03/2014. Montant : 1 000,00 €", encoding='utf-8')
+        (self.folder / 'c.txt').write_text("Décision notifiée le 01/02/2015.", encoding='utf-8')
+        (self.folder / 'illisible.pdf').write_bytes(b'%PDF-1.4 tronque')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_duplicates_without_second_extraction(self):
+        """Les doublons sont détectés sans réextraire ; un document illisible ne fait pas échouer le dossier"""
+        extract = analysis_engine.extract_text
+        with patch.object(analysis_engine, 'extract_text', side_effect=extract) as spy:
+            report = CSPEAnalysisEngine().analyze_folder(str(self.folder))
+        self.assertEqual(spy.call_count, 4)
+        self.assertNotIn('error', report)
+        self.assertEqual(report['documents_analyzed'], 4)
+        duplicates = [i for i in report['inconsistencies'] if i['type'] == 'document_duplicate']
+        self.assertEqual(len(duplicates), 1)
+        self.assertEqual(sorted(duplicates[0]['files']), ['a.txt', 'b.txt'])
+
+
+if __name__ == '__main__':
+    unittest.main()
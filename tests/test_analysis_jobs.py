@@ -0,0 +1,105 @@
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+
+# Add the src directory to PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from analysis_jobs import AnalysisJobRunner, EN_COURS, ERREUR, INTERROMPU, TERMINE, progress
+
+
+def _wait(runner, job_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = runner.status(job_id)
+        if job['statut'] in (TERMINE, ERREUR):
+            return job
+        time.sleep(0.01)
+    raise AssertionError("travail non terminé")
+
+
+class TestAnalysisJobRunner(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.calls = []
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _analyze(self, data, name):
+        self.calls.append(name)
+        if name == 'corrompu.pdf':
+            raise ValueError("PDF illisible")
+        return {'fichier': name, 'taille': len(data)}
+
+    def test_background_run_and_persistence(self):
+        """Les fichiers sont analysés en arrière-plan ; l'état est relu depuis le disque une fois terminé"""
+        release = threading.Event()
+
+        def analyze(data, name):
+            release.wait(5)
+            return self._analyze(data, name)
+
+        runner = AnalysisJobRunner(analyze, jobs_dir=self.tmp_dir, workers=2)
+        try:
+            job_id = runner.submit([('a.txt', b'abc'), ('b.txt', memoryview(b'defg')), ('corrompu.pdf', b'%PDF')])
+            # submit rend la main immédiatement
+            self.assertEqual(progress(runner.status(job_id)), (0, 3))
+            release.set()
+            job = _wait(runner, job_id)
+        finally:
+            runner.shutdown()
+        self.assertEqual(job['statut'], TERMINE)
+        self.assertEqual([entry['statut'] for entry in job['fichiers']], [TERMINE, TERMINE, ERREUR])
+        self.assertEqual(job['fichiers'][1]['resultat'], {'fichier': 'b.txt', 'taille': 4})
+        self.assertEqual(job['fichiers'][2]['erreur'], "PDF illisible")
+
+        # Après un redémarrage, le travail terminé est retrouvé tel quel
+        restarted = AnalysisJobRunner(self._analyze, jobs_dir=self.tmp_dir)
+        try:
+            self.assertEqual(restarted.status(job_id), job)
+            # Export groupé des rapports réussis, écrit une fois puis réutilisé
+            export_path = restarted.export(job_id)
+            with open(export_path, 'rb') as f:
+                self.assertEqual(json.load(f), {'a.txt': {'fichier': 'a.txt', 'taille': 3},
+                                                'b.txt': {'fichier': 'b.txt', 'taille': 4}})
+            self.assertEqual(restarted.export(job_id), export_path)
+        finally:
+            restarted.shutdown()
+
+    def test_same_content_analyzed_once(self):
+        runner = AnalysisJobRunner(self._analyze, jobs_dir=self.tmp_dir, workers=1)
+        try:
+            _wait(runner, runner.submit([('a.txt', b'contenu')]))
+            job = _wait(runner, runner.submit([('copie.txt', b'contenu')]))
+        finally:
+            runner.shutdown()
+        self.assertEqual(self.calls, ['a.txt'])
+        self.assertEqual(job['fichiers'][0]['resultat']['fichier'], 'a.txt')
+
+    def test_interrupted_jobs_and_unknown_ids(self):
+        job_id = 'ab' * 16
+        with open(os.path.join(self.tmp_dir, f'{job_id}.json'), 'w', encoding='utf-8') as f:
+            json.dump({'id': job_id, 'statut': EN_COURS,
+                       'fichiers': [{'nom': 'a.txt', 'statut': TERMINE, 'resultat': {}, 'erreur': None},
+                                    {'nom': 'b.txt', 'statut': EN_COURS, 'resultat': None, 'erreur': None}]}, f)
+        runner = AnalysisJobRunner(self._analyze, jobs_dir=self.tmp_dir)
+        try:
+            job = runner.status(job_id)
+            self.assertEqual(job['statut'], INTERROMPU)
+            self.assertEqual([entry['statut'] for entry in job['fichiers']], [TERMINE, INTERROMPU])
+            self.assertIsNone(runner.status('../../etc/passwd'))
+            self.assertIsNone(runner.status('cd' * 16))
+            with self.assertRaises(ValueError):
+                runner.submit([])
+        finally:
+            runner.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
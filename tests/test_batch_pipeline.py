@@ -0,0 +1,236 @@
+import os
+import sys
+import io
+import gzip
+import shutil
+import tarfile
+import zipfile
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from pathlib import Path
+from datetime import date
+
+# Add the src directory to PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from batch_pipeline import (
+    BatchPipeline, CheckpointJournal, PipelineItem, read_text_file, decode_member, extract_entities, iter_archive
+)
+from scheduler import INTERACTIVE, JobScheduler
+from models.classifier import CSPEClassifier
+
+
+def _items(root):
+    for path in sorted(Path(root).glob('*.txt')):
+        stat = path.stat()
+        yield PipelineItem(key=str(path), path=path, size=stat.st_size, mtime=stat.st_mtime)
+
+
+class TestBatchPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        for i in range(12):
+            with open(os.path.join(self.tmp_dir, f'doc_{i:02d}.txt'), 'w', encoding='utf-8') as f:
+                f.write(f"Réclamation du 12/03/2014. Montant : 1 {i:03d},00 €")
+        self.journal_path = Path(self.tmp_dir) / 'journal.jsonl'
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _run(self, classify, sunk, version=None):
+        journal = CheckpointJournal(self.journal_path, version=version)
+        pipeline = BatchPipeline(read_text_file, extract_entities, classify, sunk.append, journal=journal,
+                                 extract_workers=2, classify_concurrency=3, queue_size=2)
+        try:
+            return pipeline.run(_items(self.tmp_dir))
+        finally:
+            journal.close()
+
+    def test_all_stages_and_resume(self):
+        """Chaque fichier traverse toutes les étapes ; une reprise saute les fichiers terminés"""
+        def classify(item):
+            if item.path.name == 'doc_05.txt':
+                raise RuntimeError("modèle indisponible")
+            return {'fichier': item.path.name, 'entites': item.entities}
+
+        sunk = []
+        stats = self._run(classify, sunk)
+        self.assertEqual((stats['decouverts'], stats['traites'], stats['erreurs']), (12, 11, 1))
+        ok = [item for item in sunk if item.error is None]
+        self.assertTrue(all(item.result['entites']['dates'] == ['2014-03-12'] for item in ok))
+        self.assertIn(1003.0, [item.result['entites']['montants'][0] for item in ok])
+
+        # Seul le fichier en erreur est retraité
+        sunk = []
+        stats = self._run(lambda item: {'fichier': item.path.name}, sunk)
+        self.assertEqual((stats['deja_traites'], stats['traites']), (11, 1))
+        self.assertEqual(sunk[0].path.name, 'doc_05.txt')
+
+    def test_incremental_manifest(self):
+        """Seuls les fichiers modifiés ou traités par une autre version sont reclassifiés"""
+        def classify(item):
+            return {'fichier': item.path.name}
+
+        self._run(classify, [], version='mistral:7b/1')
+
+        # Date modifiée, contenu identique : relu et haché mais pas reclassifié
+        touched = os.path.join(self.tmp_dir, 'doc_03.txt')
+        os.utime(touched, (0, 0))
+        with open(os.path.join(self.tmp_dir, 'doc_07.txt'), 'a', encoding='utf-8') as f:
+            f.write(" Complément.")
+        sunk = []
+        stats = self._run(classify, sunk, version='mistral:7b/1')
+        self.assertEqual((stats['deja_traites'], stats['inchanges'], stats['traites']), (10, 1, 1))
+        self.assertEqual([item.path.name for item in sunk], ['doc_07.txt'])
+
+        # Le manifeste enregistre la nouvelle date : plus rien à relire
+        stats = self._run(classify, [], version='mistral:7b/1')
+        self.assertEqual(stats['deja_traites'], 12)
+
+        # Nouvelle version du modèle : tout est reclassifié
+        stats = self._run(classify, [], version='mistral:7b/2')
+        self.assertEqual(stats['traites'], 12)
+        journal = CheckpointJournal(self.journal_path, version='mistral:7b/2')
+        try:
+            self.assertEqual(len(journal.entries), 12)
+            self.assertTrue(all(entry['sha256'] for entry in journal.entries.values()))
+        finally:
+            journal.close()
+
+    def test_classification_through_scheduler(self):
+        """Avec un ordonnanceur, l'échéance estimée depuis les dates extraites accompagne chaque fichier"""
+        scheduler = JobScheduler(workers=2)
+        sunk = []
+        try:
+            pipeline = BatchPipeline(read_text_file, extract_entities, lambda item: {'fichier': item.path.name},
+                                     sunk.append, extract_workers=2, use_processes=False, scheduler=scheduler)
+            stats = pipeline.run(_items(self.tmp_dir))
+        finally:
+            scheduler.shutdown()
+        self.assertEqual(stats['traites'], 12)
+        self.assertTrue(all(item.deadline == date(2014, 5, 11) for item in sunk))
+
+    def test_batch_classification_yields_to_interactive(self):
+        """Une classification par lot en cours cède le travailleur à une requête interactive puis reprend"""
+        scheduler = JobScheduler(workers=1, reserved_interactive=0)
+        events = []
+        running = threading.Event()
+
+        class StreamingModel:
+            def generate(self, stream=False, **kwargs):
+                events.append('lot')
+                running.set()
+                for _ in range(100):  # fragments de la réponse du modèle
+                    time.sleep(0.01)
+                    yield {'response': ' '}
+                yield {'response': '{"decision": "recevable", "confiance": 0.9}'}
+
+        with patch.object(CSPEClassifier, '_setup_model'):
+            classifier = CSPEClassifier()
+        classifier.llm = StreamingModel()
+
+        def classify(item, job_context=None):
+            return classifier.classify(item.text, job_context=job_context).to_dict()
+
+        sunk, stats = [], {}
+        pipeline = BatchPipeline(read_text_file, extract_entities, classify, sunk.append,
+                                 use_processes=False, scheduler=scheduler)
+        thread = threading.Thread(target=lambda: stats.update(pipeline.run(list(_items(self.tmp_dir))[:1])))
+        try:
+            thread.start()
+            self.assertTrue(running.wait(5))
+            started = time.perf_counter()
+            scheduler.submit(events.append, 'interactif', kind=INTERACTIVE).result(timeout=5)
+            self.assertLess(time.perf_counter() - started, 0.5)
+            thread.join(10)
+        finally:
+            scheduler.shutdown()
+        self.assertEqual(events, ['lot', 'interactif', 'lot'])
+        self.assertEqual(stats['traites'], 1)
+        self.assertEqual((sunk[0].error, sunk[0].result['decision']), (None, 'recevable'))
+
+    def test_async_classifier(self):
+        """Un classifieur coroutine est appelé dans la boucle asyncio"""
+        async def classify(item):
+            return {'fichier': item.path.name}
+
+        sunk = []
+        self.assertEqual(self._run(classify, sunk)['traites'], 12)
+        self.assertEqual(sorted(item.result['fichier'] for item in sunk)[0], 'doc_00.txt')
+
+    def test_streaming_archive(self):
+        """Les membres texte d'une archive et de ses archives imbriquées sont lus sans extraction"""
+        tar_buffer = io.BytesIO()
+        with tarfile.open(fileobj=tar_buffer, mode='w:gz') as tar:
+            data = "Réclamation transmise le 1er mars 2015".encode('cp1252')
+            info = tarfile.TarInfo('lot/courrier.txt')
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+        nested = io.BytesIO()
+        with zipfile.ZipFile(nested, 'w') as inner:
+            inner.writestr('note.txt', "Note interne")
+        archive_path = os.path.join(self.tmp_dir, 'archive.zip')
+        with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr('recevables/a.txt', "Dossier recevable du 12/03/2014")
+            archive.writestr('recevables/scan.png', b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR')
+            archive.writestr('annexes.zip', nested.getvalue())
+            archive.writestr('courriers.tar.gz', tar_buffer.getvalue())
+
+        stats = {}
+        items = list(iter_archive(Path(archive_path), lambda name: name.split('/')[0], stats=stats))
+        self.assertEqual([item.key.split('!', 1)[1] for item in items],
+                         ['recevables/a.txt', 'annexes.zip!note.txt', 'courriers.tar.gz!lot/courrier.txt'])
+        self.assertEqual(stats['ignores'], 1)
+        self.assertEqual(items[0].category, 'recevables')
+        self.assertEqual(decode_member(items[0]), "Dossier recevable du 12/03/2014")
+        self.assertIsNone(items[0].data)
+
+        # Les membres déjà journalisés ne sont pas lus
+        skipped = list(iter_archive(Path(archive_path), str, skip=lambda item: True))
+        self.assertTrue(all(item.data is None for item in skipped))
+
+    def test_unreadable_archive_members(self):
+        """Un gzip simple est lu comme texte ; un membre illisible donne un élément en erreur"""
+        truncated = io.BytesIO()
+        with zipfile.ZipFile(truncated, 'w') as inner:
+            inner.writestr('note.txt', "Note interne")
+        archive_path = os.path.join(self.tmp_dir, 'archive.zip')
+        with zipfile.ZipFile(archive_path, 'w') as archive:
+            archive.writestr('notes.txt.gz', gzip.compress("Relance du 05/06/2015".encode('utf-8')))
+            archive.writestr('annexes.zip', truncated.getvalue()[:-30])
+            archive.writestr('corrompu.gz', gzip.compress(b'x' * 10000)[:40])
+            archive.writestr('b.txt', "Dossier du 12/03/2014")
+
+        items = list(iter_archive(Path(archive_path), str))
+        self.assertEqual([item.key.split('!', 1)[1] for item in items],
+                         ['notes.txt.gz', 'annexes.zip', 'corrompu.gz', 'b.txt'])
+        self.assertEqual(decode_member(items[0]), "Relance du 05/06/2015")
+        self.assertIsNone(items[0].error)
+        self.assertTrue(items[1].error.startswith('BadZipFile'))
+        self.assertIsNotNone(items[2].error)
+
+        sunk = []
+        pipeline = BatchPipeline(decode_member, extract_entities, lambda item: {'ok': True}, sunk.append,
+                                 use_processes=False)
+        stats = pipeline.run(iter_archive(Path(archive_path), str))
+        self.assertEqual((stats['traites'], stats['erreurs']), (2, 2))
+
+    def test_discovery_error_does_not_hang(self):
+        """Une erreur de découverte termine le pipeline puis est relevée par run()"""
+        def failing_items():
+            yield from _items(self.tmp_dir)
+            raise OSError("archive illisible")
+
+        sunk = []
+        pipeline = BatchPipeline(read_text_file, extract_entities, lambda item: {'ok': True}, sunk.append,
+                                 use_processes=False, queue_size=2)
+        with self.assertRaises(OSError):
+            pipeline.run(failing_items())
+        self.assertEqual(len(sunk), 12)
+
+
+if __name__ == '__main__':
+    unittest.main()
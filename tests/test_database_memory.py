@@ -0,0 +1,320 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# Add the root directory to PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import database_memory
+from database_memory import (
+    DatabaseManager, Document, TexteExtrait, StatistiqueJournaliere, create_sample_data, get_storage_profile, load_analytics,
+    PYARROW_AVAILABLE
+)
+
+
+class TestDatabaseManager(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, 'test_cspe.db')
+        self.db = DatabaseManager(f"sqlite:///{self.db_path}")
+        self.db.init_db()
+        create_sample_data(self.db)
+
+    def tearDown(self):
+        self.db.engine.dispose()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_sqlite_storage_profile(self):
+        """Le profil SQLite active WAL et synchronous=NORMAL sur chaque connexion"""
+        self.assertEqual(self.db.storage_profile['backend'], 'sqlite')
+        with self.db.engine.connect() as conn:
+            self.assertEqual(conn.exec_driver_sql("PRAGMA journal_mode").scalar(), 'wal')
+            self.assertEqual(conn.exec_driver_sql("PRAGMA synchronous").scalar(), 1)  # NORMAL
+
+    def test_postgres_pool_from_env(self):
+        """Le pool PostgreSQL est dimensionné depuis l'environnement"""
+        os.environ['DB_POOL_SIZE'] = '12'
+        try:
+            options = get_storage_profile('postgresql://u:p@localhost/cspe')['engine_options']
+        finally:
+            del os.environ['DB_POOL_SIZE']
+        self.assertEqual(options['pool_size'], 12)
+        self.assertTrue(options['pool_pre_ping'])
+
+    def test_document_text_stored_out_of_row(self):
+        """Les textes identiques sont dédupliqués et relus à la demande"""
+        texte = "Réclamation CSPE pour la période 2009-2015. " * 200
+        doc1 = self.db.add_document({'dossier_id': 1, 'nom_fichier': 'a.txt', 'texte_extrait': texte})
+        doc2 = self.db.add_document({'dossier_id': 2, 'nom_fichier': 'b.txt', 'texte_extrait': texte,
+                                     'hash_fichier': 'f' * 64})
+
+        session = self.db.Session()
+        try:
+            self.assertEqual(session.query(TexteExtrait).count(), 1)
+            stored = session.query(TexteExtrait).one()
+            self.assertLess(len(stored.contenu), len(texte))
+            self.assertEqual(session.get(Document, doc2).texte, texte)
+            # hash_fichier ne contient que l'empreinte du fichier fournie par l'appelant
+            self.assertEqual(session.get(Document, doc2).hash_fichier, 'f' * 64)
+            self.assertIsNone(session.get(Document, doc1).hash_fichier)
+        finally:
+            session.close()
+        self.assertEqual(self.db.get_document_text(doc1), texte)
+
+        self.db.delete_dossier(1)
+        self.assertEqual(self.db.purge_orphan_texts(), 0)
+        self.db.delete_dossier(2)
+        self.assertEqual(self.db.purge_orphan_texts(), 1)
+
+    def test_full_text_search(self):
+        """La recherche couvre observations et textes extraits, avec pagination"""
+        self.db.add_document({
+            'dossier_id': 2,
+            'nom_fichier': 'reclamation.txt',
+            'texte_extrait': "Réclamation de la société Dupont SARL au titre de la prescription quadriennale 2013."
+        })
+
+        results = self.db.search('"dupont sarl"')
+        self.assertEqual(results['total'], 1)
+        self.assertEqual(results['resultats'][0]['numero_dossier'], 'CSPE-DEMO-002')
+        self.assertIn('[', results['resultats'][0]['extrait'])
+
+        # Accents ignorés, les deux dossiers mentionnent une démonstration
+        self.assertEqual(self.db.search('demonstration')['total'], 2)
+        self.assertEqual(len(self.db.search('demonstration', page=2, per_page=1)['resultats']), 1)
+
+        # Index maintenu à la mise à jour et à la suppression
+        self.db.update_dossier({'id': 1, 'commentaires': 'Dossier transmis au rapporteur'})
+        self.assertEqual(self.db.search('rapporteur')['total'], 1)
+        self.db.delete_dossier(2)
+        self.assertEqual(self.db.search('dupont')['total'], 0)
+        self.assertEqual(self.db.rebuild_search_index(), 1)
+
+    def _open_without_search(self, blocker, db_path):
+        """Base existante (un dossier, sans agrégats) rouverte avec l'index plein texte indisponible"""
+        seed = DatabaseManager(f"sqlite:///{db_path}")
+        seed.init_db()
+        seed.add_dossier({'numero_dossier': 'CSPE-LIKE-000', 'statut': 'RECEVABLE', 'date_analyse': datetime(2024, 1, 1)})
+        with seed.engine.begin() as conn:
+            conn.exec_driver_sql("DROP TABLE recherche_plein_texte")
+            conn.exec_driver_sql("DELETE FROM statistiques_journalieres")
+        seed.engine.dispose()
+        with blocker:
+            db = DatabaseManager(f"sqlite:///{db_path}")
+            db.init_db()
+        return db
+
+    def test_search_without_fts5(self):
+        """Sans FTS5 utilisable, l'initialisation aboutit, l'écriture continue et la recherche passe par LIKE"""
+        for name, blocker in (
+            ('SQLite trop ancien', patch.object(database_memory, 'SQLITE_SEARCH_MIN_VERSION', (99, 0, 0))),
+            ('DDL en échec', patch.dict(database_memory.SEARCH_DDL,
+                                         {'sqlite': ["CREATE VIRTUAL TABLE recherche_plein_texte USING absent(contenu)"]})),
+        ):
+            with self.subTest(name):
+                db = self._open_without_search(blocker, os.path.join(self.tmp_dir, f'{name}.db'))
+                self.addCleanup(db.engine.dispose)
+                self.assertIsNone(db._search_backend)
+                self.assertEqual(db.get_statistics()['total'], 1)  # agrégats construits malgré tout
+                dossier_id = db.add_dossier({'numero_dossier': f'CSPE-LIKE-{name}', 'statut': 'IRRECEVABLE',
+                                             'motif_irrecevabilite': 'Délai de recours dépassé (100%)',
+                                             'commentaires': 'Dossier transmis au rapporteur'})
+                self.assertIsNotNone(dossier_id)
+                self.assertIsNotNone(db.add_document({'dossier_id': dossier_id, 'nom_fichier': 'a.txt',
+                                                      'texte_extrait': "Réclamation de la société Dupont"}))
+                results = db.search('rapporteur "recours dépassé"')
+                self.assertEqual(results['total'], 1)
+                self.assertEqual(results['resultats'][0]['dossier_id'], dossier_id)
+                self.assertEqual(db.search('0%')['total'], 1)
+                self.assertEqual(db.search('dupont')['total'], 0)  # textes extraits non couverts
+
+    def test_list_dossiers_keyset_pagination(self):
+        """Les pages se suivent sans doublon ni trou, avec projection et filtres"""
+        for i in range(25):
+            self.db.add_dossier({
+                'numero_dossier': f'CSPE-PAGE-{i:03d}',
+                'statut': 'RECEVABLE' if i % 2 else 'IRRECEVABLE',
+                'activite': 'Industrie',
+                'date_analyse': datetime(2024, 1, 1 + i % 5, 14)  # dates en double volontairement
+            })
+
+        seen, cursor = [], None
+        while True:
+            page = self.db.list_dossiers(filters={'activite': 'Industrie'}, columns=['numero_dossier'],
+                                         limit=10, cursor=cursor)
+            seen.extend(row['numero_dossier'] for row in page['dossiers'])
+            self.assertEqual(set(page['dossiers'][0].keys()), {'id', 'date_analyse', 'numero_dossier'})
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(len(set(seen)), 25)
+
+        recevables = self.db.list_dossiers(
+            filters={'statut': 'RECEVABLE', 'date_debut': '2024-01-01', 'date_fin': '2024-01-03'}, limit=100
+        )
+        self.assertTrue(all(row['statut'] == 'RECEVABLE' for row in recevables['dossiers']))
+        # date_fin 'YYYY-MM-DD' : les dossiers analysés l'après-midi du 3 sont inclus
+        self.assertEqual(len(recevables['dossiers']), 7)
+        self.assertTrue(all(row['date_analyse'] < datetime(2024, 1, 4) for row in recevables['dossiers']))
+        self.assertIn(datetime(2024, 1, 3, 14), [row['date_analyse'] for row in recevables['dossiers']])
+
+        with self.assertRaises(ValueError):
+            self.db.list_dossiers(columns=['inexistante'])
+
+    def test_statistics_rollup_maintained(self):
+        """Les agrégats suivent ajouts, mises à jour et suppressions et se reconstruisent"""
+        self.db.add_dossier({'numero_dossier': 'CSPE-STAT-003', 'statut': 'RECEVABLE', 'activite': 'Industrie',
+                             'montant_reclame': 7500.0, 'date_analyse': datetime(2024, 3, 15, 10)})
+        dossier_id = self.db.add_dossier({'numero_dossier': 'CSPE-STAT-004', 'statut': 'INSTRUCTION',
+                                          'activite': 'Industrie', 'montant_reclame': 500.0,
+                                          'date_analyse': datetime(2024, 3, 15, 18)})
+        self.db.update_dossier({'id': dossier_id, 'statut': 'IRRECEVABLE', 'montant_reclame': 20000.0})
+
+        stats = self.db.get_statistics({'start': '2024-03-15', 'end': '2024-03-15'})
+        self.assertEqual((stats['total'], stats['recevables'], stats['irrecevables']), (2, 1, 1))
+        self.assertEqual(self.db.get_amount_stats()['>10000€'], 1)
+        self.assertEqual(self.db.get_monthly_stats(2024)[datetime(2024, 3, 1).strftime('%B')], 2)
+
+        self.db.delete_dossier(dossier_id)
+        incremental = self.db.get_activity_stats(), self.db.get_amount_stats(), self.db.get_statistics()
+        self.assertEqual(incremental[0]['Industrie'], 1)
+
+        session = self.db.Session()
+        try:
+            self.assertEqual(session.query(StatistiqueJournaliere).filter_by(nombre=0).count(), 0)
+        finally:
+            session.close()
+        self.assertGreater(self.db.rebuild_statistics(), 0)
+        self.assertEqual((self.db.get_activity_stats(), self.db.get_amount_stats(), self.db.get_statistics()),
+                         incremental)
+
+    def test_statistics_rollup_concurrent_writers(self):
+        """Des écrivains simultanés sur la même clé d'agrégat ne perdent ni dossier ni incrément"""
+        def add(worker):
+            db = DatabaseManager(f"sqlite:///{self.db_path}")
+            ids = [db.add_dossier({'numero_dossier': f'CSPE-CONC-{worker}-{i}', 'statut': 'RECEVABLE',
+                                   'activite': 'Industrie', 'montant_reclame': 100.0,
+                                   'date_analyse': datetime(2023, 6, 1, 9)}) for i in range(10)]
+            db.engine.dispose()
+            return ids
+
+        with ThreadPoolExecutor(4) as executor:
+            ids = [i for batch in executor.map(add, range(4)) for i in batch]
+        self.assertNotIn(None, ids)
+        stats = self.db.get_statistics({'start': '2023-06-01', 'end': '2023-06-01'})
+        self.assertEqual(stats['total'], 40)
+
+    def test_same_text_concurrent_writers(self):
+        """Des écrivains simultanés stockant le même texte ne perdent aucun document"""
+        texte = "Courrier type de réclamation CSPE adressé à la CRE. " * 50
+
+        def add(worker):
+            db = DatabaseManager(f"sqlite:///{self.db_path}")
+            ids = [db.add_document({'dossier_id': 1, 'nom_fichier': f'{worker}_{i}.txt', 'texte_extrait': texte})
+                   for i in range(5)]
+            db.engine.dispose()
+            return ids
+
+        with ThreadPoolExecutor(4) as executor:
+            ids = [i for batch in executor.map(add, range(4)) for i in batch]
+        self.assertNotIn(None, ids)
+        session = self.db.Session()
+        try:
+            self.assertEqual(session.query(TexteExtrait).count(), 1)
+        finally:
+            session.close()
+        self.assertEqual(self.db.get_document_text(ids[-1]), texte)
+
+    def test_online_backup_and_rotation(self):
+        """Sauvegardes complète et incrémentale vérifiées, restaurables et tournantes"""
+        backup_dir = os.path.join(self.tmp_dir, 'backups')
+
+        full = self.db.backup_database(backup_dir)
+        self.assertTrue(os.path.exists(full))
+        self.assertTrue(self.db.verify_backup(full)['ok'])
+
+        first = self.db.backup_database(backup_dir, incremental=True)
+        self.db.add_dossier({'numero_dossier': 'CSPE-BACKUP-003', 'statut': 'INSTRUCTION'})
+        second = self.db.backup_database(backup_dir, incremental=True, keep=2)
+        self.assertIsNotNone(first)
+        self.assertIsNotNone(second)
+        self.assertFalse(os.path.exists(full), "la plus ancienne sauvegarde doit être supprimée")
+
+        restored = self.db.restore_backup(second, os.path.join(self.tmp_dir, 'restored.db'))
+        restored_db = DatabaseManager(f"sqlite:///{restored}")
+        try:
+            self.assertIsNotNone(restored_db.get_dossier_by_numero('CSPE-BACKUP-003'))
+        finally:
+            restored_db.engine.dispose()
+
+        # Un bloc altéré est détecté
+        with open(second, 'r', encoding='utf-8') as f:
+            block_hash = json.load(f)['blocs'][0]
+        with open(os.path.join(backup_dir, 'blocs', block_hash), 'wb') as f:
+            f.write(b'corrompu')
+        self.assertFalse(self.db.verify_backup(second)['ok'])
+
+    @unittest.skipUnless(PYARROW_AVAILABLE, "pyarrow non installé")
+    def test_export_analytics_incremental(self):
+        """L'export Parquet est typé et n'ajoute que les nouveaux dossiers"""
+        export_dir = os.path.join(self.tmp_dir, 'export')
+
+        written = self.db.export_analytics(export_dir)
+        self.assertEqual(written['dossiers_cspe'], 2)
+        self.assertEqual(written['criteres_analyse'], 8)
+
+        criteres = load_analytics(export_dir, 'criteres_analyse', columns=['dossier_id', 'statut'])
+        self.assertEqual(str(criteres.schema.field('statut').type), 'bool')
+        self.assertEqual(criteres.column('statut').to_pylist().count(False), 1)
+
+        # Rien de nouveau : aucune ligne écrite
+        self.assertEqual(self.db.export_analytics(export_dir)['dossiers_cspe'], 0)
+
+        self.db.add_dossier({
+            'numero_dossier': 'CSPE-TEST-003',
+            'statut': 'RECEVABLE',
+            'date_analyse': datetime(2023, 5, 1),
+            'documents_joints': ['facture.pdf']
+        })
+        self.assertEqual(self.db.export_analytics(export_dir)['dossiers_cspe'], 1)
+
+        dossiers = load_analytics(export_dir, 'dossiers_cspe', columns=['numero_dossier', 'documents_joints', 'annee'])
+        self.assertEqual(dossiers.num_rows, 3)
+        rows = {row['numero_dossier']: row for row in dossiers.to_pylist()}
+        self.assertEqual(rows['CSPE-TEST-003']['annee'], 2023)
+        self.assertEqual(rows['CSPE-TEST-003']['documents_joints'], ['facture.pdf'])
+
+        # Exports successifs dans la même seconde sur la même partition : aucune ligne écrasée
+        for numero in ('CSPE-TEST-004', 'CSPE-TEST-005'):
+            self.db.add_dossier({'numero_dossier': numero, 'statut': 'RECEVABLE', 'date_analyse': datetime(2023, 6, 1)})
+            self.assertEqual(self.db.export_analytics(export_dir)['dossiers_cspe'], 1)
+        self.assertEqual(load_analytics(export_dir, 'dossiers_cspe', columns=['numero_dossier']).num_rows, 5)
+
+        # Critère ajouté à un dossier déjà exporté : exporté avec son propre id
+        self.db.add_critere({'dossier_id': 1, 'critere': 'Recours gracieux', 'statut': True, 'detail': 'Ajouté'})
+        # Dossier sans date d'analyse : en attente, pas dépassé par un dossier plus récent
+        attente = self.db.add_dossier({'numero_dossier': 'CSPE-TEST-006', 'statut': 'INSTRUCTION'})
+        self.db.update_dossier({'id': attente, 'date_analyse': None})
+        self.db.add_critere({'dossier_id': attente, 'critere': 'Délai de recours', 'statut': False, 'detail': ''})
+        self.db.add_dossier({'numero_dossier': 'CSPE-TEST-007', 'statut': 'RECEVABLE', 'date_analyse': datetime(2023, 7, 1)})
+        written = self.db.export_analytics(export_dir)
+        self.assertEqual((written['dossiers_cspe'], written['criteres_analyse']), (1, 1))
+
+        self.db.update_dossier({'id': attente, 'date_analyse': datetime(2023, 8, 1)})
+        written = self.db.export_analytics(export_dir)
+        self.assertEqual((written['dossiers_cspe'], written['criteres_analyse']), (1, 1))
+        self.assertEqual(self.db.export_analytics(export_dir)['dossiers_cspe'], 0)
+        dossiers = load_analytics(export_dir, 'dossiers_cspe', columns=['numero_dossier'])
+        self.assertEqual(sorted(dossiers.column('numero_dossier').to_pylist())[-2:], ['CSPE-TEST-006', 'CSPE-TEST-007'])
+        self.assertEqual(load_analytics(export_dir, 'criteres_analyse', columns=['id']).num_rows, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
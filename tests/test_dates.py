@@ -0,0 +1,54 @@
+import os
+import sys
+import unittest
+from datetime import date
+
+# Add the src directory to PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from processing.dates import date_from_parts, extract_dates, iter_dates
+from models.expert_analyzer import CSPEExpertAnalyzer, Decision
+
+
+class TestDateEngine(unittest.TestCase):
+    def test_formats(self):
+        """Les groupes de l'expression régulière donnent directement des dates"""
+        text = "Décision du 12/03/2014, courrier du 2014-03-05 et relance du 5-3-14."
+        self.assertEqual([(value, text[start:end]) for value, start, end in iter_dates(text)], [
+            (date(2014, 3, 12), '12/03/2014'),
+            (date(2014, 3, 5), '2014-03-05'),
+            (date(2014, 3, 5), '5-3-14')
+        ])
+        self.assertEqual(extract_dates(text), [date(2014, 3, 5), date(2014, 3, 12)])
+
+    def test_invalid_and_two_digit_years(self):
+        self.assertIsNone(date_from_parts('31', '02', '2014'))
+        self.assertEqual(date_from_parts('29', '02', '2012'), date(2012, 2, 29))
+        self.assertEqual(date_from_parts('1', '1', '99'), date(1999, 1, 1))
+        self.assertEqual(extract_dates("le 31/02/2014"), [])
+
+    def test_table_is_memoized(self):
+        date_from_parts.cache_clear()
+        extract_dates("01/06/2013 " * 50)
+        info = date_from_parts.cache_info()
+        self.assertEqual((info.misses, info.hits), (1, 49))
+
+
+class TestTypedCriteria(unittest.TestCase):
+    def setUp(self):
+        self.analyzer = CSPEExpertAnalyzer()
+
+    def test_dates_stay_typed(self):
+        """Les critères reçoivent des objets date ; le rapport les formate en JJ/MM/AAAA"""
+        data = self.analyzer._extract_entities("Factures du 15/01/2010 et du 2011-06-30")
+        self.assertEqual(data['dates'], [date(2010, 1, 15), date(2011, 6, 30)])
+        criteria = self.analyzer._evaluate_criteria(data)
+        self.assertEqual(criteria['periode_couverte']['decision'], Decision.RECEVABLE)
+        self.assertIn('30/06/2011', criteria['delai_reclamation']['details'])
+        self.assertIn('15/01/2010', criteria['prescription_quadriennale']['details'])
+        report = self.analyzer._generate_report(criteria, data)
+        self.assertEqual(report['extracted_data']['dates'], ['15/01/2010', '30/06/2011'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import sys
+import codecs
+import shutil
+import tempfile
+import unittest
+
+# Add the src directory to PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from processing import decoding
+from processing.decoding import DecodeCache, decode_bytes, decode_file, detect_encoding, normalize_text
+
+SAMPLE = "Réclamation CSPE : montant de 1 250,00 € — décision de l'œuvre"
+
+
+class TestDecoding(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        decoding._cache.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_detect_encoding(self):
+        """BOM, puis UTF-8 valide, puis UTF-16 sans BOM, à défaut Windows-1252"""
+        self.assertEqual(detect_encoding(codecs.BOM_UTF8 + b'abc'), 'utf-8-sig')
+        self.assertEqual(detect_encoding(SAMPLE.encode('utf-16')), 'utf-16')
+        self.assertEqual(detect_encoding(SAMPLE.encode('utf-8')[:-1]), 'utf-8')  # caractère coupé
+        self.assertEqual(detect_encoding("Délai de recours".encode('utf-16-le')), 'utf-16-le')
+        self.assertEqual(detect_encoding("Créance de 12 € – œuvre".encode('cp1252')), 'cp1252')
+
+    def test_normalization(self):
+        """NFC, espaces insécables et contrôles traités sans perdre les accents"""
+        self.assertEqual(normalize_text("De\u0301cision\u00a0du\u202f12\x00/03\ufeff"), "Décision du 12/03")
+        self.assertEqual(normalize_text("ligne 1\r\n\tligne 2"), "ligne 1\r\n\tligne 2")
+
+    def test_decode_round_trips(self):
+        """Le même texte est retrouvé quel que soit l'encodage du fichier"""
+        source = SAMPLE.replace('1 250,00 €', '1\u00a0250,00\u00a0€')
+        for encoding in ('utf-8', 'utf-8-sig', 'utf-16', 'cp1252'):
+            with self.subTest(encoding=encoding):
+                self.assertEqual(decode_bytes(source.encode(encoding)), SAMPLE)
+
+    def test_memoized_by_content(self):
+        path = os.path.join(self.tmp_dir, 'courrier.txt')
+        with open(path, 'wb') as f:
+            f.write(SAMPLE.replace('1 250', '1\u00a0250').encode('cp1252'))
+        first = decode_file(path)
+        self.assertIs(decode_bytes(open(path, 'rb').read()), first)
+        self.assertEqual(decoding._cache.hits, 1)
+        # Le texte brut (non normalisé) est une autre entrée
+        self.assertNotEqual(decode_file(path, normalize=False), first)
+
+    def test_cache_bounded(self):
+        cache = DecodeCache(max_chars=40)
+        for i in range(5):
+            cache.put((i,), 'x' * 10)
+        self.assertLessEqual(cache.size, 40)
+        self.assertIsNone(cache.get((0,)))
+        self.assertEqual(cache.get((4,)), 'x' * 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
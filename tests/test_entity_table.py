@@ -0,0 +1,65 @@
+import os
+import sys
+import json
+import unittest
+from datetime import date
+
+# Add the src directory to PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from processing.entity_table import EntityTable
+from processing.document_processor import CSPEDocumentProcessor, CSPEEntity
+
+
+class TestEntityTable(unittest.TestCase):
+    def setUp(self):
+        self.table = EntityTable()
+        self.table.append('date', date(2014, 3, 12), 0, 10)
+        self.table.append('amount', 1250.0, 20, 30, confidence=0.9)
+        self.table.append('reference_facture', 'FAC-2014-001', 40, 52)
+        self.table.append('amount', 89.5, 60, 65, confidence=0.7)
+        self.table.append('date', date(2011, 1, 5), 70, 80)
+
+    def test_rows_match_entity_dicts(self):
+        """to_dicts produit le même format que CSPEEntity.to_dict et reste sérialisable en JSON"""
+        expected = CSPEEntity(value=date(2014, 3, 12), entity_type='date', start_pos=0, end_pos=10).to_dict()
+        self.assertEqual(self.table.row(0), expected)
+        self.assertEqual(self.table.value(2), 'FAC-2014-001')
+        json.dumps(self.table.to_dicts())
+
+    def test_filter_sort_top_k(self):
+        self.assertEqual(list(self.table.where('amount')), [1, 3])
+        self.assertEqual(list(self.table.where('amount', min_confidence=0.8)), [1])
+        self.assertEqual(list(self.table.where('reference_client')), [])
+        self.assertEqual(list(self.table.argsort(self.table.where('date'))), [4, 0])
+        self.assertEqual(list(self.table.top_k(1, 'amount')), [1])
+        self.assertEqual(list(self.table.top_k(1, 'date', largest=False)), [4])
+
+    def test_extend_remaps_codes(self):
+        other = EntityTable()
+        other.append('reference_client', 'CLIENT-1', 0, 8, source='ocr')
+        other.append('amount', 10.0, 9, 12)
+        merged = EntityTable()
+        merged.extend(other)
+        merged.extend(self.table)
+        self.assertEqual(len(merged), 7)
+        self.assertEqual(merged.row(0)['entity_type'], 'reference_client')
+        self.assertEqual(merged.sources[merged._source[0]], 'ocr')
+        self.assertEqual(list(merged.where('amount')), [1, 3, 5])
+        self.assertEqual(merged.value(2), date(2014, 3, 12))
+
+
+class TestProcessorEntityTable(unittest.TestCase):
+    def test_table_agrees_with_entities(self):
+        """La table contient les mêmes dates que extract_dates, sans objet par entité"""
+        processor = CSPEDocumentProcessor()
+        text = "Courrier du 15/03/2023, échéance le 2023-04-15 et relance du 2 mai 2023."
+        table = processor.extract_entity_table(text)
+        self.assertEqual([table.value(i) for i in table.where('date')],
+                         [e.value for e in processor.extract_dates(text)])
+        self.assertEqual(sorted(table.value(i) for i in table.where('date')),
+                         [date(2023, 3, 15), date(2023, 4, 15), date(2023, 5, 2)])
+
+
+if __name__ == '__main__':
+    unittest.main()
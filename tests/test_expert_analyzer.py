@@ -0,0 +1,47 @@
+import os
+import sys
+import io
+import shutil
+import tempfile
+import unittest
+
+# Add the src directory to PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from models.expert_analyzer import CSPEExpertAnalyzer
+
+CONTENT = "Réclamation CSPE du 12/03/2014 pour un montant de 1 250,00 €".encode('cp1252')
+
+
+def _without_date(report):
+    report = dict(report)
+    report.pop('metadata', None)
+    return report
+
+
+class TestExpertAnalyzerEntryPoints(unittest.TestCase):
+    def setUp(self):
+        self.analyzer = CSPEExpertAnalyzer()
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_memory_and_file_agree(self):
+        """analyze_bytes et analyze_stream donnent le même rapport que analyze_file"""
+        path = os.path.join(self.tmp_dir, 'courrier.txt')
+        with open(path, 'wb') as f:
+            f.write(CONTENT)
+        expected = _without_date(self.analyzer.analyze_file(path))
+        self.assertNotIn('error', expected)
+        self.assertEqual(_without_date(self.analyzer.analyze_bytes(memoryview(CONTENT), 'courrier.txt')), expected)
+        self.assertEqual(_without_date(self.analyzer.analyze_stream(io.BytesIO(CONTENT), 'courrier.txt')), expected)
+
+    def test_error_reports_filename(self):
+        report = self.analyzer.analyze_bytes(b'PK\x03\x04corrompu', 'dossier.docx')
+        self.assertEqual(report['file'], 'dossier.docx')
+        self.assertIn('error', report)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import sys
+import unittest
+import subprocess
+import importlib.util
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SRC = ROOT / 'src'
+
+STREAMLIT_AVAILABLE = importlib.util.find_spec('streamlit') is not None
+
+# Dépendances lourdes qui ne doivent être chargées qu'à la première utilisation
+HEAVY_MODULES = ('ollama', 'pandas', 'pyarrow', 'fpdf', 'plotly', 'pypdf', 'PyPDF2', 'pdfminer',
+                 'pytesseract', 'PIL')
+# streamlit charge lui-même pandas et pyarrow : on ne vérifie que les nôtres
+APP_HEAVY_MODULES = ('ollama', 'fpdf', 'plotly', 'pypdf', 'PyPDF2', 'pdfminer', 'pytesseract')
+
+
+def import_profile(statement):
+    """
+    Exécute `python -X importtime -c statement` dans un interpréteur neuf.
+
+    Returns:
+        dict module -> temps cumulé d'import en millisecondes
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(SRC), str(ROOT)]),
+               PYTHONDONTWRITEBYTECODE='1')
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                            cwd=str(ROOT), env=env, capture_output=True, text=True, timeout=120)
+    if result.returncode != 0:
+        raise AssertionError(f"Import impossible ({statement}) :\n{result.stderr[-2000:]}")
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        profile[name.strip()] = int(cumulative) / 1000
+    return profile
+
+
+class TestImportTime(unittest.TestCase):
+    """Budget de temps d'import de chaque point d'entrée"""
+
+    def assert_budget(self, module, budget_ms, statement=None, heavy=HEAVY_MODULES):
+        profile = import_profile(statement or f"import {module}")
+        self.assertIn(module, profile)
+        loaded = sorted({name for name in profile if name.split('.')[0] in heavy})
+        self.assertEqual(loaded, [], f"{module} charge des dépendances lourdes à l'import")
+        self.assertLess(profile[module], budget_ms,
+                        f"{module} : {profile[module]:.0f} ms d'import (budget {budget_ms} ms)")
+
+    def test_batch_cli(self):
+        self.assert_budget('batch_import', 500)
+
+    def test_worker(self):
+        # Les processus du pool réimportent le pipeline et le processeur de documents
+        self.assert_budget('batch_pipeline', 500)
+        self.assert_budget('document_processor', 300)
+
+    def test_analysis_jobs(self):
+        self.assert_budget('analysis_jobs', 300)
+
+    def test_database_memory(self):
+        # SQLAlchemy reste chargé à l'import (modèles déclaratifs du module)
+        self.assert_budget('database_memory', 1500)
+
+    @unittest.skipUnless(STREAMLIT_AVAILABLE, "streamlit non installé")
+    def test_streamlit_apps(self):
+        for app in ('streamlit_app', 'cspe_modern_ui', 'cspe_expert_ui', 'demo_entretien', 'ui.cspe_analyzer_ui'):
+            with self.subTest(app=app):
+                self.assert_budget(app, 5000, heavy=APP_HEAVY_MODULES)
+
+
+if __name__ == '__main__':
+    unittest.main()
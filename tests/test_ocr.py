@@ -0,0 +1,79 @@
+import os
+import sys
+import io
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+# Add the src directory to PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from processing import ocr
+from processing.ocr import OCRCache, OCRPool, PIL_AVAILABLE, PYPDF_AVAILABLE, has_text_layer
+
+
+class TestOCR(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_text_layer_detection(self):
+        """Une page numérisée (vide ou quelques glyphes parasites) n'a pas de couche texte"""
+        self.assertFalse(has_text_layer(''))
+        self.assertFalse(has_text_layer('  3  '))
+        self.assertFalse(has_text_layer('\x01\x02¤¤¤¤ ' * 30))
+        self.assertTrue(has_text_layer("Facture EDF du 12/03/2014, montant de la CSPE acquittée : 1 250,00 €"))
+
+    def test_cache_persistence(self):
+        cache = OCRCache(self.tmp_dir, max_entries=1)
+        cache.put('ab12', "Accusé de réception")
+        cache.put('cd34', "Facture")
+        # Évincé de la mémoire, relu depuis le disque
+        self.assertEqual(OCRCache(self.tmp_dir).get('ab12'), "Accusé de réception")
+        self.assertIsNone(cache.get('ef56'))
+        self.assertEqual(cache.misses, 1)
+
+    @unittest.skipUnless(PIL_AVAILABLE, "Pillow n'est pas installé")
+    def test_pages_in_order_and_cached(self):
+        """Les pages reconnues en parallèle sont restituées dans l'ordre ; une image déjà vue n'est pas reconnue"""
+        from PIL import Image
+        images = [Image.new('L', (20, 20), color=shade) for shade in (10, 20, 30, 10)]
+        calls = []
+
+        def recognize(image, lang, config):
+            calls.append(image.getpixel((0, 0)))
+            return f"page {image.getpixel((0, 0))}"
+
+        pool = OCRPool(workers=3, use_processes=False)
+        try:
+            with mock.patch.object(ocr, '_recognize', recognize):
+                pages = list(pool._ordered(iter(["couche texte"] + images)))
+        finally:
+            pool.shutdown()
+        self.assertEqual(pages, ["couche texte", "page 10", "page 20", "page 30", "page 10"])
+        self.assertLessEqual(len(calls), 4)
+        self.assertEqual(pool.cache.get(ocr.image_digest(images[0], pool.lang, pool.config)), "page 10")
+
+    def test_unknown_quality(self):
+        with self.assertRaises(ValueError):
+            OCRPool(quality='ultra')
+
+    @unittest.skipUnless(PYPDF_AVAILABLE, "pypdf n'est pas installé")
+    def test_pdf_text_layer_skips_ocr(self):
+        from fpdf import FPDF
+        pdf = FPDF()
+        pdf.add_page()
+        pdf.set_font('Helvetica', size=12)
+        pdf.cell(0, 10, "Facture EDF, contribution au service public de l'electricite 2014")
+        pool = OCRPool(workers=1, use_processes=False)
+        with mock.patch.object(pool, 'submit') as submit:
+            pages = list(pool.pdf_pages(io.BytesIO(bytes(pdf.output()))))
+        submit.assert_not_called()
+        self.assertIn("Facture EDF", pages[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add the src directory to PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from batch_pipeline import BatchPipeline, PipelineItem, read_text_file, extract_entities
+from pipeline_metrics import PipelineMetrics
+from scheduler import JobScheduler
+
+
+class TestPipelineMetrics(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        for i in range(6):
+            (self.tmp_dir / f'doc_{i}.txt').write_text("Réclamation du 12/03/2014", encoding='utf-8')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _run(self, metrics):
+        def classify(item):
+            if item.path.name == 'doc_0.txt':
+                raise RuntimeError("délai dépassé")
+            return {'fichier': item.path.name}
+
+        items = (PipelineItem(key=str(path), path=path) for path in sorted(self.tmp_dir.glob('*.txt')))
+        pipeline = BatchPipeline(read_text_file, extract_entities, classify, lambda item: None,
+                                 extract_workers=2, use_processes=False, metrics=metrics)
+        return pipeline.run(items)
+
+    def test_json_snapshot(self):
+        """L'instantané JSON contient compteurs, latences par étape et files"""
+        metrics = PipelineMetrics(self.tmp_dir / 'metriques.json', interval=60)
+        stats = self._run(metrics)
+        self.assertEqual((stats['traites'], stats['erreurs']), (5, 1))
+
+        with open(self.tmp_dir / 'metriques.json', encoding='utf-8') as f:
+            snap = json.load(f)
+        self.assertEqual(snap['compteurs']['traites'], 5)
+        self.assertEqual(snap['etapes']['classification']['appels'], 6)
+        self.assertEqual(snap['etapes']['lecture']['appels'], 6)
+        self.assertEqual(set(snap['files']), {'lecture', 'extraction', 'classification', 'sortie'})
+        self.assertGreater(snap['debit_docs_s'], 0)
+
+    def test_scheduled_classification(self):
+        """Avec ordonnanceur, la latence exclut l'attente en file et la file suit les travaux en attente"""
+        metrics = PipelineMetrics(interval=60)
+        depths = []
+
+        def classify(item):
+            depths.append(metrics.snapshot()['files']['classification'])
+            time.sleep(0.05)
+            return {'fichier': item.path.name}
+
+        scheduler = JobScheduler(workers=1, reserved_interactive=0)
+        items = [PipelineItem(key=str(path), path=path) for path in sorted(self.tmp_dir.glob('*.txt'))]
+        try:
+            pipeline = BatchPipeline(read_text_file, extract_entities, classify, lambda item: None,
+                                     extract_workers=2, use_processes=False, metrics=metrics, scheduler=scheduler)
+            self.assertEqual(pipeline.run(items)['traites'], 6)
+        finally:
+            scheduler.shutdown()
+        # Six appels de 50 ms en série : sans exclure l'attente, le p95 dépasserait 250 ms
+        self.assertLess(metrics.snapshot()['etapes']['classification']['p95_ms'], 150)
+        self.assertGreaterEqual(max(depths), 2)
+
+    def test_prometheus_textfile(self):
+        """Le format .prom suit la syntaxe texte de Prometheus"""
+        path = self.tmp_dir / 'metriques.prom'
+        self._run(PipelineMetrics(path, interval=60))
+        content = path.read_text(encoding='utf-8')
+        self.assertIn('cspe_import_fichiers_total{issue="erreurs"} 1', content)
+        self.assertIn('cspe_import_latence_secondes_count{etape="classification"} 6', content)
+        self.assertFalse(path.with_name('metriques.prom.tmp').exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
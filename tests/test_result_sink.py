@@ -0,0 +1,97 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add the src directory to PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from result_sink import ResultSink, iter_results, read_result, summarize_results, PYARROW_AVAILABLE
+
+
+def _result(i, decision):
+    return {
+        'fichier': f'doc_{i}.txt',
+        'chemin': f'lot/doc_{i}.txt',
+        'categorie': 'recevable',
+        'decision': decision,
+        'confiance': 0.5,
+        'criteres': {'delai': {'valide': True, 'details': 'dans les délais'}},
+        'date_traitement': '2024-01-01T00:00:00'
+    }
+
+
+class TestResultSink(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+
+    def test_results_readable_during_run_and_summarized(self):
+        """Chaque résultat est lisible dès son écriture ; la synthèse relit le JSONL en flux"""
+        sink = ResultSink(self.output_dir, parquet=PYARROW_AVAILABLE, row_group_size=2)
+        for i in range(5):
+            sink.write(_result(i, 'recevable' if i % 2 else 'irrecevable'))
+            self.assertEqual(len(list(iter_results(self.output_dir))), i + 1)
+        sink.close()
+
+        # Une exécution reprise ajoute au même fichier
+        with ResultSink(self.output_dir) as sink:
+            sink.write(_result(5, 'recevable'))
+
+        summary = summarize_results(self.output_dir)
+        self.assertEqual(summary['total'], 6)
+        self.assertEqual(summary['decisions'], {'irrecevable': 3, 'recevable': 3})
+        self.assertEqual(summary['criteres_valides']['delai'], 6)
+        with open(self.output_dir / 'rapport_complet.json', encoding='utf-8') as f:
+            self.assertEqual(len(json.load(f)), 6)
+        with open(self.output_dir / 'synthese_resultats.csv', encoding='utf-8-sig') as f:
+            self.assertEqual(len(f.readlines()), 7)
+
+    def test_result_pointers(self):
+        """Les pointeurs relisent un résultat et filtrent les résultats remplacés"""
+        with ResultSink(self.output_dir) as sink:
+            first = sink.write(_result(1, 'irrecevable'))
+            second = sink.write(_result(2, 'recevable'))
+            replaced = sink.write(_result(1, 'recevable'))
+        self.assertEqual(read_result(self.output_dir, second)['fichier'], 'doc_2.txt')
+        self.assertNotEqual(first, replaced)
+
+        summary = summarize_results(self.output_dir, live_refs={second, replaced})
+        self.assertEqual(summary['decisions'], {'recevable': 2})
+
+    def test_resume_after_partial_write(self):
+        """Une ligne tronquée par un arrêt brutal est retirée avant d'ajouter les résultats suivants"""
+        with ResultSink(self.output_dir) as sink:
+            first = sink.write(_result(1, 'recevable'))
+        line = (self.output_dir / 'resultats.jsonl').read_bytes()
+        with open(self.output_dir / 'resultats.jsonl', 'ab') as f:
+            f.write(line[:len(line) // 2])  # arrêt au milieu de l'écriture
+
+        with ResultSink(self.output_dir) as sink:
+            second = sink.write(_result(2, 'irrecevable'))
+        self.assertEqual(second, len(line))
+        self.assertEqual(read_result(self.output_dir, second)['fichier'], 'doc_2.txt')
+        summary = summarize_results(self.output_dir, live_refs={first, second})
+        self.assertEqual(summary['decisions'], {'recevable': 1, 'irrecevable': 1})
+
+    @unittest.skipUnless(PYARROW_AVAILABLE, "pyarrow non installé")
+    def test_parquet_row_groups(self):
+        """Le Parquet est écrit par groupes de lignes"""
+        import pyarrow.parquet as pq
+
+        with ResultSink(self.output_dir, parquet=True, row_group_size=2) as sink:
+            for i in range(5):
+                sink.write(_result(i, 'recevable'))
+        parquet_file = pq.ParquetFile(sink.parquet_path)
+        self.assertEqual(parquet_file.metadata.num_rows, 5)
+        self.assertEqual(parquet_file.metadata.num_row_groups, 3)
+        self.assertEqual(parquet_file.read(columns=['delai_valide']).column(0).to_pylist(), [True] * 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
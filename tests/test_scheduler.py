@@ -0,0 +1,87 @@
+import os
+import sys
+import time
+import threading
+import unittest
+from datetime import date, timedelta
+
+# Add the src directory to PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from scheduler import BATCH, INTERACTIVE, JobScheduler, estimate_deadline
+
+
+class TestJobScheduler(unittest.TestCase):
+    def test_priority_then_deadline_order(self):
+        """Les travaux par lot passent par priorité, puis échéance, puis arrivée"""
+        scheduler = JobScheduler(workers=1)
+        gate = threading.Event()
+        order = []
+        try:
+            scheduler.submit(gate.wait)
+            futures = [
+                scheduler.submit(order.append, 'ordinaire'),
+                scheduler.submit(order.append, 'echeance_lointaine', deadline=date(2030, 1, 1)),
+                scheduler.submit(order.append, 'echeance_proche', deadline=date(2029, 1, 1)),
+                scheduler.submit(order.append, 'urgent', priority=10),
+            ]
+            gate.set()
+            for future in futures:
+                future.result(timeout=5)
+        finally:
+            scheduler.shutdown()
+        self.assertEqual(order, ['urgent', 'echeance_proche', 'echeance_lointaine', 'ordinaire'])
+
+    def test_reserved_worker_for_interactive(self):
+        """Les travaux par lot ne prennent pas le travailleur réservé aux requêtes interactives"""
+        scheduler = JobScheduler(workers=2)
+        gate = threading.Event()
+        try:
+            batch = [scheduler.submit(gate.wait, kind=BATCH) for _ in range(3)]
+            started = time.perf_counter()
+            scheduler.submit(lambda: None, kind=INTERACTIVE).result(timeout=5)
+            self.assertLess(time.perf_counter() - started, 1.0)
+            self.assertEqual(scheduler.pending()[BATCH], 2)
+            gate.set()
+            for future in batch:
+                future.result(timeout=5)
+        finally:
+            gate.set()
+            scheduler.shutdown()
+
+    def test_preemption_requeues_batch_job(self):
+        """Un travail par lot coopératif cède sa place puis reprend"""
+        scheduler = JobScheduler(workers=1, reserved_interactive=0)
+        events = []
+        running = threading.Event()
+
+        def long_batch(job_context):
+            events.append('lot')
+            running.set()
+            for _ in range(200):
+                job_context.checkpoint()
+                time.sleep(0.01)
+            return 'lot termine'
+
+        try:
+            batch = scheduler.submit(long_batch)
+            running.wait(5)
+            interactive = scheduler.submit(events.append, 'interactif', kind=INTERACTIVE)
+            interactive.result(timeout=5)
+            self.assertEqual(batch.result(timeout=10), 'lot termine')
+        finally:
+            scheduler.shutdown()
+        self.assertEqual(events, ['lot', 'interactif', 'lot'])
+
+    def test_deadline_estimation(self):
+        """L'urgence est estimée depuis la date de décision la plus récente"""
+        decision = date.today() - timedelta(days=50)
+        bonus, deadline = estimate_deadline(f"Décision notifiée le {decision.strftime('%d/%m/%Y')}.")
+        self.assertEqual(deadline, decision + timedelta(days=60))
+        self.assertEqual(bonus, 2)
+        self.assertEqual(estimate_deadline("Décision notifiée le 12/03/2014.")[0], 0)
+        self.assertEqual(estimate_deadline("Aucune date"), (0, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
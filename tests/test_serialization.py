@@ -0,0 +1,88 @@
+import os
+import io
+import sys
+import json
+import unittest
+from enum import Enum
+from pathlib import Path
+from datetime import date, datetime
+from dataclasses import dataclass, field
+
+# Add the src directory to PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from serialization import JSONArrayWriter, JSONObjectWriter, dumpb, dumps, loads, pack, unpack
+
+
+class Decision(str, Enum):
+    RECEVABLE = "recevable"
+
+
+class Niveau(Enum):
+    ELEVE = "élevé"
+
+
+@dataclass
+class Resultat:
+    decision: Decision
+    confiance: float
+    criteres: dict = field(default_factory=dict)
+
+
+class TestSerialization(unittest.TestCase):
+    def test_native_types(self):
+        """Dates, énumérations, dataclasses et chemins sans passe to_dict"""
+        payload = {
+            'resultat': Resultat(Decision.RECEVABLE, 0.9, {'delai': {'date': date(2014, 3, 12)}}),
+            'niveau': Niveau.ELEVE,
+            'traite_le': datetime(2024, 1, 2, 3, 4, 5),
+            'chemin': Path('rapports') / 'a.json',
+            1: 'clé numérique'
+        }
+        self.assertEqual(loads(dumpb(payload)), {
+            'resultat': {'decision': 'recevable', 'confiance': 0.9, 'criteres': {'delai': {'date': '2014-03-12'}}},
+            'niveau': 'élevé',
+            'traite_le': '2024-01-02T03:04:05',
+            'chemin': str(Path('rapports') / 'a.json'),
+            '1': 'clé numérique'
+        })
+
+    def test_text_output(self):
+        """Sortie UTF-8 non échappée, indentée sur demande"""
+        text = dumps({'montant': '1 250,00 €', 'liste': [1]}, indent=True)
+        self.assertIn('€', text)
+        self.assertIn('\n  "liste"', text)
+        self.assertEqual(json.loads(text), {'montant': '1 250,00 €', 'liste': [1]})
+        with self.assertRaises(TypeError):
+            dumpb(object())
+
+    def test_stream_writers(self):
+        """Les lots sont écrits élément par élément et forment un JSON valide"""
+        reports = [{'fichier': f'{i}.pdf', 'date': date(2014, 1, i + 1)} for i in range(3)]
+        stream = io.BytesIO()
+        with JSONArrayWriter(stream, lines=True) as writer:
+            for report in reports:
+                writer.write(report)
+        self.assertEqual(stream.getvalue().count(b'\n'), 4)
+        self.assertEqual(loads(stream.getvalue()), [dict(r, date=r['date'].isoformat()) for r in reports])
+
+        stream = io.BytesIO()
+        with JSONObjectWriter(stream) as writer:
+            for report in reports:
+                writer.write(report['fichier'], report)
+        self.assertEqual(list(loads(stream.getvalue())), ['0.pdf', '1.pdf', '2.pdf'])
+
+        stream = io.BytesIO()
+        with JSONArrayWriter(stream, lines=True):
+            pass
+        self.assertEqual(loads(stream.getvalue()), [])
+
+    def test_pack_round_trip(self):
+        job = {'id': 'abc', 'fichiers': [{'nom': 'a.txt', 'resultat': {'montants': [1.5]}}]}
+        copy = unpack(pack(job))
+        self.assertEqual(copy, job)
+        self.assertIsNot(copy['fichiers'], job['fichiers'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import sys
+import io
+import shutil
+import zipfile
+import tempfile
+import unittest
+
+# Add the src directory to PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from processing.text_extraction import (
+    PYPDF_AVAILABLE, PDFMINER_AVAILABLE, TESSERACT_AVAILABLE, ExtractionError, MemoryReader,
+    detect_format, extract_text, iter_pages
+)
+
+_DOCX_BODY = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>'
+    '<w:p><w:r><w:t>Réclamation CSPE</w:t></w:r></w:p>'
+    '<w:p><w:r><w:t xml:space="preserve">Montant : </w:t></w:r><w:r><w:t>1 250,00 €</w:t></w:r></w:p>'
+    '<w:p><w:r><w:br w:type="page"/><w:t>Décision du 12/03/2014</w:t></w:r></w:p>'
+    '</w:body></w:document>'
+)
+
+
+def _docx_bytes():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('[Content_Types].xml', '<Types/>')
+        archive.writestr('word/document.xml', _DOCX_BODY)
+    return buffer.getvalue()
+
+
+class TestTextExtraction(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_detect_format(self):
+        """Le contenu prime sur l'extension"""
+        self.assertEqual(detect_format('scan.txt', b'%PDF-1.4'), 'pdf')
+        self.assertEqual(detect_format(None, b'\x89PNG\r\n'), 'image')
+        self.assertEqual(detect_format('lettre.docx', b'PK\x03\x04'), 'docx')
+        self.assertEqual(detect_format('notes.txt', b'Bonjour'), 'text')
+
+    def test_text_encodings(self):
+        """Texte UTF-8 ou Windows-1252 lu depuis un chemin ou des octets"""
+        path = os.path.join(self.tmp_dir, 'courrier.txt')
+        with open(path, 'wb') as f:
+            f.write("Délibération du 1er mars".encode('cp1252'))
+        self.assertEqual(extract_text(path), "Délibération du 1er mars")
+        self.assertEqual(extract_text("Créance".encode('utf-8'), 'a.txt'), "Créance")
+
+    def test_docx_pages(self):
+        """Un DOCX est lu en flux, une page par saut de page"""
+        pages = list(iter_pages(io.BytesIO(_docx_bytes()), 'dossier.docx'))
+        self.assertEqual(pages, ["Réclamation CSPE\nMontant : 1 250,00 €", "Décision du 12/03/2014"])
+
+    def test_memoryview_source(self):
+        """Un tampon en mémoire (ex. UploadedFile.getbuffer()) est lu sans copie ni fichier temporaire"""
+        buffer = bytearray(_docx_bytes())
+        self.assertEqual(extract_text(memoryview(buffer), 'dossier.docx', page_separator=' | '),
+                         "Réclamation CSPE\nMontant : 1 250,00 € | Décision du 12/03/2014")
+        reader = MemoryReader(memoryview(buffer))
+        self.assertEqual(reader.read(4), b'PK\x03\x04')
+        reader.seek(-2, io.SEEK_END)
+        self.assertEqual(reader.tell(), len(buffer) - 2)
+        reader.close()
+        buffer.append(0)  # plus aucune vue exportée sur le tampon
+
+    def test_invalid_docx(self):
+        with self.assertRaises(ExtractionError):
+            extract_text(b'PK\x03\x04corrompu', 'dossier.docx')
+
+    @unittest.skipUnless(PYPDF_AVAILABLE or PDFMINER_AVAILABLE, "aucun moteur PDF installé")
+    def test_pdf_pages(self):
+        from fpdf import FPDF
+        pdf = FPDF()
+        for text in ("Page un", "Page deux"):
+            pdf.add_page()
+            pdf.set_font('Helvetica', size=12)
+            pdf.cell(0, 10, text)
+        pages = iter_pages(bytes(pdf.output()), 'dossier.pdf')
+        self.assertIn("Page un", next(pages))
+        self.assertIn("Page deux", next(pages))
+
+    @unittest.skipIf(PYPDF_AVAILABLE or PDFMINER_AVAILABLE, "un moteur PDF est installé")
+    def test_pdf_without_backend(self):
+        with self.assertRaises(ExtractionError):
+            extract_text(b'%PDF-1.4\n', 'dossier.pdf')
+
+    @unittest.skipIf(TESSERACT_AVAILABLE, "Tesseract est installé")
+    def test_image_without_ocr(self):
+        with self.assertRaises(ExtractionError):
+            extract_text(b'\x89PNG\r\n\x1a\n', 'scan.png')
+
+
+if __name__ == '__main__':
+    unittest.main()